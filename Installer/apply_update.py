@@ -0,0 +1,58 @@
+import sys
+import argparse
+from pathlib import Path
+
+from engine.components import COMPONENTS, InstallTargets, default_appdata_path, default_documents_path
+from engine.delta import DeltaConflict, DeltaError, DeltaPackage, install_resolver, tree_resolver, update_merge
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Apply an offline update package to an install or a Configs tree.")
+    parser.add_argument("package", type=Path)
+    parser.add_argument("--game", type=Path, help="FFXIV install folder (the one containing 'game')")
+    parser.add_argument("--documents", type=Path, default=default_documents_path())
+    parser.add_argument("--appdata", type=Path, default=default_appdata_path())
+    parser.add_argument("--configs", type=Path, help="Update a Configs source tree instead of an install")
+    parser.add_argument("--component", action="append", choices=sorted(COMPONENTS),
+                        help="Component to update (repeatable, default: all installed)")
+    parser.add_argument("--character", action="append",
+                        help="FFXIV_CHR folder or character ID to update the character settings of "
+                             "(repeatable, default: every character found)")
+    parser.add_argument("--force", action="store_true", help="Overwrite files that differ from the base version")
+    parser.add_argument("--dry-run", action="store_true", help="Check the base hashes without writing anything")
+    args = parser.parse_args(argv)
+
+    def log(message: str, tag: str):
+        print(message)
+
+    if args.configs:
+        resolve, merge = tree_resolver(args.configs), None
+    else:
+        resolve = install_resolver(InstallTargets(args.game, args.documents, args.appdata), args.component,
+                                   args.character)
+        merge = update_merge(log)
+
+    try:
+        with DeltaPackage(args.package) as package:
+            label = " → ".join(label for label in (package.base_label, package.target_label) if label)
+            print(f"Applying {args.package.name}{f' ({label})' if label else ''}")
+            result = package.apply(
+                resolve, force=args.force, dry_run=args.dry_run,
+                log=log, record=args.configs is None, merge=merge
+            )
+    except DeltaConflict as e:
+        print(f"ERROR: {e}")
+        print("Re-run with --force to overwrite the files that differ where the update ships the whole file")
+        return 1
+    except (DeltaError, OSError) as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    verb = "would update" if args.dry_run else "updated"
+    print(f"{len(result.applied)} {verb}, {len(result.merged)} merged, {len(result.current)} already current, "
+          f"{len(result.skipped)} not installed, {len(result.conflicts)} conflicts skipped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+import os
+import sys
+import json
+import time
+import shutil
+import threading
+import platform
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from build_payload import make_exclude
+from synthetic_configs import generate_configs
+from engine.components import COMPONENTS, InstallTargets
+from engine.filters import filters_for
+from engine.payload import PAYLOAD_TREES, Payload, build_payload
+from engine.scheduler import CopyScheduler, DEFAULT_WORKERS
+from engine.sources import DirectorySource, SourceTree
+from engine.sync import sync_tree
+from engine.verify import verify_tree
+
+RESULTS_VERSION = 1
+STATE_ENV = "LOCALAPPDATA" if sys.platform == "win32" else "XDG_STATE_HOME"
+
+
+@dataclass
+class StageResult:
+    stage: str
+    run: int
+    seconds: float
+    files: int
+    bytes: int
+    peak_rss_mb: Optional[float]
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.bytes / 1048576 / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["files_per_second"] = round(self.files_per_second, 1)
+        data["mb_per_second"] = round(self.mb_per_second, 2)
+        return data
+
+
+def current_rss_bytes() -> Optional[int]:
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                    "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage"
+                )
+            ]
+
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        get_info = ctypes.windll.psapi.GetProcessMemoryInfo
+        get_info.argtypes = (wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD)
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        if not get_info(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return None
+        return counters.WorkingSetSize
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class RssSampler:
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        rss = current_rss_bytes()
+        if rss is not None:
+            self.peak = max(self.peak or 0, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> "RssSampler":
+        self._sample()
+        if self.peak is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._sample()
+
+    @property
+    def peak_mb(self) -> Optional[float]:
+        return self.peak / 1048576 if self.peak is not None else None
+
+
+def drop_caches():
+    os.sync()
+    with open("/proc/sys/vm/drop_caches", "w") as f:
+        f.write("3\n")
+
+
+def component_sources(configs: Path, payload: Optional[Payload]) -> Dict[str, Tuple[SourceTree, Callable[[str], bool]]]:
+    sources = {}
+    for component in COMPONENTS.values():
+        if payload is not None:
+            tree: SourceTree = payload.tree(component.payload_prefix)
+        else:
+            tree = DirectorySource(configs / component.payload_prefix)
+        filters = filters_for(component.name)
+        sources[component.name] = (filters.apply(tree), filters.excludes)
+    return sources
+
+
+def workload(sources: Dict[str, Tuple[SourceTree, Callable[[str], bool]]]) -> Tuple[int, int]:
+    files = total = 0
+    for source, _ in sources.values():
+        scanned, _ = source.scan()
+        files += len(scanned)
+        total += sum(entry.size for entry in scanned.values())
+    return files, total
+
+
+def make_targets(root: Path) -> InstallTargets:
+    (root / "game" / "game").mkdir(parents=True, exist_ok=True)
+    return InstallTargets(root / "game", root / "documents", root / "appdata")
+
+
+def install(sources, targets: InstallTargets, scheduler: CopyScheduler):
+    for name, (source, ignore) in sources.items():
+        sync_tree(source, targets.destination(COMPONENTS[name]), ignore=ignore, scheduler=scheduler)
+
+
+def verify(sources, targets: InstallTargets, scheduler: CopyScheduler, full: bool):
+    for name, (source, ignore) in sources.items():
+        report = verify_tree(source, targets.destination(COMPONENTS[name]), name,
+                             ignore=ignore, full=full, scheduler=scheduler)
+        if not report.clean:
+            raise RuntimeError(f"verify found differences in {name}: {len(report.missing)} missing, "
+                               f"{len(report.modified)} modified")
+
+
+def timed(stage: str, run: int, files: int, size: int, fn: Callable[[], object]) -> StageResult:
+    with RssSampler() as sampler:
+        start = time.perf_counter()
+        fn()
+        seconds = time.perf_counter() - start
+    return StageResult(stage, run, seconds, files, size, sampler.peak_mb)
+
+
+def run_benchmark(configs: Path, work: Path, runs: int, workers: int, use_payload: bool,
+                  cold_caches: bool) -> List[StageResult]:
+    results: List[StageResult] = []
+    config_files = sum(1 for tree in PAYLOAD_TREES for p in (configs / tree).rglob("*") if p.is_file())
+    config_bytes = sum(p.stat().st_size for tree in PAYLOAD_TREES for p in (configs / tree).rglob("*") if p.is_file())
+    for run in range(1, runs + 1):
+        run_dir = work / f"run{run}"
+        os.environ[STATE_ENV] = str(run_dir / "state")
+        payload_path = run_dir / "payload.zip"
+        results.append(timed("build-payload", run, config_files, config_bytes,
+                             lambda: build_payload(configs, payload_path, exclude=make_exclude(None))))
+
+        payload = Payload(payload_path) if use_payload else None
+        try:
+            sources = component_sources(configs, payload)
+            files, size = workload(sources)
+            targets = make_targets(run_dir / "install")
+            with CopyScheduler(workers) as scheduler:
+                if cold_caches:
+                    drop_caches()
+                results.append(timed("install-cold", run, files, size, lambda: install(sources, targets, scheduler)))
+                results.append(timed("install-warm", run, files, size, lambda: install(sources, targets, scheduler)))
+                results.append(timed("verify-quick", run, files, size,
+                                     lambda: verify(sources, targets, scheduler, False)))
+                results.append(timed("verify-full", run, files, size,
+                                     lambda: verify(sources, targets, scheduler, True)))
+        finally:
+            if payload is not None:
+                payload.close()
+        shutil.rmtree(run_dir, ignore_errors=True)
+    return results
+
+
+def summarize(results: List[StageResult]) -> Dict[str, float]:
+    stages: Dict[str, List[float]] = {}
+    for result in results:
+        stages.setdefault(result.stage, []).append(result.seconds)
+    return {stage: statistics.median(values) for stage, values in stages.items()}
+
+
+def print_comparison(summary: Dict[str, float], baseline_path: Path):
+    try:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))["summary"]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"WARNING: cannot read baseline {baseline_path}: {e}")
+        return
+    print(f"Compared with {baseline_path.name}:")
+    for stage, seconds in summary.items():
+        before = baseline.get(stage)
+        if not before:
+            continue
+        change = (seconds - before) / before * 100
+        print(f"  {stage:<14} {before:>8.3f} s -> {seconds:>8.3f} s ({change:+.1f}%)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the install stages headlessly against temp directories.")
+    parser.add_argument("--configs", type=Path, help="Benchmark a real Configs tree instead of a synthetic one")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic tree")
+    parser.add_argument("--scale", type=float, default=1.0, help="File count multiplier of the synthetic tree")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--source", choices=("payload", "directory"), default="payload",
+                        help="Install from the built payload (like the release exe) or straight from the folders")
+    parser.add_argument("--work-dir", type=Path, help="Scratch folder on the disk to measure (default: system temp)")
+    parser.add_argument("--drop-caches", action="store_true",
+                        help="Drop the Linux page cache before each cold install (needs root)")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    if args.work_dir:
+        args.work_dir.mkdir(parents=True, exist_ok=True)
+    work = Path(tempfile.mkdtemp(prefix="xeldar-bench-", dir=args.work_dir))
+    try:
+        if args.configs:
+            configs = args.configs
+            source_label = str(configs)
+        else:
+            configs = work / "Configs"
+            start = time.perf_counter()
+            files, total = generate_configs(configs, args.seed, args.scale)
+            print(f"Generated {files} synthetic files ({total / 1048576:.1f} MB) "
+                  f"in {time.perf_counter() - start:.1f} s")
+            source_label = f"synthetic seed={args.seed} scale={args.scale}"
+
+        results = run_benchmark(configs, work, max(1, args.runs), args.workers,
+                                args.source == "payload", args.drop_caches)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    for result in results:
+        rss = f"{result.peak_rss_mb:>7.1f} MB RSS" if result.peak_rss_mb is not None else ""
+        print(f"  run {result.run} {result.stage:<14} {result.seconds:>8.3f} s {result.files_per_second:>9.0f} files/s "
+              f"{result.mb_per_second:>8.1f} MB/s {rss}")
+    summary = summarize(results)
+    if args.baseline:
+        print_comparison(summary, args.baseline)
+
+    if args.output:
+        report = {
+            "version": RESULTS_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "source": source_label,
+            "install_source": args.source,
+            "workers": args.workers,
+            "runs": [result.to_dict() for result in results],
+            "summary": {stage: round(seconds, 4) for stage, seconds in summary.items()},
+        }
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
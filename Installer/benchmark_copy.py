@@ -0,0 +1,58 @@
+import sys
+import argparse
+import tempfile
+from pathlib import Path
+
+from engine.backends import BACKENDS, HardlinkBackend, backend_named, benchmark_backends, save_preference
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the copy backends on the real Configs payload.")
+    parser.add_argument("--configs", type=Path, default=Path(__file__).parent.parent / "Configs")
+    parser.add_argument("--dest", type=Path, help="Scratch folder on the target volume (default: system temp)")
+    parser.add_argument("--backend", action="append", help="Backend to test (repeatable, default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per backend, the fastest is reported")
+    parser.add_argument("--save", action="store_true", help="Remember the fastest backend for this machine")
+    parser.add_argument("--reset", action="store_true", help="Forget the saved backend and use auto-detection")
+    args = parser.parse_args(argv)
+
+    if args.reset:
+        save_preference(None)
+        print("Cleared saved copy backend, auto-detection will be used")
+        return 0
+    if not args.configs.is_dir():
+        print(f"ERROR: missing config folder: {args.configs}")
+        return 1
+
+    names = args.backend or list(BACKENDS) + [f"{HardlinkBackend.name}+{name}" for name in BACKENDS]
+    try:
+        backends = [backend_named(name) for name in names]
+    except KeyError as e:
+        print(f"ERROR: unknown backend {e}")
+        return 1
+
+    dest = args.dest or Path(tempfile.gettempdir())
+    dest.mkdir(parents=True, exist_ok=True)
+    results = benchmark_backends(args.configs, dest, backends, max(1, args.repeat))
+    for result in results:
+        if not result.supported:
+            reason = f" ({result.error})" if result.error else ""
+            print(f"  {result.backend:<22} unsupported on this volume{reason}")
+            continue
+        print(f"  {result.backend:<22} {result.seconds:>8.3f} s {result.files / result.seconds:>9.0f} files/s "
+              f"{result.mb_per_second:>9.1f} MB/s")
+
+    supported = [result for result in results if result.supported]
+    if not supported:
+        print("ERROR: no backend works for this destination")
+        return 1
+    fastest = min(supported, key=lambda result: result.seconds)
+    print(f"Fastest: {fastest.backend}")
+    if args.save:
+        save_preference(fastest.backend)
+        print(f"Saved {fastest.backend} as the copy backend for this machine")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -32,13 +32,24 @@ pyinstaller --onefile ^
     --name "Xeldar FFXIV Installer" ^
     --icon "X.ico" ^
     --add-data "X.ico;." ^
-    --add-data "..\Configs\FFXIV Configs;FFXIV Configs" ^
-    --add-data "..\Configs\Mods Configs;Mods Configs" ^
-    --add-data "..\Configs\ReShade Configs;ReShade Configs" ^
-    --add-data "..\Configs\Plugin Configs;Plugin Configs" ^
     --clean ^
     ffxiv_config_installer.py
 
+echo.
+if exist "dist\Xeldar FFXIV Installer.exe" (
+    echo Packing config payload...
+    python build_payload.py --append-to "dist\Xeldar FFXIV Installer.exe"
+    if errorlevel 1 (
+        echo ========================================
+        echo  BUILD FAILED
+        echo ========================================
+        echo Packing the config payload failed, the executable has no configs bundled.
+        echo.
+        pause
+        exit /b 1
+    )
+)
+
 echo.
 if exist "dist\Xeldar FFXIV Installer.exe" (
     echo ========================================
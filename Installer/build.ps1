@@ -33,15 +33,26 @@ pyinstaller --onefile `
     --name "Xeldar FFXIV Installer" `
     --icon "X.ico" `
     --add-data "X.ico;." `
-    --add-data "..\Configs\FFXIV Configs;FFXIV Configs" `
-    --add-data "..\Configs\Mods Configs;Mods Configs" `
-    --add-data "..\Configs\ReShade Configs;ReShade Configs" `
-    --add-data "..\Configs\Plugin Configs;Plugin Configs" `
     --clean `
     ffxiv_config_installer.py
 
 Write-Host ""
 
+if (Test-Path "dist\Xeldar FFXIV Installer.exe") {
+    Write-Host "Packing config payload..." -ForegroundColor Yellow
+    python build_payload.py --append-to "dist\Xeldar FFXIV Installer.exe"
+    if ($LASTEXITCODE -ne 0) {
+        Write-Host "========================================"  -ForegroundColor Red
+        Write-Host "  BUILD FAILED"  -ForegroundColor Red
+        Write-Host "========================================"  -ForegroundColor Red
+        Write-Host "Packing the config payload failed, the executable has no configs bundled."
+        Write-Host ""
+        Read-Host "Press Enter to exit"
+        exit 1
+    }
+    Write-Host ""
+}
+
 if (Test-Path "dist\Xeldar FFXIV Installer.exe") {
     Write-Host "========================================"  -ForegroundColor Green
     Write-Host "  BUILD SUCCESSFUL!"  -ForegroundColor Green
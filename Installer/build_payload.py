@@ -0,0 +1,107 @@
+import sys
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from engine.components import COMPONENTS, component_for_path
+from engine.filters import COMMON_RULES, FilterSet, filters_for, load_rules_file
+from engine.payload import PAYLOAD_TREES, append_payload, build_payload, dedup_report
+from engine.profiles import PROFILE_CACHE_PREFIX, PROFILES_PREFIX, build_profile_cache
+from engine.sources import DirectorySource
+from engine.sqlitedb import compact_databases
+
+
+def make_exclude(extra: Optional[Dict[str, List[str]]]):
+    common = FilterSet(COMMON_RULES + (extra or {}).get("*", []))
+    cache: Dict[str, FilterSet] = {}
+
+    def exclude(arcname: str) -> bool:
+        component = component_for_path(arcname)
+        if component is None:
+            return common.excludes(arcname)
+        if component.name not in cache:
+            cache[component.name] = filters_for(component.name, extra)
+        return cache[component.name].excludes(arcname[len(component.payload_prefix) + 1:])
+
+    return exclude
+
+
+def print_report(configs: Path, extra: Optional[Dict[str, List[str]]]):
+    total_files = total_bytes = 0
+    for component in COMPONENTS.values():
+        source = DirectorySource(configs / component.payload_prefix)
+        for rule, (count, size) in sorted(filters_for(component.name, extra).report(source).items()):
+            print(f"  {component.name + ': ' + rule:<48} {count:>6} files {size / 1048576:>9.2f} MB")
+            total_files += count
+            total_bytes += size
+    print(f"Excluded {total_files} files ({total_bytes / 1048576:.2f} MB) in total")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pack the Configs folders into the installer payload archive.")
+    parser.add_argument("--configs", type=Path, default=Path(__file__).parent.parent / "Configs")
+    parser.add_argument("--output", type=Path, default=Path(__file__).parent / "dist" / "payload.zip")
+    parser.add_argument("--append-to", type=Path, help="Executable to append the payload to")
+    parser.add_argument("--rules", type=Path, help="Extra exclude rules file ([component] sections, gitignore syntax)")
+    parser.add_argument("--report", action="store_true", help="Only report what the exclude rules would drop")
+    parser.add_argument("--no-compact-db", action="store_true",
+                        help="Pack SQLite databases as they are instead of checkpointing and vacuuming them")
+    parser.add_argument("--no-profile-cache", action="store_true",
+                        help="Do not decode the plugin profile strings into the payload at build time")
+    args = parser.parse_args(argv)
+
+    for tree in PAYLOAD_TREES:
+        if not (args.configs / tree).is_dir():
+            print(f"ERROR: missing config folder: {args.configs / tree}")
+            return 1
+
+    extra = load_rules_file(args.rules) if args.rules else None
+    if args.report:
+        print_report(args.configs, extra)
+        return 0
+
+    exclude = make_exclude(extra)
+    with tempfile.TemporaryDirectory(prefix="xeldar-payload-") as work_dir:
+        overrides = {}
+        if not args.no_compact_db:
+            compacted = compact_databases(args.configs, PAYLOAD_TREES, Path(work_dir), exclude)
+            for arcname in compacted.orphaned:
+                print(f"WARNING: {arcname} has no database next to it and cannot be checkpointed")
+            if compacted.compacted:
+                print(f"Compacted {len(compacted.compacted)} SQLite database(s): "
+                      f"{compacted.bytes_before / 1048576:.2f} MB -> {compacted.bytes_after / 1048576:.2f} MB")
+            overrides = compacted.compacted
+        extra_trees = {}
+        if not args.no_profile_cache and (args.configs / PROFILES_PREFIX).is_dir():
+            cache_dir = Path(work_dir) / "profiles"
+            cached, failed = build_profile_cache(DirectorySource(args.configs / PROFILES_PREFIX), cache_dir)
+            for rel, error in failed:
+                print(f"WARNING: {rel} could not be decoded and is packed without a cache entry: {error}")
+            if cached:
+                print(f"Decoded {len(cached)} plugin profile(s) into the profile cache")
+                extra_trees[PROFILE_CACHE_PREFIX] = cache_dir
+        entries = build_payload(args.configs, args.output, exclude=exclude, overrides=overrides,
+                                extra_trees=extra_trees)
+    raw_size = sum(entry["size"] for entry in entries.values())
+    packed_size = args.output.stat().st_size
+    print(f"Packed {len(entries)} files ({raw_size / 1048576:.1f} MB) into {args.output} ({packed_size / 1048576:.1f} MB)")
+    saved = dedup_report(entries)
+    for name, (count, size) in sorted(saved.items()):
+        print(f"  dedup {name:<24} {count:>6} duplicate files {size / 1048576:>9.2f} MB")
+    if saved:
+        total_count = sum(count for count, _ in saved.values())
+        total_size = sum(size for _, size in saved.values())
+        print(f"Stored {total_count} duplicate files once, saving {total_size / 1048576:.2f} MB")
+
+    if args.append_to:
+        if not args.append_to.is_file():
+            print(f"ERROR: executable not found: {args.append_to}")
+            return 1
+        append_payload(args.append_to, args.output)
+        print(f"Appended payload to {args.append_to}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
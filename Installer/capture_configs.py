@@ -0,0 +1,95 @@
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import List
+
+from engine.capture import CaptureError, CaptureResult, capture_component
+from engine.components import COMPONENTS, InstallTargets, default_appdata_path, default_documents_path
+from engine.filters import filters_for, load_rules_file
+from engine.scheduler import CopyScheduler, DEFAULT_WORKERS
+
+
+def print_summary(results: List[CaptureResult], dry_run: bool, verbose: bool, show: int):
+    verb = "would copy" if dry_run else "copied"
+    for result in results:
+        status = "CHANGED" if result.changed else "same"
+        print(
+            f"{result.component:<16} {status:<8} {len(result.added)} added, {len(result.updated)} updated, "
+            f"{len(result.removed)} removed, {result.unchanged} unchanged - {result.dest}"
+        )
+        for group, counts in sorted(result.groups().items()):
+            parts = ", ".join(f"{count} {kind}" for kind, count in counts.items())
+            print(f"    {group:<40} {parts}")
+        limit = None if verbose else show
+        for label, paths in (("+", result.added), ("~", result.updated), ("-", result.removed)):
+            for rel in paths[:limit]:
+                print(f"      {label} {rel}")
+            if limit is not None and len(paths) > limit:
+                print(f"      {label} ... {len(paths) - limit} more")
+        if result.missing:
+            print(f"    {len(result.missing)} file(s) are no longer in the live install (use --prune to remove them)")
+        for rel in result.checkpointed:
+            print(f"    folded the write-ahead log into {rel}")
+    total = sum(result.bytes_copied for result in results)
+    changed = sum(len(result.added) + len(result.updated) for result in results)
+    print(f"{changed} file(s) {verb} ({total / 1048576:.1f} MB)")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Copy the configs of a live install back into the Configs folders. Only files that "
+                    "changed since the last capture are read and copied."
+    )
+    parser.add_argument("--game", type=Path, help="FFXIV install folder (the one containing 'game')")
+    parser.add_argument("--documents", type=Path, default=default_documents_path())
+    parser.add_argument("--appdata", type=Path, default=default_appdata_path())
+    parser.add_argument("--configs", type=Path, default=Path(__file__).parent.parent / "Configs")
+    parser.add_argument("--component", action="append", choices=sorted(COMPONENTS),
+                        help="Component to capture (repeatable, default: all with a known location)")
+    parser.add_argument("--character", action="append",
+                        help="FFXIV_CHR folder or character ID to capture as the bundled character")
+    parser.add_argument("--rules", type=Path, help="Extra exclude rules file ([component] sections, gitignore syntax)")
+    parser.add_argument("--prune", action="store_true", help="Remove files that are no longer in the live install")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    parser.add_argument("--json", action="store_true", help="Print the change summary as JSON")
+    parser.add_argument("--show", type=int, default=10, help="Files listed per category in the text summary")
+    parser.add_argument("-v", "--verbose", action="store_true", help="List every changed file")
+    args = parser.parse_args(argv)
+
+    if args.game is not None and not args.game.is_dir():
+        parser.error(f"game folder does not exist: {args.game}")
+
+    def log(message: str, tag: str = "info"):
+        if tag in ("warning", "error"):
+            print(f"{tag.upper()}: {message}", file=sys.stderr)
+        elif tag != "detail" and not args.json:
+            print(message)
+
+    targets = InstallTargets(args.game, args.documents, args.appdata)
+    extra = load_rules_file(args.rules) if args.rules else None
+    results: List[CaptureResult] = []
+    try:
+        with CopyScheduler(args.workers) as scheduler:
+            for name in args.component or list(COMPONENTS):
+                results += capture_component(
+                    name, targets, args.configs, filters_for(name, extra), args.character,
+                    prune=args.prune, dry_run=args.dry_run, scheduler=scheduler, log=log
+                )
+    except CaptureError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+    if not results:
+        print("ERROR: none of the selected components were found in the live install", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps({"dry_run": args.dry_run, "components": [r.to_dict() for r in results]}, indent=2))
+    else:
+        print_summary(results, args.dry_run, args.verbose, args.show)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
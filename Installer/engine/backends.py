@@ -0,0 +1,274 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .manifest import HASH_CHUNK_SIZE, copy_stream, hash_file, scan_tree, state_dir
+
+FICLONE = 0x40049409
+PREFERENCE_FILE = "backend.json"
+READ_ONLY_SUFFIXES = (
+    ".fx", ".fxh", ".png", ".dds", ".jpg", ".jpeg", ".bmp", ".tga", ".pmp", ".ttf", ".otf",
+)
+
+
+class CopyBackend:
+    name: str = "copy"
+
+    def available(self) -> bool:
+        return True
+
+    def copy(self, src: Path, target: Path):
+        shutil.copyfile(src, target)
+        shutil.copystat(src, target)
+
+    def copy_hashed(self, src: Path, target: Path, digest: Optional[str] = None) -> str:
+        with open(src, "rb") as f_in, open(target, "wb") as f_out:
+            digest = copy_stream(f_in, f_out)
+        shutil.copystat(src, target)
+        return digest
+
+    def probe(self, sample: Path, dest_dir: Path) -> bool:
+        if not self.available():
+            return False
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        probe_dst = dest_dir / f".xeldar-probe-{os.getpid()}-{threading.get_ident()}"
+        try:
+            self.copy(sample, probe_dst)
+            return probe_dst.stat().st_size == sample.stat().st_size
+        except OSError:
+            return False
+        finally:
+            try:
+                probe_dst.unlink()
+            except OSError:
+                pass
+
+
+class CloneBackend(CopyBackend):
+    name = "clone"
+
+    def available(self) -> bool:
+        return sys.platform.startswith("linux")
+
+    def copy(self, src: Path, target: Path):
+        import fcntl
+        with open(src, "rb") as f_in, open(target, "wb") as f_out:
+            fcntl.ioctl(f_out.fileno(), FICLONE, f_in.fileno())
+        shutil.copystat(src, target)
+
+    def copy_hashed(self, src: Path, target: Path, digest: Optional[str] = None) -> str:
+        self.copy(src, target)
+        return digest or hash_file(target)
+
+
+class ZeroCopyBackend(CopyBackend):
+    name = "zero-copy"
+
+    def available(self) -> bool:
+        return hasattr(os, "copy_file_range") or (hasattr(os, "sendfile") and sys.platform.startswith("linux"))
+
+    def copy(self, src: Path, target: Path):
+        with open(src, "rb") as f_in, open(target, "wb") as f_out:
+            fd_in, fd_out = f_in.fileno(), f_out.fileno()
+            remaining = os.fstat(fd_in).st_size
+            use_range = hasattr(os, "copy_file_range")
+            while remaining > 0:
+                count = min(remaining, 64 * HASH_CHUNK_SIZE)
+                if use_range:
+                    try:
+                        sent = os.copy_file_range(fd_in, fd_out, count)
+                    except OSError:
+                        use_range = False
+                        continue
+                else:
+                    sent = os.sendfile(fd_out, fd_in, None, count)
+                if sent == 0:
+                    break
+                remaining -= sent
+        shutil.copystat(src, target)
+
+    def copy_hashed(self, src: Path, target: Path, digest: Optional[str] = None) -> str:
+        self.copy(src, target)
+        return digest or hash_file(target)
+
+
+class HardlinkBackend(CopyBackend):
+    name = "hardlink"
+
+    def __init__(self, fallback: Optional[CopyBackend] = None, suffixes: Tuple[str, ...] = READ_ONLY_SUFFIXES):
+        self.fallback = fallback or CopyBackend()
+        self.suffixes = suffixes
+
+    def _link(self, src: Path, target: Path) -> bool:
+        if not src.name.lower().endswith(self.suffixes):
+            return False
+        try:
+            os.link(src, target)
+            return True
+        except OSError:
+            return False
+
+    def copy(self, src: Path, target: Path):
+        if not self._link(src, target):
+            self.fallback.copy(src, target)
+
+    def copy_hashed(self, src: Path, target: Path, digest: Optional[str] = None) -> str:
+        if self._link(src, target):
+            return digest or hash_file(target)
+        return self.fallback.copy_hashed(src, target, digest)
+
+    def probe(self, sample: Path, dest_dir: Path) -> bool:
+        try:
+            return _volume(sample) == _volume(dest_dir) and self.fallback.probe(sample, dest_dir)
+        except OSError:
+            return False
+
+
+BACKENDS: Dict[str, CopyBackend] = {
+    backend.name: backend for backend in (CloneBackend(), ZeroCopyBackend(), CopyBackend())
+}
+
+
+def backend_named(name: str) -> CopyBackend:
+    if name == HardlinkBackend.name:
+        return HardlinkBackend()
+    if name.startswith(HardlinkBackend.name + "+"):
+        return HardlinkBackend(BACKENDS[name.split("+", 1)[1]])
+    return BACKENDS[name]
+
+
+def backend_label(backend: CopyBackend) -> str:
+    if isinstance(backend, HardlinkBackend):
+        return f"{backend.name}+{backend.fallback.name}"
+    return backend.name
+
+
+def _preferred() -> Optional[str]:
+    try:
+        return json.loads((state_dir() / PREFERENCE_FILE).read_text(encoding="utf-8")).get("backend")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def save_preference(name: Optional[str]):
+    path = state_dir() / PREFERENCE_FILE
+    if name is None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        return
+    path.write_text(json.dumps({"backend": name}), encoding="utf-8")
+
+
+_detected: Dict[Tuple[int, int], CopyBackend] = {}
+_detect_lock = threading.Lock()
+
+
+def _volume(path: Path) -> int:
+    while not path.exists():
+        path = path.parent
+    return os.stat(path).st_dev
+
+
+def _sample_file(root: Path) -> Optional[Path]:
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_file(follow_symlinks=False):
+                        return Path(entry.path)
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(Path(entry.path))
+        except OSError:
+            continue
+    return None
+
+
+def detect_backend(src_dir: Path, dest_dir: Path) -> CopyBackend:
+    key = (_volume(src_dir), _volume(dest_dir))
+    with _detect_lock:
+        if key in _detected:
+            return _detected[key]
+        sample = _sample_file(src_dir)
+        if sample is None:
+            return CopyBackend()
+        candidates: List[CopyBackend] = []
+        preferred = _preferred()
+        if preferred:
+            try:
+                candidates.append(backend_named(preferred))
+            except KeyError:
+                pass
+        candidates += list(BACKENDS.values())
+        chosen = CopyBackend()
+        for backend in candidates:
+            try:
+                if backend.probe(sample, dest_dir):
+                    chosen = backend
+                    break
+            except OSError:
+                continue
+        _detected[key] = chosen
+        return chosen
+
+
+@dataclass
+class BenchmarkResult:
+    backend: str
+    files: int
+    bytes: int
+    seconds: float
+    supported: bool = True
+    error: str = ""
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.bytes / 1048576 / self.seconds if self.seconds else 0.0
+
+
+def benchmark_backends(src_root: Path, dest_dir: Path,
+                       backends: Optional[Iterable[CopyBackend]] = None,
+                       repeat: int = 1) -> List[BenchmarkResult]:
+    stats, dirs = scan_tree(src_root)
+    total = sum(st.st_size for st in stats.values())
+    if backends is None:
+        backends = list(BACKENDS.values()) + [HardlinkBackend()]
+    results = []
+    sample = _sample_file(src_root)
+    for backend in backends:
+        label = backend_label(backend)
+        if sample is None or not backend.probe(sample, dest_dir):
+            results.append(BenchmarkResult(label, 0, 0, 0.0, supported=False))
+            continue
+        best = None
+        error = ""
+        for _ in range(repeat):
+            target = Path(tempfile.mkdtemp(dir=dest_dir, prefix=".xeldar-bench-"))
+            try:
+                for rel in dirs:
+                    (target / rel).mkdir(parents=True, exist_ok=True)
+                start = time.perf_counter()
+                for rel in stats:
+                    backend.copy(src_root / rel, target / rel)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            except OSError as e:
+                error = str(e)
+                break
+            finally:
+                shutil.rmtree(target, ignore_errors=True)
+        if best is None:
+            results.append(BenchmarkResult(label, 0, 0, 0.0, supported=False, error=error))
+        else:
+            results.append(BenchmarkResult(label, len(stats), total, best))
+    return results
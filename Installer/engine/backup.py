@@ -0,0 +1,244 @@
+import os
+import json
+import shutil
+import threading
+from pathlib import Path
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from .ffxivcfg import find_characters
+from .manifest import DEFERRED_TIER, Manifest, hash_file, scan_tree, state_dir
+from .scheduler import CopyScheduler
+from .sources import set_mtime
+
+DEFAULT_KEEP = 5
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+@dataclass
+class Snapshot:
+    name: str
+    snapshot_id: str
+    path: Path
+    destination: str = ""
+    files: Dict[str, dict] = field(default_factory=dict)
+    written: List[str] = field(default_factory=list)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry["size"] for entry in self.files.values())
+
+
+@dataclass
+class RestoreResult:
+    restored: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+
+
+def installed_manifests(dest: Path) -> List[Manifest]:
+    manifests = [Manifest.for_destination(dest), Manifest.for_destination(dest, tier=DEFERRED_TIER)]
+    for name in find_characters(dest):
+        manifests.append(Manifest.for_destination(dest / name))
+    return manifests
+
+
+def installed_paths(dest: Path) -> Set[str]:
+    paths: Set[str] = set()
+    for manifest in installed_manifests(dest):
+        prefix = "" if manifest.dest == dest else f"{manifest.dest.name}/"
+        paths.update(f"{prefix}{rel}" for rel in (*manifest.files, *manifest.protected))
+    return paths
+
+
+class BackupStore:
+
+    def __init__(self, root: Optional[Path] = None, keep: int = DEFAULT_KEEP,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root or state_dir() / "backups"
+        self.keep = max(1, keep)
+        self.max_bytes = max_bytes
+        self.objects_dir = self.root / "objects"
+        self.snapshots_dir = self.root / "snapshots"
+        self._lock = threading.Lock()
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def snapshots(self, name: str) -> List[Snapshot]:
+        folder = self.snapshots_dir / name
+        if not folder.is_dir():
+            return []
+        snapshots = []
+        for path in sorted(folder.glob("*.json"), reverse=True):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            snapshots.append(Snapshot(
+                name, path.stem, path, data.get("destination", ""), data.get("files", {}), data.get("written", [])
+            ))
+        return snapshots
+
+    def latest(self, name: str) -> Optional[Snapshot]:
+        snapshots = self.snapshots(name)
+        return snapshots[0] if snapshots else None
+
+    def snapshot(self, name: str, source: Path, manifest: Optional[Manifest] = None,
+                 scheduler: Optional[CopyScheduler] = None,
+                 ignore: Optional[Callable[[str], bool]] = None,
+                 written: Iterable[str] = ()) -> Optional[Snapshot]:
+        stats, _ = scan_tree(source)
+        if ignore is not None:
+            stats = {rel: st for rel, st in stats.items() if not ignore(rel)}
+        if not stats:
+            return None
+        written = sorted(set(written) | installed_paths(source))
+        with self._lock:
+            return self._snapshot(name, source, stats, manifest, scheduler, written)
+
+    def _snapshot(self, name: str, source: Path, stats: Dict[str, os.stat_result], manifest: Optional[Manifest],
+                  scheduler: Optional[CopyScheduler], written: List[str]) -> Snapshot:
+        previous = self.latest(name)
+        known = previous.files if previous else {}
+        files: Dict[str, dict] = {}
+        to_hash: List[str] = []
+        for rel, st in stats.items():
+            entry = known.get(rel)
+            if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                files[rel] = dict(entry)
+                continue
+            installed = manifest.files.get(rel) if manifest else None
+            if installed and installed.dest_digest and installed.matches_dest(st):
+                files[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "digest": installed.dest_digest}
+                continue
+            to_hash.append(rel)
+
+        def store(rel: str) -> dict:
+            path = source / rel
+            digest = hash_file(path)
+            blob = self._object_path(digest)
+            if not blob.exists():
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = blob.with_name(f"{blob.name}.{threading.get_ident()}.tmp")
+                shutil.copyfile(path, tmp_path)
+                os.replace(tmp_path, blob)
+            st = stats[rel]
+            return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "digest": digest}
+
+        for rel, entry in zip(to_hash, (scheduler or CopyScheduler(1)).map(store, to_hash)):
+            files[rel] = entry
+
+        missing = [rel for rel, entry in files.items() if not self._object_path(entry["digest"]).exists()]
+        for rel, entry in zip(missing, (scheduler or CopyScheduler(1)).map(store, missing)):
+            files[rel] = entry
+
+        if previous and previous.files == files and set(written) <= set(previous.written):
+            return previous
+
+        snapshot_id = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = self.snapshots_dir / name / f"{snapshot_id}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"destination": str(source), "files": files, "written": written}, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+        self._rotate()
+        return Snapshot(name, snapshot_id, path, str(source), files, written)
+
+    def rotate(self):
+        with self._lock:
+            self._rotate()
+
+    def _rotate(self):
+        all_snapshots: List[Snapshot] = []
+        if self.snapshots_dir.is_dir():
+            for folder in self.snapshots_dir.iterdir():
+                if not folder.is_dir():
+                    continue
+                snapshots = self.snapshots(folder.name)
+                for expired in snapshots[self.keep:]:
+                    expired.path.unlink(missing_ok=True)
+                all_snapshots += snapshots[:self.keep]
+
+        newest = {snapshot.name: snapshot.snapshot_id for snapshot in sorted(
+            all_snapshots, key=lambda s: s.snapshot_id)}
+        evictable = sorted(
+            (s for s in all_snapshots if newest.get(s.name) != s.snapshot_id),
+            key=lambda s: s.snapshot_id
+        )
+        while evictable and self._referenced_bytes(all_snapshots) > self.max_bytes:
+            oldest = evictable.pop(0)
+            oldest.path.unlink(missing_ok=True)
+            all_snapshots.remove(oldest)
+
+        self._collect_garbage({entry["digest"] for s in all_snapshots for entry in s.files.values()})
+
+    @staticmethod
+    def _referenced_bytes(snapshots: List[Snapshot]) -> int:
+        blobs: Dict[str, int] = {}
+        for snapshot in snapshots:
+            for entry in snapshot.files.values():
+                blobs[entry["digest"]] = entry["size"]
+        return sum(blobs.values())
+
+    def _collect_garbage(self, referenced: Set[str]):
+        if not self.objects_dir.is_dir():
+            return
+        for bucket in self.objects_dir.iterdir():
+            if not bucket.is_dir():
+                continue
+            for blob in bucket.iterdir():
+                if blob.name not in referenced and blob.suffix != ".tmp":
+                    blob.unlink(missing_ok=True)
+            if not any(bucket.iterdir()):
+                bucket.rmdir()
+
+    def restore(self, snapshot: Snapshot, dest: Path,
+                scheduler: Optional[CopyScheduler] = None) -> RestoreResult:
+        result = RestoreResult()
+        stats, _ = scan_tree(dest)
+        dest.mkdir(parents=True, exist_ok=True)
+        manifests = installed_manifests(dest)
+        written = set(snapshot.written) | installed_paths(dest)
+
+        to_restore: List[str] = []
+        for rel, entry in snapshot.files.items():
+            st = stats.get(rel)
+            if st is not None and st.st_size == entry["size"]:
+                if st.st_mtime_ns == entry["mtime_ns"] or hash_file(dest / rel) == entry["digest"]:
+                    result.unchanged += 1
+                    continue
+            to_restore.append(rel)
+
+        emptied: Set[str] = set()
+        for rel in sorted(set(stats) - set(snapshot.files)):
+            if rel not in written:
+                continue
+            (dest / rel).unlink(missing_ok=True)
+            result.deleted += 1
+            parts = rel.split("/")[:-1]
+            emptied.update("/".join(parts[:i]) for i in range(1, len(parts) + 1))
+        for rel in sorted(emptied, key=len, reverse=True):
+            folder = dest / rel
+            if folder.is_dir() and not any(folder.iterdir()):
+                folder.rmdir()
+
+        def restore_one(rel: str):
+            entry = snapshot.files[rel]
+            target = dest / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(f"{target.name}.xeldar-tmp")
+            shutil.copyfile(self._object_path(entry["digest"]), tmp_path)
+            set_mtime(tmp_path, entry["mtime_ns"])
+            os.replace(tmp_path, target)
+
+        (scheduler or CopyScheduler(1)).map(restore_one, to_restore)
+        result.restored = len(to_restore)
+
+        for manifest in manifests:
+            manifest.discard()
+        return result
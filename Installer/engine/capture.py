@@ -0,0 +1,153 @@
+import sqlite3
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from .components import COMPONENTS, InstallTargets
+from .ffxivcfg import find_characters, is_character_path, select_characters, shipped_characters
+from .filters import FilterSet
+from .manifest import Manifest, state_dir
+from .scheduler import CopyScheduler
+from .sources import DirectorySource, FilteredSource, SourceTree
+from .sqlitedb import compact_database, is_database_name, is_sqlite
+from .sync import apply_sync, plan_sync
+
+LogFn = Callable[[str, str], None]
+
+
+class CaptureError(ValueError):
+    pass
+
+
+def capture_index_dir() -> Path:
+    return state_dir() / "capture"
+
+
+@dataclass
+class CaptureResult:
+    component: str
+    source: Path
+    dest: Path
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    checkpointed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    bytes_copied: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+    def groups(self) -> Dict[str, Dict[str, int]]:
+        groups: Dict[str, Dict[str, int]] = {}
+        for kind, paths in (("added", self.added), ("updated", self.updated), ("removed", self.removed)):
+            for rel in paths:
+                group = groups.setdefault(rel.split("/", 1)[0] if "/" in rel else "(top level)", {})
+                group[kind] = group.get(kind, 0) + 1
+        return groups
+
+    def to_dict(self) -> dict:
+        return {
+            "component": self.component,
+            "source": str(self.source),
+            "dest": str(self.dest),
+            "added": self.added,
+            "updated": self.updated,
+            "removed": self.removed,
+            "missing": self.missing,
+            "checkpointed": self.checkpointed,
+            "unchanged": self.unchanged,
+            "bytes_copied": self.bytes_copied,
+        }
+
+
+def capture_tree(component: str, source: SourceTree, live: Path, dest: Path, ignore: Callable[[str], bool],
+                 prune: bool = False, dry_run: bool = False, scheduler: Optional[CopyScheduler] = None,
+                 log: Optional[LogFn] = None, index_root: Optional[Path] = None) -> CaptureResult:
+    result = CaptureResult(component, live, dest)
+    manifest = Manifest.for_destination(dest, root=index_root or capture_index_dir())
+    plan = plan_sync(source, dest, manifest, ignore, prune=True)
+    for rel in plan.copy:
+        (result.updated if (dest / rel).exists() else result.added).append(rel)
+    if prune:
+        result.removed = list(plan.delete)
+    else:
+        result.missing = list(plan.delete)
+        plan.delete = []
+        plan.stale_dirs = []
+    result.unchanged = len(plan.unchanged)
+    result.bytes_copied = plan.copy_bytes
+    if dry_run:
+        return result
+
+    apply_sync(plan, manifest, scheduler=scheduler)
+    for rel in plan.copy:
+        wal = live / f"{rel}-wal"
+        if not is_database_name(rel) or not wal.is_file() or not wal.stat().st_size or not is_sqlite(dest / rel):
+            continue
+        try:
+            compact_database(live / rel, dest / rel)
+        except sqlite3.Error as e:
+            if log:
+                log(f"Could not fold the write-ahead log into {rel}: {e}", "warning")
+            continue
+        st = (dest / rel).stat()
+        entry = manifest.files[rel]
+        entry.dest_mtime_ns, entry.dest_size = st.st_mtime_ns, st.st_size
+        result.checkpointed.append(rel)
+    if result.checkpointed:
+        manifest.save()
+    return result
+
+
+def capture_template(configs_dir: Path, live: Path, wanted: Optional[List[str]]) -> Optional[str]:
+    shipped = shipped_characters(DirectorySource(configs_dir))
+    found = find_characters(live)
+    if wanted:
+        chosen = select_characters(found, wanted)
+        if not chosen:
+            raise CaptureError(f"character {wanted[0]} not found in {live}")
+        return chosen[0]
+    if shipped and shipped[0] in found:
+        return shipped[0]
+    if len(found) == 1:
+        return found[0]
+    if found:
+        raise CaptureError(f"{live} has {len(found)} characters, choose one with --character")
+    return None
+
+
+def capture_component(name: str, targets: InstallTargets, configs: Path, filters: FilterSet,
+                      characters: Optional[List[str]] = None, prune: bool = False, dry_run: bool = False,
+                      scheduler: Optional[CopyScheduler] = None, log: Optional[LogFn] = None,
+                      index_root: Optional[Path] = None) -> List[CaptureResult]:
+    component = COMPONENTS[name]
+    live = targets.destination(component)
+    if live is None or not live.is_dir():
+        return []
+    dest = configs / component.payload_prefix
+    source = filters.apply(DirectorySource(live))
+    if name != "ffxiv-config":
+        return [capture_tree(name, source, live, dest, filters.excludes, prune, dry_run, scheduler, log, index_root)]
+
+    results = [capture_tree(
+        name, FilteredSource(source, lambda rel: not is_character_path(rel)), live, dest,
+        lambda rel: filters.excludes(rel) or is_character_path(rel), prune, dry_run, scheduler, log, index_root
+    )]
+    character = capture_template(dest, live, characters)
+    if character is None:
+        return results
+    template = (shipped_characters(DirectorySource(dest)) or [character])[0]
+    if log and template != character:
+        log(f"Capturing {character} as the bundled {template}", "info")
+
+    def excludes(rel: str) -> bool:
+        return filters.excludes(f"{template}/{rel}")
+
+    results.append(capture_tree(
+        name, FilteredSource(DirectorySource(live / character), lambda rel: not excludes(rel)),
+        live / character, dest / template, excludes, prune, dry_run, scheduler, log, index_root
+    ))
+    return results
@@ -0,0 +1,76 @@
+import os
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+ROOT_GAME = "game"
+ROOT_GAME_FOLDER = "game-folder"
+ROOT_DOCUMENTS = "documents"
+ROOT_APPDATA = "appdata"
+
+
+@dataclass(frozen=True)
+class Component:
+    name: str
+    label: str
+    payload_prefix: str
+    root: str
+    dest_name: str
+
+
+COMPONENTS: Dict[str, Component] = {
+    component.name: component for component in (
+        Component("skills", "Skill Mods", "Mods Configs/Skills", ROOT_GAME, "Skills"),
+        Component("reshade-presets", "ReShade Presets", "ReShade Configs/reshade-presets",
+                  ROOT_GAME_FOLDER, "reshade-presets"),
+        Component("reshade-shaders", "ReShade Shaders", "ReShade Configs/reshade-shaders",
+                  ROOT_GAME_FOLDER, "reshade-shaders"),
+        Component("ffxiv-config", "FFXIV Configuration", "FFXIV Configs/FINAL FANTASY XIV - A Realm Reborn",
+                  ROOT_DOCUMENTS, "FINAL FANTASY XIV - A Realm Reborn"),
+        Component("plugin-configs", "Plugin Configs", "Plugin Configs/pluginConfigs", ROOT_APPDATA, "pluginConfigs"),
+    )
+}
+
+
+def component_for_path(path: str) -> Optional[Component]:
+    for component in COMPONENTS.values():
+        if path == component.payload_prefix or path.startswith(component.payload_prefix + "/"):
+            return component
+    return None
+
+
+def default_documents_path() -> Path:
+    return Path(os.path.expanduser("~")) / "Documents" / "My Games"
+
+
+def default_appdata_path() -> Path:
+    return Path(os.environ.get("APPDATA", "")) / "XIVLauncher"
+
+
+@dataclass
+class InstallTargets:
+    game: Optional[Path] = None
+    documents: Optional[Path] = None
+    appdata: Optional[Path] = None
+
+    @classmethod
+    def defaults(cls, game: Optional[Path] = None) -> "InstallTargets":
+        return cls(game, default_documents_path(), default_appdata_path())
+
+    def root(self, name: str) -> Optional[Path]:
+        if name == ROOT_GAME:
+            return self.game
+        if name == ROOT_GAME_FOLDER:
+            if self.game is None:
+                return None
+            game_folder = self.game / "game"
+            return game_folder if game_folder.exists() else self.game
+        if name == ROOT_DOCUMENTS:
+            return self.documents
+        if name == ROOT_APPDATA:
+            return self.appdata
+        raise KeyError(name)
+
+    def destination(self, component: Component) -> Optional[Path]:
+        root = self.root(component.root)
+        return root / component.dest_name if root is not None else None
@@ -0,0 +1,405 @@
+import io
+import os
+import re
+import json
+import zipfile
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .components import COMPONENTS, InstallTargets, component_for_path
+from .ffxivcfg import CFG_NAME, CfgMerger, find_characters, is_character_path, target_characters
+from .jsonmerge import JsonMerger
+from .manifest import Manifest, ManifestEntry, hash_file, new_hasher
+from .payload import PAYLOAD_TREES
+from .reshade import prune_shaders
+from .sources import DirectorySource, FilteredSource, OverlaySource, SourceFile, SourceTree, set_mtime
+from .sqlitedb import SqliteMerger, compact_databases, is_database_name
+from .sync import MERGE_REPLACE, MERGE_UPDATED, MergeFn, chain_merges, merge_applies
+
+DELTA_VERSION = 1
+DELTA_SUFFIX = ".xdu"
+DELTA_INDEX = "delta.json"
+
+OP_ADD = "add"
+OP_REPLACE = "replace"
+OP_PATCH = "patch"
+OP_REMOVE = "remove"
+
+BLOCK_SIZE = 4096
+MIN_CHUNK = 64
+MAX_CHUNK = 16 * 1024
+PATCH_RATIO = 0.5
+TEXT_SNIFF = 8192
+
+_JSON_BOUNDARY = re.compile(rb"[}\]],|\n")
+_TEXT_BOUNDARY = re.compile(rb"\n")
+
+LogFn = Callable[[str, str], None]
+Resolver = Callable[[str], List[Tuple[Path, str]]]
+
+
+class DeltaError(ValueError):
+    pass
+
+
+class DeltaConflict(DeltaError):
+
+    def __init__(self, conflicts: List[str]):
+        super().__init__(
+            f"{len(conflicts)} file(s) differ from the version this update was made for: " + ", ".join(conflicts[:5])
+        )
+        self.conflicts = conflicts
+
+
+def _digest(data: bytes) -> str:
+    hasher = new_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def is_merge_target(arcname: str) -> bool:
+    name = arcname.rsplit("/", 1)[-1].lower()
+    return name == CFG_NAME.lower() or is_database_name(name) or name.endswith(".json")
+
+
+def update_merge(log: Optional[LogFn] = None) -> MergeFn:
+    return chain_merges(CfgMerger(), SqliteMerger(), JsonMerger(log=log))
+
+
+def installer_view(configs_root: Path, work_dir: Path,
+                   exclude: Optional[Callable[[str], bool]] = None,
+                   prune: bool = True, compact: bool = True) -> Dict[str, SourceTree]:
+    overrides = compact_databases(configs_root, PAYLOAD_TREES, work_dir, exclude).compacted if compact else {}
+    view: Dict[str, SourceTree] = {}
+    for component in COMPONENTS.values():
+        prefix = component.payload_prefix
+        start = len(prefix) + 1
+        source: SourceTree = OverlaySource(
+            DirectorySource(configs_root / prefix),
+            {arcname[start:]: path for arcname, path in overrides.items() if arcname.startswith(prefix + "/")}
+        )
+        if exclude is not None:
+            source = FilteredSource(source, lambda rel, prefix=prefix: not exclude(f"{prefix}/{rel}"))
+        view[prefix] = source
+    if prune:
+        shaders = COMPONENTS["reshade-shaders"].payload_prefix
+        pruned, selection = prune_shaders(view[shaders], view[COMPONENTS["reshade-presets"].payload_prefix])
+        if selection.files:
+            view[shaders] = pruned
+    return view
+
+
+def _read(source: SourceTree, rel: str) -> bytes:
+    with source.open(rel) as f:
+        return f.read()
+
+
+def _boundary_for(name: str, data: bytes) -> Optional["re.Pattern[bytes]"]:
+    if b"\0" in data[:TEXT_SNIFF]:
+        return None
+    return _JSON_BOUNDARY if name.lower().endswith(".json") else _TEXT_BOUNDARY
+
+
+def chunk_spans(data: bytes, boundary: Optional["re.Pattern[bytes]"]) -> List[Tuple[int, int]]:
+    if boundary is None:
+        return [(start, min(start + BLOCK_SIZE, len(data))) for start in range(0, len(data), BLOCK_SIZE)]
+    spans = []
+    start = 0
+    for match in boundary.finditer(data):
+        end = match.end()
+        while end - start > MAX_CHUNK:
+            spans.append((start, start + MAX_CHUNK))
+            start += MAX_CHUNK
+        if end - start >= MIN_CHUNK:
+            spans.append((start, end))
+            start = end
+    while start < len(data):
+        spans.append((start, min(start + MAX_CHUNK, len(data))))
+        start += MAX_CHUNK
+    return spans
+
+
+def diff_bytes(base: bytes, target: bytes, name: str = "") -> bytes:
+    boundary = _boundary_for(name, target)
+    index: Dict[bytes, int] = {}
+    for start, end in chunk_spans(base, boundary):
+        index.setdefault(base[start:end], start)
+
+    ops: List[List[object]] = []
+    inserted = bytearray()
+    for start, end in chunk_spans(target, boundary):
+        chunk = target[start:end]
+        offset = index.get(chunk)
+        if offset is not None:
+            if ops and ops[-1][0] == "c" and ops[-1][1] + ops[-1][2] == offset:
+                ops[-1][2] += len(chunk)
+            else:
+                ops.append(["c", offset, len(chunk)])
+        else:
+            if ops and ops[-1][0] == "i":
+                ops[-1][2] += len(chunk)
+            else:
+                ops.append(["i", len(inserted), len(chunk)])
+            inserted += chunk
+    return json.dumps(ops, separators=(",", ":")).encode("ascii") + b"\n" + bytes(inserted)
+
+
+def apply_patch(base: bytes, patch: bytes) -> bytes:
+    header, _, inserted = patch.partition(b"\n")
+    out = bytearray()
+    for kind, offset, length in json.loads(header):
+        source = base if kind == "c" else inserted
+        if offset + length > len(source):
+            raise DeltaError("patch refers past the end of its data")
+        out += source[offset:offset + length]
+    return bytes(out)
+
+
+@dataclass
+class DeltaStats:
+    added: int = 0
+    replaced: int = 0
+    patched: int = 0
+    removed: int = 0
+    target_bytes: int = 0
+    package_bytes: int = 0
+
+
+def build_delta(base: Dict[str, SourceTree], target: Dict[str, SourceTree], out_path: Path,
+                base_label: str = "", target_label: str = "") -> DeltaStats:
+    stats = DeltaStats()
+    ops: List[dict] = []
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+        for tree in sorted(set(base) | set(target)):
+            base_files: Dict[str, SourceFile] = base[tree].scan()[0] if tree in base else {}
+            target_files: Dict[str, SourceFile] = target[tree].scan()[0] if tree in target else {}
+            for rel in sorted(set(base_files) | set(target_files)):
+                arcname = f"{tree}/{rel}"
+                target_file = target_files.get(rel)
+                if target_file is None:
+                    ops.append({"op": OP_REMOVE, "path": arcname, "base": _digest(_read(base[tree], rel))})
+                    stats.removed += 1
+                    continue
+
+                content = _read(target[tree], rel)
+                op = {
+                    "path": arcname,
+                    "digest": _digest(content),
+                    "size": len(content),
+                    "mtime_ns": target_file.mtime_ns,
+                    "data": f"data/{len(ops)}",
+                }
+                if rel not in base_files:
+                    stats.target_bytes += len(content)
+                    op["op"] = OP_ADD
+                    archive.writestr(op["data"], content)
+                    ops.append(op)
+                    stats.added += 1
+                    continue
+
+                previous = _read(base[tree], rel)
+                op["base"] = _digest(previous)
+                if op["base"] == op["digest"]:
+                    continue
+                stats.target_bytes += len(content)
+                patch = None if is_merge_target(arcname) else diff_bytes(previous, content, rel)
+                if patch is not None and len(patch) < len(content) * PATCH_RATIO:
+                    op["op"] = OP_PATCH
+                    archive.writestr(op["data"], patch)
+                    stats.patched += 1
+                else:
+                    op["op"] = OP_REPLACE
+                    archive.writestr(op["data"], content)
+                    stats.replaced += 1
+                ops.append(op)
+
+        index = {"version": DELTA_VERSION, "from": base_label, "to": target_label, "ops": ops}
+        archive.writestr(DELTA_INDEX, json.dumps(index, indent=1))
+    os.replace(tmp_path, out_path)
+    stats.package_bytes = out_path.stat().st_size
+    return stats
+
+
+@dataclass
+class DeltaResult:
+    applied: List[str] = field(default_factory=list)
+    current: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    conflicts: List[str] = field(default_factory=list)
+    merged: List[str] = field(default_factory=list)
+
+
+class _ContentSource(SourceTree):
+
+    def __init__(self, rel: str, content: bytes):
+        self.rel = rel
+        self.content = content
+        self.name = rel.rsplit("/", 1)[-1]
+
+    def exists(self) -> bool:
+        return True
+
+    def scan(self) -> Tuple[Dict[str, SourceFile], Set[str]]:
+        return {self.rel: SourceFile(len(self.content), 0, _digest(self.content))}, set()
+
+    def digest(self, rel: str) -> str:
+        return _digest(self.content)
+
+    def open(self, rel: str) -> BinaryIO:
+        return io.BytesIO(self.content)
+
+
+class DeltaPackage:
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.archive = zipfile.ZipFile(path, "r")
+        try:
+            index = json.loads(self.archive.read(DELTA_INDEX))
+        except KeyError as e:
+            raise DeltaError(f"{path.name} is not an update package") from e
+        if index.get("version") != DELTA_VERSION:
+            raise DeltaError(f"Unsupported update package version in {path.name}")
+        self.base_label: str = index.get("from", "")
+        self.target_label: str = index.get("to", "")
+        self.ops: List[dict] = index["ops"]
+
+    def close(self):
+        self.archive.close()
+
+    def __enter__(self) -> "DeltaPackage":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _content(self, op: dict, current: Optional[bytes]) -> bytes:
+        data = self.archive.read(op["data"])
+        if op["op"] == OP_PATCH:
+            data = apply_patch(current or b"", data)
+        if _digest(data) != op["digest"]:
+            raise DeltaError(f"{op['path']}: patched result does not match the update")
+        return data
+
+    def apply(self, resolve: Resolver, force: bool = False, dry_run: bool = False,
+              log: Optional[LogFn] = None, record: bool = True,
+              merge: Optional[MergeFn] = None) -> DeltaResult:
+        result = DeltaResult()
+        planned: List[Tuple[dict, str, Path, Path, str, Optional[bytes], bool]] = []
+        for op in self.ops:
+            locations = resolve(op["path"])
+            if not locations:
+                result.skipped.append(op["path"])
+                continue
+            for root, rel in locations:
+                label = op["path"] if len(locations) == 1 else f"{op['path']} ({root.name})"
+                target = root / rel
+                current = target.read_bytes() if target.is_file() else None
+                current_digest = _digest(current) if current is not None else None
+
+                if op["op"] == OP_REMOVE:
+                    if current is None:
+                        result.current.append(label)
+                    elif current_digest != op["base"] and not force:
+                        result.conflicts.append(label)
+                    else:
+                        planned.append((op, label, root, target, rel, None, False))
+                    continue
+                if current_digest == op["digest"]:
+                    result.current.append(label)
+                    continue
+                if op["op"] == OP_PATCH and current is None:
+                    result.skipped.append(label)
+                    continue
+                merging = (current is not None and op["op"] != OP_PATCH and current_digest != op.get("base")
+                           and merge_applies(merge, rel))
+                if current is not None and op["op"] != OP_ADD and current_digest != op["base"] and not merging:
+                    if op["op"] == OP_PATCH or not force:
+                        result.conflicts.append(label)
+                        continue
+                planned.append((op, label, root, target, rel, current, merging))
+
+        if result.conflicts and not force:
+            raise DeltaConflict(result.conflicts)
+        contents = [None if op["op"] == OP_REMOVE else self._content(op, current)
+                    for op, _, _, _, _, current, _ in planned]
+        if dry_run:
+            result.applied = [label for _, label, *_ in planned]
+            return result
+
+        manifests: Dict[Path, Manifest] = {}
+        for (op, label, root, target, rel, current, merging), content in zip(planned, contents):
+            manifest = manifests.get(root)
+            if manifest is None and record:
+                manifest = manifests[root] = Manifest.for_destination(root)
+            if op["op"] == OP_REMOVE:
+                target.unlink()
+                if manifest is not None:
+                    manifest.files.pop(rel, None)
+                if log:
+                    log(f"  - {label}", "detail")
+                result.applied.append(label)
+                continue
+
+            outcome = MERGE_REPLACE
+            if merging:
+                outcome = merge(_ContentSource(rel, content), rel, target)
+                if outcome == MERGE_REPLACE and op["op"] != OP_ADD and not force:
+                    result.conflicts.append(label)
+                    continue
+            if outcome == MERGE_REPLACE:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = target.with_name(f"{target.name}.xeldar-tmp")
+                tmp_path.write_bytes(content)
+                set_mtime(tmp_path, op["mtime_ns"])
+                os.replace(tmp_path, target)
+            if manifest is not None:
+                st = target.stat()
+                manifest.files[rel] = ManifestEntry(op["size"], op["digest"], op["mtime_ns"], st.st_mtime_ns,
+                                                    st.st_size, "" if outcome == MERGE_REPLACE else hash_file(target))
+            if outcome == MERGE_REPLACE:
+                if log:
+                    log(f"  {'+' if current is None else '~'} {label}", "detail")
+                result.applied.append(label)
+            else:
+                if log and outcome == MERGE_UPDATED:
+                    log(f"  * {label} (merged)", "detail")
+                result.merged.append(label)
+        for manifest in manifests.values():
+            manifest.save()
+        return result
+
+
+def install_resolver(targets: InstallTargets, components: Optional[Iterable[str]] = None,
+                     characters: Optional[Iterable[str]] = None) -> Resolver:
+    selected = set(components or COMPONENTS)
+    wanted = list(characters or [])
+    found: Dict[Path, List[str]] = {}
+
+    def resolve(arcname: str) -> List[Tuple[Path, str]]:
+        component = component_for_path(arcname)
+        if component is None or component.name not in selected:
+            return []
+        dest = targets.destination(component)
+        if dest is None or not dest.is_dir():
+            return []
+        rel = arcname[len(component.payload_prefix) + 1:]
+        if component.name != "ffxiv-config" or not is_character_path(rel):
+            return [(dest, rel)]
+        template, _, rel = rel.partition("/")
+        if dest not in found:
+            found[dest] = find_characters(dest)
+        return [(dest / name, rel) for name in target_characters(found[dest], template, wanted)]
+
+    return resolve
+
+
+def tree_resolver(configs_root: Path) -> Resolver:
+    def resolve(arcname: str) -> List[Tuple[Path, str]]:
+        tree, _, rel = arcname.partition("/")
+        return [(configs_root / tree, rel)]
+
+    return resolve
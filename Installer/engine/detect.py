@@ -0,0 +1,264 @@
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from .manifest import state_dir
+
+T = TypeVar("T")
+
+GAME_MARKER = "game"
+STEAM_APP_ID = "39210"
+STEAM_GAME_DIR = "FINAL FANTASY XIV Online"
+
+HKLM = "HKEY_LOCAL_MACHINE"
+HKCU = "HKEY_CURRENT_USER"
+
+GAME_REGISTRY_PROBES = [
+    (HKLM, rf"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall\Steam App {STEAM_APP_ID}", "InstallLocation"),
+    (HKLM, r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall\{2B41E132-07DF-4925-A3D3-F2D1765CBER7}_is1", "InstallLocation"),
+]
+
+STEAM_REGISTRY_PROBES = [
+    (HKCU, r"Software\Valve\Steam", "SteamPath"),
+    (HKLM, r"SOFTWARE\WOW6432Node\Valve\Steam", "InstallPath"),
+    (HKLM, r"SOFTWARE\Valve\Steam", "InstallPath"),
+]
+
+COMMON_PATHS = [
+    r"C:\Program Files (x86)\SquareEnix\FINAL FANTASY XIV - A Realm Reborn",
+    r"C:\Program Files\SquareEnix\FINAL FANTASY XIV - A Realm Reborn",
+    r"D:\Games\SquareEnix\FINAL FANTASY XIV - A Realm Reborn",
+    r"D:\SquareEnix\FINAL FANTASY XIV - A Realm Reborn",
+    r"E:\Games\SquareEnix\FINAL FANTASY XIV - A Realm Reborn",
+    r"C:\Games\SquareEnix\FINAL FANTASY XIV - A Realm Reborn",
+]
+
+STEAM_FALLBACK_PATHS = [
+    r"C:\Program Files (x86)\Steam",
+    r"C:\Program Files\Steam",
+]
+
+DEFAULT_PROBE_TIMEOUT = 1.5
+
+
+class Platform:
+
+    def read_registry(self, hive: str, key: str, value: str) -> Optional[str]:
+        return None
+
+    def exists(self, path: Path) -> bool:
+        return path.exists()
+
+    def read_text(self, path: Path) -> Optional[str]:
+        try:
+            return path.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return None
+
+
+class WindowsPlatform(Platform):
+
+    def __init__(self):
+        import winreg
+        self._winreg = winreg
+
+    def read_registry(self, hive: str, key: str, value: str) -> Optional[str]:
+        winreg = self._winreg
+        try:
+            with winreg.OpenKey(getattr(winreg, hive), key) as handle:
+                result, _ = winreg.QueryValueEx(handle, value)
+        except OSError:
+            return None
+        return str(result) if result else None
+
+
+class FakePlatform(Platform):
+
+    def __init__(self, registry: Optional[Dict[Tuple[str, str, str], str]] = None,
+                 files: Optional[Dict[str, str]] = None,
+                 delays: Optional[Dict[str, float]] = None):
+        self.registry = registry or {}
+        self.files = {self._norm(path): text for path, text in (files or {}).items()}
+        self.delays = {self._norm(prefix): delay for prefix, delay in (delays or {}).items()}
+
+    @staticmethod
+    def _norm(path) -> str:
+        return str(path).replace("\\", "/").rstrip("/").lower()
+
+    def _wait(self, path: str):
+        for prefix, delay in self.delays.items():
+            if path.startswith(prefix):
+                threading.Event().wait(delay)
+
+    def read_registry(self, hive: str, key: str, value: str) -> Optional[str]:
+        return self.registry.get((hive, key, value))
+
+    def exists(self, path: Path) -> bool:
+        norm = self._norm(path)
+        self._wait(norm)
+        return any(name == norm or name.startswith(norm + "/") for name in self.files)
+
+    def read_text(self, path: Path) -> Optional[str]:
+        norm = self._norm(path)
+        self._wait(norm)
+        return self.files.get(norm)
+
+
+def default_platform() -> Platform:
+    if sys.platform == "win32":
+        return WindowsPlatform()
+    return Platform()
+
+
+def parse_library_folders(text: str) -> List[str]:
+    tokens: List[str] = []
+    i, length = 0, len(text)
+    while i < length:
+        char = text[i]
+        if char == '"':
+            j = i + 1
+            chars = []
+            while j < length and text[j] != '"':
+                if text[j] == "\\" and j + 1 < length:
+                    j += 1
+                chars.append(text[j])
+                j += 1
+            tokens.append("".join(chars))
+            i = j + 1
+        elif char in "{}":
+            tokens.append(char)
+            i += 1
+        else:
+            i += 1
+
+    libraries: List[str] = []
+    depth = 0
+    for index, token in enumerate(tokens):
+        if token == "{":
+            depth += 1
+            continue
+        if token == "}":
+            depth -= 1
+            continue
+        if index + 1 >= len(tokens) or tokens[index + 1] in "{}":
+            continue
+        key, value = token.lower(), tokens[index + 1]
+        if key == "path" or (depth == 1 and key.isdigit() and (":" in value or value.startswith("/"))):
+            if value not in libraries:
+                libraries.append(value)
+    return libraries
+
+
+def _start(fn: Callable[[], T]) -> Tuple[threading.Event, List[T]]:
+    result: List[T] = []
+    done = threading.Event()
+
+    def target():
+        try:
+            result.append(fn())
+        except OSError:
+            pass
+        finally:
+            done.set()
+
+    threading.Thread(target=target, daemon=True).start()
+    return done, result
+
+
+def run_with_deadline(fns: Sequence[Callable[[], T]], timeout: float) -> Iterator[Tuple[bool, Optional[T]]]:
+    probes = [_start(fn) for fn in fns]
+    deadline = time.monotonic() + timeout
+    for done, result in probes:
+        if not done.wait(max(0.0, deadline - time.monotonic())):
+            yield False, None
+        else:
+            yield True, result[0] if result else None
+
+
+class GameDetector:
+
+    def __init__(self, platform: Optional[Platform] = None, cache_path: Optional[Path] = None,
+                 probe_timeout: float = DEFAULT_PROBE_TIMEOUT):
+        self.platform = platform or default_platform()
+        self.cache_path = cache_path or state_dir() / "detect.json"
+        self.probe_timeout = probe_timeout
+        self.slow_probes: List[str] = []
+
+    def load_cached(self) -> Optional[Path]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                value = json.load(f).get("game_path")
+        except (OSError, ValueError, AttributeError):
+            return None
+        return Path(value) if value else None
+
+    def remember(self, path: Path):
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump({"game_path": str(path)}, f)
+        except OSError:
+            pass
+
+    def steam_libraries(self) -> List[str]:
+        roots: List[str] = []
+        for hive, key, value in STEAM_REGISTRY_PROBES:
+            root = self.platform.read_registry(hive, key, value)
+            if root and root not in roots:
+                roots.append(root)
+        roots += [root for root in STEAM_FALLBACK_PATHS if root not in roots]
+
+        libraries: List[str] = []
+        vdf_paths = [Path(root) / "steamapps" / "libraryfolders.vdf" for root in roots]
+        reads = [lambda path=vdf_path: self.platform.read_text(path) for vdf_path in vdf_paths]
+        for root, vdf_path, (finished, text) in zip(roots, vdf_paths, run_with_deadline(reads, self.probe_timeout)):
+            if not finished:
+                self.slow_probes.append(str(vdf_path))
+                continue
+            if text is None:
+                continue
+            for library in [root] + parse_library_folders(text):
+                if library not in libraries:
+                    libraries.append(library)
+        return libraries
+
+    def candidates(self) -> List[Path]:
+        candidates: List[Path] = []
+        cached = self.load_cached()
+        if cached:
+            candidates.append(cached)
+        for hive, key, value in GAME_REGISTRY_PROBES:
+            location = self.platform.read_registry(hive, key, value)
+            if location:
+                candidates.append(Path(location))
+        for library in self.steam_libraries():
+            candidates.append(Path(library) / "steamapps" / "common" / STEAM_GAME_DIR)
+        candidates += [Path(path) for path in COMMON_PATHS]
+
+        unique: List[Path] = []
+        seen = set()
+        for candidate in candidates:
+            key = str(candidate).lower()
+            if key not in seen:
+                seen.add(key)
+                unique.append(candidate)
+        return unique
+
+    def is_game_dir(self, path: Path) -> bool:
+        return self.platform.exists(path / GAME_MARKER)
+
+    def detect(self) -> Optional[Path]:
+        self.slow_probes = []
+        candidates = self.candidates()
+        probes = [lambda path=candidate: self.is_game_dir(path) for candidate in candidates]
+        for candidate, (finished, found) in zip(candidates, run_with_deadline(probes, self.probe_timeout)):
+            if not finished:
+                self.slow_probes.append(str(candidate))
+                continue
+            if found:
+                self.remember(candidate)
+                return candidate
+        return None
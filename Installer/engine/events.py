@@ -0,0 +1,93 @@
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Union
+
+
+@dataclass
+class LogEvent:
+    message: str
+    tag: str = "info"
+
+
+@dataclass
+class ProgressEvent:
+    phase: str
+    files_done: int
+    files_total: int
+    bytes_done: int
+    bytes_total: int
+    current: str = ""
+
+    @property
+    def fraction(self) -> float:
+        if self.bytes_total > 0:
+            return min(1.0, self.bytes_done / self.bytes_total)
+        if self.files_total > 0:
+            return min(1.0, self.files_done / self.files_total)
+        return 0.0
+
+
+@dataclass
+class CallEvent:
+    callback: Callable[[], None]
+
+
+Event = Union[LogEvent, ProgressEvent, CallEvent]
+
+
+class EventBus:
+
+    def __init__(self):
+        self._queue: "queue.SimpleQueue[Event]" = queue.SimpleQueue()
+
+    def publish(self, event: Event):
+        self._queue.put(event)
+
+    def log(self, message: str, tag: str = "info"):
+        self._queue.put(LogEvent(message, tag))
+
+    def call(self, callback: Callable[[], None]):
+        self._queue.put(CallEvent(callback))
+
+    def drain(self, limit: int = 500) -> List[Event]:
+        events = []
+        try:
+            while len(events) < limit:
+                events.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return events
+
+
+class ProgressTracker:
+
+    def __init__(self, bus: EventBus, files_total: int = 0, bytes_total: int = 0):
+        self.bus = bus
+        self.files_total = files_total
+        self.bytes_total = bytes_total
+        self.files_done = 0
+        self.bytes_done = 0
+        self.phase = ""
+        self._lock = threading.Lock()
+
+    def set_phase(self, phase: str):
+        with self._lock:
+            self.phase = phase
+            event = self._snapshot("")
+        self.bus.publish(event)
+
+    def advance(self, files: int, nbytes: int, current: str = "", phase: Optional[str] = None):
+        with self._lock:
+            self.files_done += files
+            self.bytes_done += nbytes
+            if phase is not None:
+                self.phase = phase
+            event = self._snapshot(current)
+        self.bus.publish(event)
+
+    def _snapshot(self, current: str) -> ProgressEvent:
+        return ProgressEvent(
+            self.phase, self.files_done, self.files_total,
+            self.bytes_done, self.bytes_total, current
+        )
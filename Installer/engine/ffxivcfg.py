@@ -0,0 +1,199 @@
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .sources import SourceTree
+from .sync import MERGE_REPLACE, MERGE_UNCHANGED, MERGE_UPDATED
+
+CFG_NAME = "FFXIV.cfg"
+CHARACTER_PREFIX = "FFXIV_CHR"
+CHARACTER_PATTERN = re.compile(r"^FFXIV_CHR[0-9A-F]{16}$", re.IGNORECASE)
+
+MACHINE_KEYS = {
+    "MainAdapter",
+    "ScreenLeft",
+    "ScreenTop",
+    "ScreenWidth",
+    "ScreenHeight",
+    "ScreenMode",
+    "FullScreenWidth",
+    "FullScreenHeight",
+    "GuidVersion",
+    "LastLogin0",
+    "LastLogin1",
+    "WorldId",
+    "UPnP",
+    "Port",
+}
+MACHINE_SECTIONS = {
+    "Version",
+    "Network Settings",
+}
+
+
+def is_character_folder(name: str) -> bool:
+    return bool(CHARACTER_PATTERN.match(name))
+
+
+def is_character_path(rel: str) -> bool:
+    return is_character_folder(rel.split("/", 1)[0])
+
+
+def character_id(name: str) -> str:
+    name = name.strip()
+    if name.upper().startswith(CHARACTER_PREFIX):
+        name = name[len(CHARACTER_PREFIX):]
+    return name.upper()
+
+
+def find_characters(folder: Path) -> List[str]:
+    try:
+        entries = list(os.scandir(folder))
+    except OSError:
+        return []
+    return sorted(entry.name for entry in entries if entry.is_dir() and is_character_folder(entry.name))
+
+
+def shipped_characters(source: SourceTree) -> List[str]:
+    _, dirs = source.scan()
+    return sorted(rel for rel in dirs if "/" not in rel and is_character_folder(rel))
+
+
+def select_characters(found: List[str], wanted: Optional[Iterable[str]]) -> List[str]:
+    if not wanted:
+        return list(found)
+    ids = {character_id(name) for name in wanted}
+    return [name for name in found if character_id(name) in ids]
+
+
+def target_characters(found: List[str], template: str, wanted: Optional[Iterable[str]]) -> List[str]:
+    if not found and not wanted:
+        return [template]
+    return select_characters(found, wanted)
+
+
+def _split(line: str) -> Tuple[str, str]:
+    body = line.rstrip("\r\n")
+    return body[:len(body) - len(body.lstrip())], body.strip()
+
+
+def _section(text: str) -> Optional[str]:
+    if text.startswith("<") and text.endswith(">"):
+        return text[1:-1]
+    return None
+
+
+def parse_cfg(text: str) -> Dict[str, Dict[str, str]]:
+    sections: Dict[str, Dict[str, str]] = {}
+    current = sections.setdefault("", {})
+    for line in text.splitlines():
+        _, body = _split(line)
+        name = _section(body)
+        if name is not None:
+            current = sections.setdefault(name, {})
+        elif "\t" in body:
+            key, value = body.split("\t", 1)
+            current[key] = value.strip()
+    return sections
+
+
+def merge_cfg(existing: str, shipped: str, keep: Iterable[str] = MACHINE_KEYS,
+              keep_sections: Iterable[str] = MACHINE_SECTIONS) -> Optional[str]:
+    kept_sections = set(keep_sections)
+    wanted = {name: values for name, values in parse_cfg(shipped).items() if name not in kept_sections}
+    kept = set(keep)
+    newline = "\r\n" if "\r\n" in existing else "\n"
+    lines = existing.splitlines(keepends=True)
+    if lines and not lines[-1].endswith(("\r", "\n")):
+        lines[-1] += newline
+
+    out: List[str] = []
+    seen: Dict[str, set] = {}
+    changed = False
+    current = ""
+
+    def close_section():
+        nonlocal changed
+        missing = [(key, value) for key, value in wanted.get(current, {}).items()
+                   if key not in seen.get(current, set()) and key not in kept]
+        if not missing:
+            return
+        insert_at = len(out)
+        while insert_at > 0 and not out[insert_at - 1].strip():
+            insert_at -= 1
+        out[insert_at:insert_at] = [f"{key}\t{value}{newline}" for key, value in missing]
+        changed = True
+
+    for line in lines:
+        indent, body = _split(line)
+        name = _section(body)
+        if name is not None:
+            close_section()
+            current = name
+            seen.setdefault(current, set())
+            out.append(line)
+            continue
+        if "\t" not in body:
+            out.append(line)
+            continue
+        key, value = body.split("\t", 1)
+        seen.setdefault(current, set()).add(key)
+        target = wanted.get(current, {}).get(key)
+        if target is None or key in kept or target == value.strip():
+            out.append(line)
+            continue
+        ending = line[len(line.rstrip("\r\n")):]
+        out.append(f"{indent}{key}\t{target}{ending}")
+        changed = True
+    close_section()
+
+    for name, values in wanted.items():
+        if name in seen or not name:
+            continue
+        entries = [f"{key}\t{value}{newline}" for key, value in values.items() if key not in kept]
+        if out and out[-1].strip():
+            out.append(newline)
+        out.append(f"<{name}>{newline}")
+        out.extend(entries)
+        changed = True
+
+    return "".join(out) if changed else None
+
+
+class CfgMerger:
+
+    def __init__(self, keep: Iterable[str] = MACHINE_KEYS, keep_sections: Iterable[str] = MACHINE_SECTIONS):
+        self.keep = set(keep)
+        self.keep_sections = set(keep_sections)
+
+    def handles(self, rel: str) -> bool:
+        return rel.lower() == CFG_NAME.lower()
+
+    def __call__(self, source: SourceTree, rel: str, target: Path) -> str:
+        if rel.lower() != CFG_NAME.lower():
+            return MERGE_REPLACE
+        try:
+            raw = target.read_bytes()
+            with source.open(rel) as handle:
+                shipped = handle.read().decode("utf-8-sig")
+            existing = raw.decode("utf-8-sig")
+        except (OSError, UnicodeDecodeError):
+            return MERGE_REPLACE
+        if not any(parse_cfg(shipped).values()):
+            return MERGE_UNCHANGED
+        merged = merge_cfg(existing, shipped, self.keep, self.keep_sections)
+        if merged is None:
+            return MERGE_UNCHANGED
+
+        tmp_path = target.with_name(f"{target.name}.xeldar-tmp")
+        try:
+            tmp_path.write_bytes(merged.encode("utf-8-sig" if raw.startswith(b"\xef\xbb\xbf") else "utf-8"))
+            os.replace(tmp_path, target)
+        except BaseException:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            raise
+        return MERGE_UPDATED
@@ -0,0 +1,170 @@
+import re
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .sources import FilteredSource, SourceTree
+
+COMMON_RULES = [
+    "*.tmp",
+    "*.old",
+    "*.bak",
+    "Thumbs.db",
+    "desktop.ini",
+    ".DS_Store",
+]
+
+DEFAULT_RULES: Dict[str, List[str]] = {
+    "ffxiv-config": [
+        "/log/",
+        "/screenshots/",
+        "/backup/",
+        "/cfgcopy/",
+        "FFXIV_CHR*/log/",
+    ],
+    "plugin-configs": [
+        "*.db-wal",
+        "*.db-shm",
+        "*.sqlite3-wal",
+        "*.sqlite3-shm",
+        "backups/",
+        "backup/",
+        "backup-*.sqlite3",
+    ],
+}
+
+DEFERRED_RULES: Dict[str, List[str]] = {
+    "plugin-configs": [
+        "GatherbuddyReborn/*fish_records*",
+        "GatherbuddyReborn/world_locations.json",
+        "vnavmesh/meshcache/",
+        "QoLBar/iconCache.json",
+        "ChatTwo/EmoteCacheV1/",
+        "LMeter/Fonts/",
+    ],
+}
+DEFERRED_SECTION_SUFFIX = ":deferred"
+
+RULES_FILE_NAME = "filters.txt"
+
+
+@dataclass
+class Rule:
+    pattern: str
+    negate: bool
+    regex: "re.Pattern[str]"
+
+    def __str__(self) -> str:
+        return ("!" if self.negate else "") + self.pattern
+
+
+def _translate(pattern: str) -> "re.Pattern[str]":
+    anchored = pattern.startswith("/") or "/" in pattern.rstrip("/")
+    directory = pattern.endswith("/")
+    body = pattern.strip("/")
+
+    parts = []
+    i = 0
+    while i < len(body):
+        char = body[i]
+        if body.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif body.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif char == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif char == "?":
+            parts.append("[^/]")
+            i += 1
+        elif char == "[":
+            end = body.find("]", i)
+            if end == -1:
+                parts.append(re.escape(char))
+                i += 1
+            else:
+                parts.append(body[i:end + 1].replace("\\", "\\\\"))
+                i = end + 1
+        else:
+            parts.append(re.escape(char))
+            i += 1
+
+    prefix = "^" if anchored else "^(?:.*/)?"
+    suffix = "/.*$" if directory else "(?:/.*)?$"
+    return re.compile(prefix + "".join(parts) + suffix, re.IGNORECASE)
+
+
+def parse_rule(line: str) -> Optional[Rule]:
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    return Rule(line, negate, _translate(line))
+
+
+class FilterSet:
+
+    def __init__(self, rules: Iterable[str] = ()):
+        self.rules: List[Rule] = [rule for rule in map(parse_rule, rules) if rule is not None]
+
+    def match(self, rel: str) -> Optional[Rule]:
+        matched: Optional[Rule] = None
+        for rule in self.rules:
+            if rule.regex.match(rel):
+                matched = rule
+        return matched
+
+    def excludes(self, rel: str) -> bool:
+        rule = self.match(rel)
+        return rule is not None and not rule.negate
+
+    def apply(self, source: SourceTree) -> SourceTree:
+        if not self.rules:
+            return source
+        return FilteredSource(source, lambda rel: not self.excludes(rel))
+
+    def report(self, source: SourceTree) -> Dict[str, Tuple[int, int]]:
+        saved: Dict[str, Tuple[int, int]] = {}
+        files, _ = source.scan()
+        for rel, entry in files.items():
+            rule = self.match(rel)
+            if rule is None or rule.negate:
+                continue
+            count, size = saved.get(str(rule), (0, 0))
+            saved[str(rule)] = (count + 1, size + entry.size)
+        return saved
+
+
+def load_rules_file(path: Path) -> Dict[str, List[str]]:
+    rules: Dict[str, List[str]] = {}
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return rules
+    section = "*"
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("[") and stripped.endswith("]"):
+            section = stripped[1:-1].strip()
+            continue
+        if stripped and not stripped.startswith("#"):
+            rules.setdefault(section, []).append(stripped)
+    return rules
+
+
+def filters_for(component: str, extra: Optional[Dict[str, List[str]]] = None) -> FilterSet:
+    rules = COMMON_RULES + DEFAULT_RULES.get(component, [])
+    if extra:
+        rules = rules + extra.get("*", []) + extra.get(component, [])
+    return FilterSet(rules)
+
+
+def deferred_for(component: str, extra: Optional[Dict[str, List[str]]] = None) -> FilterSet:
+    rules = DEFERRED_RULES.get(component, [])
+    if extra:
+        rules = rules + extra.get(component + DEFERRED_SECTION_SUFFIX, [])
+    return FilterSet(rules)
@@ -0,0 +1,530 @@
+import hashlib
+import threading
+from pathlib import Path
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from .backup import BackupStore
+from .components import COMPONENTS, ROOT_APPDATA, ROOT_DOCUMENTS, ROOT_GAME, InstallTargets, default_documents_path
+from .events import EventBus, ProgressTracker
+from .ffxivcfg import CfgMerger, find_characters, is_character_path, shipped_characters, target_characters
+from .filters import FilterSet, deferred_for, filters_for
+from .jsonmerge import JsonMerger
+from .manifest import DEFERRED_TIER, Manifest
+from .modpacks import PENUMBRA_CONFIG, install_modpacks, penumbra_mod_directory, rebase_mod_directory
+from .payload import Payload
+from .profiles import PROFILE_CACHE_PREFIX, PROFILES_PREFIX, ProfileLibrary, apply_profiles
+from .reshade import prune_shaders
+from .scheduler import BACKGROUND_WORKERS, CopyScheduler, DEFAULT_WORKERS, run_step_groups
+from .sources import DirectorySource, FilteredSource, SourceTree, SubtreeSource
+from .sqlitedb import SqliteMerger
+from .sync import MergeFn, SyncPlan, SyncResult, chain_merges, plan_sync, sync_fanout
+from .telemetry import Telemetry
+
+LogFn = Callable[[str, str], None]
+
+
+@dataclass(frozen=True)
+class Step:
+    name: str
+    label: str
+    components: Tuple[str, ...]
+    root: str
+
+
+STEPS: Tuple[Step, ...] = (
+    Step("skills", "Skill Mods", ("skills",), ROOT_GAME),
+    Step("reshade", "ReShade files", ("reshade-presets", "reshade-shaders"), ROOT_GAME),
+    Step("config", "FFXIV configuration files", ("ffxiv-config",), ROOT_DOCUMENTS),
+    Step("plugins", "XIVLauncher plugin configs", ("plugin-configs",), ROOT_APPDATA),
+)
+BACKUP_COMPONENTS = ("ffxiv-config", "plugin-configs")
+DATABASE_COMPONENTS = ("plugin-configs",)
+OPTIONAL_SOURCES = ("reshade-presets", "reshade-shaders")
+
+
+def components_for_steps(steps: Sequence[str]) -> List[str]:
+    return [name for step in STEPS if step.name in steps for name in step.components]
+
+
+def bundle_sources(payload: Optional[Payload], configs: Path) -> Dict[str, SourceTree]:
+    sources: Dict[str, SourceTree] = {}
+    for component in COMPONENTS.values():
+        if payload is not None:
+            sources[component.name] = payload.tree(component.payload_prefix)
+        else:
+            sources[component.name] = DirectorySource(configs / component.payload_prefix)
+    return sources
+
+
+def bundle_profiles(payload: Optional[Payload], configs: Path) -> ProfileLibrary:
+    if payload is not None:
+        return ProfileLibrary(payload.tree(PROFILES_PREFIX), payload.tree(PROFILE_CACHE_PREFIX))
+    return ProfileLibrary(DirectorySource(configs / PROFILES_PREFIX))
+
+
+@dataclass
+class InstallOptions:
+    components: List[str] = field(default_factory=lambda: list(COMPONENTS))
+    workers: int = DEFAULT_WORKERS
+    prune_shaders: bool = True
+    merge_plugins: bool = False
+    extract_modpacks: bool = False
+    backup: bool = True
+    dry_run: bool = False
+    sequential: bool = False
+    staged: bool = True
+    characters: Optional[List[str]] = None
+    defer: bool = True
+    profiles: Optional[List[str]] = None
+
+
+@dataclass
+class SyncJob:
+    label: str
+    source: SourceTree
+    dests: List[Path]
+    ignore: Callable[[str], bool]
+    merge: Optional[MergeFn] = None
+    prune: bool = True
+    merged: bool = False
+    tier: str = ""
+
+
+@dataclass
+class ComponentResult:
+    component: str
+    dest: str
+    copied: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    bytes: int = 0
+    deduplicated: int = 0
+    dry_run: bool = False
+    deferred: bool = False
+
+
+@dataclass
+class InstallReport:
+    components: List[ComponentResult] = field(default_factory=list)
+    modpacks: List[dict] = field(default_factory=list)
+    profiles: List[dict] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "components": [asdict(result) for result in self.components],
+            "modpacks": self.modpacks,
+            "profiles": self.profiles,
+            "warnings": self.warnings,
+        }
+
+
+class InstallEngine:
+
+    def __init__(self, sources: Dict[str, SourceTree], log: Optional[LogFn] = None,
+                 events: Optional[EventBus] = None, telemetry: Optional[Telemetry] = None,
+                 backups: Optional[BackupStore] = None, extra_rules: Optional[Dict[str, List[str]]] = None,
+                 profiles: Optional[ProfileLibrary] = None):
+        self.sources = sources
+        self.profiles = profiles
+        self.events = events
+        self.telemetry = telemetry or Telemetry()
+        self.backups = backups
+        self.extra_rules = extra_rules
+        self.progress: Optional[ProgressTracker] = None
+        self.scheduler: Optional[CopyScheduler] = None
+        self.deferred: List[Tuple[str, SyncJob, Optional[Callable[[SyncPlan, Manifest], None]]]] = []
+        self._log_fn = log
+        self._lock = threading.Lock()
+
+    def _log(self, message: str, tag: str = "info"):
+        if self._log_fn is not None:
+            self._log_fn(message, tag)
+
+    def filters(self, component: str) -> FilterSet:
+        return filters_for(component, self.extra_rules)
+
+    def deferred_filters(self, component: str) -> FilterSet:
+        return deferred_for(component, self.extra_rules)
+
+    def select_shaders(self, shaders: SourceTree) -> SourceTree:
+        self._log("Resolving shaders used by the bundled presets...", "progress")
+        pruned, selection = prune_shaders(shaders, self.sources["reshade-presets"])
+        if not selection.files:
+            self._log("No preset effects could be resolved, installing all shaders", "warning")
+            return shaders
+
+        all_files, _ = shaders.scan()
+        self._log(
+            f"{len(selection.effects)} effects need {len(selection.files)} of {len(all_files)} shader files",
+            "info"
+        )
+        for missing in selection.missing:
+            self._log(f"Not bundled, skipped: {missing}", "warning")
+        return pruned
+
+    def run(self, targets: List[InstallTargets], options: InstallOptions) -> InstallReport:
+        report = InstallReport()
+        telemetry = self.telemetry
+        sources = dict(self.sources)
+        selected = [name for name in options.components if name in COMPONENTS]
+        if "reshade-shaders" in selected and options.prune_shaders and sources["reshade-shaders"].exists():
+            with telemetry.span("select-shaders"):
+                sources["reshade-shaders"] = self.select_shaders(sources["reshade-shaders"])
+
+        files_total = bytes_total = 0
+        with telemetry.span("scan-sources") as span:
+            for name in selected:
+                dests = sum(1 for target in targets if target.destination(COMPONENTS[name]) is not None)
+                files, _ = self.filters(name).apply(sources[name]).scan()
+                if options.defer:
+                    deferred = self.deferred_filters(name)
+                    files = {rel: f for rel, f in files.items() if not deferred.excludes(rel)}
+                files_total += len(files) * dests
+                bytes_total += sum(f.size for f in files.values()) * dests
+            span.args.update(files=files_total, bytes=bytes_total)
+        if self.events is not None:
+            self.progress = ProgressTracker(self.events, files_total, bytes_total)
+
+        groups: Dict[str, List[Callable[[], None]]] = {}
+        for step in STEPS:
+            components = [name for name in step.components if name in selected]
+            if components:
+                groups.setdefault(step.root, []).append(
+                    lambda step=step, components=components: self._run_step(step, components, sources, targets,
+                                                                            options, report)
+                )
+        if options.sequential:
+            groups = {"all": [run for group in groups.values() for run in group]}
+
+        with CopyScheduler(options.workers) as scheduler:
+            self.scheduler = scheduler
+            try:
+                with telemetry.span("install", workers=options.workers, targets=len(targets)):
+                    run_step_groups(list(groups.values()))
+                    if "skills" in selected and options.extract_modpacks and not options.dry_run:
+                        with telemetry.span("install-modpacks"):
+                            self._install_modpacks(sources["skills"], targets, report)
+            finally:
+                self.scheduler = None
+        if self.progress:
+            self.progress.set_phase("Done")
+        return report
+
+    def run_deferred(self, options: InstallOptions, report: Optional[InstallReport] = None) -> InstallReport:
+        report = report or InstallReport()
+        pending, self.deferred = self.deferred, []
+        if not pending:
+            return report
+
+        files_total = bytes_total = 0
+        for _, job, _ in pending:
+            files, _ = job.source.scan()
+            files_total += len(files) * len(job.dests)
+            bytes_total += sum(f.size for f in files.values()) * len(job.dests)
+        self._log(
+            f"Syncing {files_total} cache file(s) ({bytes_total / 1048576:.1f} MB) in the background at low priority...",
+            "progress"
+        )
+        if self.events is not None:
+            self.progress = ProgressTracker(self.events, files_total, bytes_total)
+            self.progress.set_phase("Filling in caches")
+
+        with CopyScheduler(min(options.workers, BACKGROUND_WORKERS), background=True) as scheduler:
+            self.scheduler = scheduler
+            try:
+                with self.telemetry.span("install-deferred", files=files_total, bytes=bytes_total):
+                    for name, job, backup in pending:
+                        self._run_job(name, job, options, backup, report)
+            finally:
+                self.scheduler = None
+        if self.progress:
+            self.progress.set_phase("Done")
+        return report
+
+    def _run_step(self, step: Step, components: List[str], sources: Dict[str, SourceTree],
+                  targets: List[InstallTargets], options: InstallOptions, report: InstallReport):
+        with self.telemetry.span(f"install-{step.name}"):
+            self._log(f"Installing {step.label}...", "progress")
+            for name in components:
+                self._install_component(name, sources[name], targets, options, report)
+            if step.name == "plugins" and options.profiles and not options.dry_run:
+                self._install_profiles(options.profiles, targets, report)
+
+    def _warn(self, report: InstallReport, message: str, tag: str = "warning"):
+        with self._lock:
+            report.warnings.append(message)
+        self._log(message, tag)
+
+    def _install_component(self, name: str, source: SourceTree, targets: List[InstallTargets],
+                           options: InstallOptions, report: InstallReport):
+        component = COMPONENTS[name]
+        if not source.exists():
+            tag = "warning" if name in OPTIONAL_SOURCES else "error"
+            self._warn(report, f"{component.label} source not found: {source}", tag)
+            return
+
+        dests: List[Path] = []
+        for target in targets:
+            dest = target.destination(component)
+            if dest is None:
+                self._warn(report, f"No {component.root} folder given, skipping {component.label}")
+            elif dest not in dests:
+                dests.append(dest)
+        if not dests:
+            return
+
+        filters = self.filters(name)
+        if name == "ffxiv-config":
+            jobs = self._ffxiv_jobs(component.label, filters, source, dests, options, report)
+        else:
+            merge_json = name == "plugin-configs" and options.merge_plugins
+            merge = chain_merges(
+                SqliteMerger() if name in DATABASE_COMPONENTS else None,
+                JsonMerger(log=self._log) if merge_json else None,
+            )
+            jobs = [SyncJob(component.label, filters.apply(source), dests, filters.excludes, merge,
+                            prune=not merge_json, merged=merge_json)]
+
+        backup = None
+        if options.backup and name in BACKUP_COMPONENTS and not options.dry_run:
+            backup = self._backup_hook(name, dests)
+        deferred = self.deferred_filters(name) if options.defer else None
+        for job in jobs:
+            if deferred is None or not deferred.rules:
+                self._run_job(name, job, options, backup, report)
+                continue
+            essential, later = split_job(job, deferred)
+            self._run_job(name, essential, options, backup, report)
+            if options.dry_run:
+                self._run_job(name, later, options, backup, report)
+            else:
+                with self._lock:
+                    self.deferred.append((name, later, backup))
+
+    def _run_job(self, name: str, job: SyncJob, options: InstallOptions,
+                 backup: Optional[Callable[[SyncPlan, Manifest], None]], report: InstallReport):
+        component = COMPONENTS[name]
+        with self.telemetry.span("sync", component=name, targets=len(job.dests), tier=job.tier) as span:
+            if options.dry_run:
+                results = [self._plan_only(job, dest) for dest in job.dests]
+            else:
+                for dest in job.dests:
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                for dest in job.dests:
+                    self._log(f"Syncing: {job.source.name} → {dest.parent.name}/", "info")
+                if self.progress and not job.tier:
+                    self.progress.set_phase(f"Installing {component.dest_name}")
+                results = sync_fanout(
+                    job.source, job.dests,
+                    before_write=backup,
+                    ignore=job.ignore,
+                    log=self._log,
+                    scheduler=self.scheduler,
+                    progress=self.progress,
+                    merge=job.merge,
+                    telemetry=self.telemetry,
+                    prune=job.prune,
+                    staged=options.staged,
+                    tier=job.tier
+                )
+            span.args.update(copied=sum(r.copied for r in results), bytes=sum(r.bytes_copied for r in results))
+
+        for dest, result in zip(job.dests, results):
+            self._report_sync(job.label, dest, result, options.dry_run, job.merged)
+            with self._lock:
+                report.components.append(ComponentResult(
+                    name, str(dest), result.copied, result.deleted, result.unchanged,
+                    result.bytes_copied, result.deduplicated, options.dry_run, bool(job.tier)
+                ))
+
+    def _ffxiv_jobs(self, label: str, filters: FilterSet, source: SourceTree, dests: List[Path],
+                    options: InstallOptions, report: InstallReport) -> List[SyncJob]:
+        filtered = filters.apply(source)
+        jobs = [SyncJob(
+            label,
+            FilteredSource(filtered, lambda rel: not is_character_path(rel)),
+            dests,
+            lambda rel: filters.excludes(rel) or is_character_path(rel),
+            CfgMerger(),
+            prune=False,
+            merged=True,
+        )]
+
+        shipped = shipped_characters(filtered)
+        if not shipped:
+            return jobs
+        template = shipped[0]
+        if len(shipped) > 1:
+            self._warn(report, f"The bundle has {len(shipped)} character folders, only {template} is installed")
+
+        character_dests: List[Path] = []
+        for dest in dests:
+            found = find_characters(dest)
+            chosen = target_characters(found, template, options.characters)
+            if not found and not options.characters:
+                self._log(f"No characters found in {dest.name}, installing the bundled {template}", "info")
+            elif not chosen:
+                self._warn(report, f"None of the selected characters exist in {dest}")
+            else:
+                self._log(f"Character settings for {len(chosen)} character(s): {', '.join(chosen)}", "info")
+            character_dests += [dest / name for name in chosen]
+        if character_dests:
+            jobs.append(SyncJob(
+                "Character settings",
+                SubtreeSource(filtered, template),
+                character_dests,
+                lambda rel: filters.excludes(f"{template}/{rel}"),
+                prune=False,
+            ))
+        return jobs
+
+    def _plan_only(self, job: SyncJob, dest: Path) -> SyncResult:
+        plan = plan_sync(job.source, dest, Manifest.for_destination(dest, tier=job.tier), job.ignore, prune=job.prune)
+        for rel in plan.copy:
+            self._log(f"  + {dest.name}/{rel}", "detail")
+        for rel in plan.delete:
+            self._log(f"  - {dest.name}/{rel}", "detail")
+        return SyncResult(len(plan.copy), len(plan.delete), len(plan.unchanged), plan.copy_bytes)
+
+    def _backup_hook(self, name: str, dests: List[Path]) -> Callable[[SyncPlan, Manifest], None]:
+        taken: Set[Path] = set()
+        filters = self.filters(name)
+
+        def take_backup(plan: SyncPlan, manifest: Manifest):
+            dest = plan.dest if plan.dest in dests else plan.dest.parent
+            prefix = "" if dest == plan.dest else f"{plan.dest.name}/"
+            with self._lock:
+                if dest in taken:
+                    return
+                taken.add(dest)
+            if self.backups is None or not dest.exists():
+                return
+            if dest != plan.dest:
+                manifest = Manifest.for_destination(dest)
+            with self.telemetry.span("backup", component=name, dest=dest.name):
+                snapshot = self.backups.snapshot(
+                    backup_name(name, dest, dests), dest, manifest, self.scheduler,
+                    ignore=filters.excludes, written=[f"{prefix}{rel}" for rel in plan.copy]
+                )
+            if snapshot is not None:
+                self._log(f"Backed up {dest.name} (snapshot {snapshot.snapshot_id})", "info")
+        return take_backup
+
+    def _report_sync(self, label: str, dest: Path, result: SyncResult, dry_run: bool, merged: bool):
+        if dry_run:
+            self._log(
+                f"{label} → {dest}: would update {result.copied}, remove {result.deleted}, "
+                f"keep {result.unchanged} ({result.bytes_copied / 1048576:.1f} MB)",
+                "info"
+            )
+            return
+        if result.copied or result.deleted:
+            self._log(
+                f"{result.copied} updated, {result.deleted} removed, {result.unchanged} unchanged",
+                "info"
+            )
+            if result.deduplicated:
+                self._log(f"{result.deduplicated} duplicate file(s) reused from this install", "detail")
+        else:
+            self._log(f"{dest.name} is already up to date ({result.unchanged} files)", "info")
+        self._log(f"{label} {'merged into' if merged else 'copied to'}: {dest}", "success")
+
+    def _install_modpacks(self, source: SourceTree, targets: List[InstallTargets], report: InstallReport):
+        mod_roots: List[Path] = []
+        for target in targets:
+            if target.appdata is None:
+                continue
+            config = target.appdata / "pluginConfigs" / PENUMBRA_CONFIG
+            documents = target.documents.parent if target.documents is not None else default_documents_path().parent
+            rebased = rebase_mod_directory(config, documents)
+            if rebased is not None:
+                self._log(f"Penumbra mod folder does not exist on this PC, using {rebased}", "warning")
+                manifest = Manifest.for_destination(config.parent)
+                if manifest.record_dest(PENUMBRA_CONFIG, config):
+                    manifest.save()
+            mod_root = penumbra_mod_directory(config)
+            if mod_root is None:
+                self._warn(report, "Penumbra mod folder not found in Penumbra.json, skipping mod pack extraction")
+            elif mod_root not in mod_roots:
+                mod_roots.append(mod_root)
+
+        for mod_root in mod_roots:
+            self._log(f"Extracting Penumbra mod packs into {mod_root}...", "progress")
+            with self.telemetry.span("modpacks", dest=mod_root.name) as span:
+                result = install_modpacks(source, mod_root, self.scheduler, self._log)
+                span.args.update(installed=len(result.installed), skipped=len(result.skipped))
+            for rel, error in result.failed:
+                self._warn(report, f"Could not extract {rel}: {error}")
+            self._log(
+                f"{len(result.installed)} mod pack(s) extracted, {len(result.skipped)} already up to date",
+                "success"
+            )
+            if result.installed:
+                self._log("  • Use 'Rediscover Mods' in Penumbra to load the new packs", "info")
+            with self._lock:
+                report.modpacks.append({
+                    "mod_root": str(mod_root),
+                    "installed": result.installed,
+                    "skipped": result.skipped,
+                    "failed": [rel for rel, _ in result.failed],
+                })
+
+    def _install_profiles(self, wanted: List[str], targets: List[InstallTargets], report: InstallReport):
+        if self.profiles is None or not self.profiles.exists():
+            self._warn(report, "No plugin profiles are bundled, skipping the profile import")
+            return
+        chosen, missing = self.profiles.select(wanted)
+        for name in missing:
+            self._warn(report, f"Plugin profile not bundled, skipped: {name}")
+        plugin_roots: List[Path] = []
+        for target in targets:
+            if target.appdata is not None and target.appdata / "pluginConfigs" not in plugin_roots:
+                plugin_roots.append(target.appdata / "pluginConfigs")
+
+        for plugin_root in plugin_roots:
+            self._log(f"Importing {len(chosen)} plugin profile(s) into {plugin_root}...", "progress")
+            with self.telemetry.span("profiles", dest=plugin_root.parent.name) as span:
+                result = apply_profiles(self.profiles, chosen, plugin_root, self.scheduler, self._log)
+                span.args.update(applied=len(result.applied), unchanged=len(result.unchanged))
+            if result.outputs:
+                manifest = Manifest.for_destination(plugin_root)
+                for rel in result.outputs:
+                    manifest.record_output(rel, plugin_root / rel)
+                manifest.save()
+            for key, error in result.failed:
+                self._warn(report, f"Could not import profile {key}: {error}")
+            self._log(
+                f"{len(result.applied)} profile(s) imported, {len(result.unchanged)} already up to date",
+                "success"
+            )
+            if result.unsupported:
+                self._log(f"  • Import these in game, the installer cannot write them: {', '.join(result.unsupported)}",
+                          "info")
+            with self._lock:
+                report.profiles.append({"plugin_root": str(plugin_root), **result.to_dict()})
+
+
+def split_job(job: SyncJob, deferred: FilterSet) -> Tuple[SyncJob, SyncJob]:
+    essential = SyncJob(
+        job.label,
+        FilteredSource(job.source, lambda rel: not deferred.excludes(rel)),
+        job.dests,
+        lambda rel: job.ignore(rel) or deferred.excludes(rel),
+        job.merge, job.prune, job.merged, job.tier,
+    )
+    later = SyncJob(
+        f"{job.label} (caches)",
+        FilteredSource(job.source, deferred.excludes),
+        job.dests,
+        lambda rel: job.ignore(rel) or not deferred.excludes(rel),
+        job.merge, job.prune, job.merged, DEFERRED_TIER,
+    )
+    return essential, later
+
+
+def backup_name(component: str, dest: Path, dests: List[Path]) -> str:
+    if not dests or dest == dests[0]:
+        return component
+    return f"{component}-{hashlib.sha1(str(dest).lower().encode('utf-8')).hexdigest()[:8]}"
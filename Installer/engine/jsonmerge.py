@@ -0,0 +1,270 @@
+import json
+import os
+import re
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .filters import parse_rule
+from .sources import SourceTree
+from .sync import MERGE_REPLACE, MERGE_UNCHANGED, MERGE_UPDATED
+
+LISTS_REPLACE = "replace"
+LISTS_UNION = "union"
+LISTS_KEEP = "keep"
+
+
+@dataclass(frozen=True)
+class MergePolicy:
+    lists: str = LISTS_REPLACE
+    list_key: Optional[str] = None
+    keep_existing: bool = False
+
+
+DEFAULT_POLICIES: List[Tuple[str, MergePolicy]] = [
+    ("*", MergePolicy()),
+    ("GatherbuddyReborn/GatherBuddy.CustomInfo.fish_records.json", MergePolicy(keep_existing=True)),
+    ("GatherbuddyReborn/fish_records.dat", MergePolicy(keep_existing=True)),
+    ("GatherbuddyReborn/world_locations.json", MergePolicy(lists=LISTS_UNION)),
+    ("GatherbuddyReborn/alarms.json", MergePolicy(lists=LISTS_UNION, list_key="Name")),
+    ("GatherbuddyReborn/auto_gather_lists.json", MergePolicy(lists=LISTS_UNION, list_key="Name")),
+    ("Splatoon/DefaultConfig.json", MergePolicy(lists=LISTS_UNION, list_key="Name")),
+    ("Splatoon/Archive.json", MergePolicy(keep_existing=True)),
+]
+
+JSON_SUFFIXES = (".json",)
+
+LogFn = Callable[[str, str], None]
+
+
+class MergeError(ValueError):
+    pass
+
+
+@dataclass
+class Member:
+    key: str
+    value_start: int
+    value_end: int
+
+
+_WS = re.compile(r"[ \t\r\n]*")
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+_SCALAR = re.compile(r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null|NaN|-?Infinity")
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]{}]', re.S)
+
+
+def _skip_ws(text: str, pos: int) -> int:
+    return _WS.match(text, pos).end()
+
+
+def _skip_value(text: str, pos: int) -> int:
+    if pos >= len(text):
+        raise MergeError("unexpected end of document")
+    char = text[pos]
+    if char == '"':
+        match = _STRING.match(text, pos)
+        if not match:
+            raise MergeError(f"unterminated string at {pos}")
+        return match.end()
+    if char in "[{":
+        depth = 0
+        for match in _TOKEN.finditer(text, pos):
+            token = match.group()[0]
+            if token in "[{":
+                depth += 1
+            elif token in "]}":
+                depth -= 1
+                if depth == 0:
+                    return match.end()
+        raise MergeError(f"unterminated container at {pos}")
+    match = _SCALAR.match(text, pos)
+    if not match:
+        raise MergeError(f"unexpected character {char!r} at {pos}")
+    return match.end()
+
+
+def scan_members(text: str) -> Tuple[int, List[Member]]:
+    pos = _skip_ws(text, 0)
+    if not text.startswith("{", pos):
+        raise MergeError("top-level value is not an object")
+    members: List[Member] = []
+    pos = _skip_ws(text, pos + 1)
+    if text.startswith("}", pos):
+        if _skip_ws(text, pos + 1) != len(text):
+            raise MergeError(f"unexpected data after the object at {pos + 1}")
+        return pos, members
+    while True:
+        match = _STRING.match(text, pos)
+        if not match:
+            raise MergeError(f"expected key at {pos}")
+        key = json.loads(match.group())
+        pos = _skip_ws(text, match.end())
+        if not text.startswith(":", pos):
+            raise MergeError(f"expected ':' at {pos}")
+        start = _skip_ws(text, pos + 1)
+        end = _skip_value(text, start)
+        members.append(Member(key, start, end))
+        pos = _skip_ws(text, end)
+        if text.startswith(",", pos):
+            pos = _skip_ws(text, pos + 1)
+            continue
+        if text.startswith("}", pos):
+            if _skip_ws(text, pos + 1) != len(text):
+                raise MergeError(f"unexpected data after the object at {pos + 1}")
+            return pos, members
+        raise MergeError(f"expected ',' or '}}' at {pos}")
+
+
+def _item_key(item: Any, list_key: Optional[str]) -> Any:
+    if list_key and isinstance(item, dict):
+        return item.get(list_key)
+    return None
+
+
+def merge_value(current: Any, shipped: Any, policy: MergePolicy) -> Any:
+    if isinstance(current, dict) and isinstance(shipped, dict):
+        merged = dict(current)
+        for key, value in shipped.items():
+            merged[key] = merge_value(current[key], value, policy) if key in current else value
+        return merged
+    if isinstance(current, list) and isinstance(shipped, list):
+        if policy.lists == LISTS_KEEP:
+            return current
+        if policy.lists == LISTS_UNION:
+            merged = list(current)
+            positions = {}
+            for index, item in enumerate(merged):
+                key = _item_key(item, policy.list_key)
+                if key is not None:
+                    positions[key] = index
+            for item in shipped:
+                key = _item_key(item, policy.list_key)
+                if key is not None and key in positions:
+                    merged[positions[key]] = item
+                elif item not in merged:
+                    merged.append(item)
+            return merged
+    return shipped
+
+
+def _indent_unit(text: str, members: List[Member]) -> Optional[str]:
+    if not members:
+        return "  "
+    line_start = text.rfind("\n", 0, members[0].value_start)
+    if line_start == -1:
+        return None
+    indent = text[line_start + 1:members[0].value_start]
+    return indent[:len(indent) - len(indent.lstrip(" \t"))] or None
+
+
+def _dump(value: Any, unit: Optional[str], depth: int = 1) -> str:
+    if unit is None:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    dumped = json.dumps(value, ensure_ascii=False, indent=unit)
+    return dumped.replace("\n", "\n" + unit * depth)
+
+
+def _merge_object(existing: str, shipped: str, policy: MergePolicy, unit: Optional[str],
+                  depth: int) -> Optional[str]:
+    close, dest_members = scan_members(existing)
+    _, src_members = scan_members(shipped)
+    if depth == 1:
+        unit = _indent_unit(existing, dest_members)
+    by_key: Dict[str, Member] = {member.key: member for member in dest_members}
+
+    edits: List[Tuple[Member, str]] = []
+    additions: List[Tuple[str, Any]] = []
+    for src_member in src_members:
+        src_raw = shipped[src_member.value_start:src_member.value_end]
+        dest_member = by_key.get(src_member.key)
+        if dest_member is None:
+            additions.append((src_member.key, json.loads(src_raw)))
+            continue
+        dest_raw = existing[dest_member.value_start:dest_member.value_end]
+        if dest_raw == src_raw:
+            continue
+        if dest_raw.startswith("{") and src_raw.startswith("{"):
+            merged_raw = _merge_object(dest_raw, src_raw, policy, unit, depth + 1)
+            if merged_raw is not None:
+                edits.append((dest_member, merged_raw))
+            continue
+        current = json.loads(dest_raw)
+        merged = merge_value(current, json.loads(src_raw), policy)
+        if merged != current:
+            edits.append((dest_member, _dump(merged, unit, depth)))
+
+    if not edits and not additions:
+        return None
+
+    text = existing
+    if additions:
+        separator = "" if unit is None else "\n" + unit * depth
+        key_separator = ":" if unit is None else ": "
+        pieces = [f"{separator}{json.dumps(key, ensure_ascii=False)}{key_separator}{_dump(value, unit, depth)}"
+                  for key, value in additions]
+        inserted = ",".join(pieces)
+        if dest_members:
+            anchor = dest_members[-1].value_end
+            text = text[:anchor] + "," + inserted + text[anchor:]
+        else:
+            tail = "" if unit is None else "\n" + unit * (depth - 1)
+            text = text[:close] + inserted + tail + text[close:]
+    for member, raw in sorted(edits, key=lambda edit: edit[0].value_start, reverse=True):
+        text = text[:member.value_start] + raw + text[member.value_end:]
+    return text
+
+
+def merge_documents(existing: str, shipped: str, policy: MergePolicy) -> Optional[str]:
+    return _merge_object(existing, shipped, policy, None, 1)
+
+
+class JsonMerger:
+
+    def __init__(self, policies: Optional[List[Tuple[str, MergePolicy]]] = None, log: Optional[LogFn] = None):
+        self.policies = [(parse_rule(pattern).regex, policy) for pattern, policy in (policies or DEFAULT_POLICIES)]
+        self.log = log
+
+    def policy_for(self, rel: str) -> MergePolicy:
+        matched = MergePolicy()
+        for regex, policy in self.policies:
+            if regex.match(rel):
+                matched = policy
+        return matched
+
+    def handles(self, rel: str) -> bool:
+        return self.policy_for(rel).keep_existing or rel.lower().endswith(JSON_SUFFIXES)
+
+    def __call__(self, source: SourceTree, rel: str, target: Path) -> str:
+        policy = self.policy_for(rel)
+        if policy.keep_existing:
+            return MERGE_UNCHANGED
+        if not rel.lower().endswith(JSON_SUFFIXES):
+            return MERGE_REPLACE
+        try:
+            raw = target.read_bytes()
+            with source.open(rel) as handle:
+                shipped = handle.read().decode("utf-8-sig")
+        except (ValueError, OSError):
+            return MERGE_REPLACE
+        bom = raw.startswith(b"\xef\xbb\xbf")
+        try:
+            merged = merge_documents(raw.decode("utf-8-sig"), shipped, policy)
+        except ValueError as e:
+            if self.log:
+                self.log(f"Could not merge {rel} ({e}), keeping the existing file", "warning")
+            return MERGE_UNCHANGED
+        if merged is None:
+            return MERGE_UNCHANGED
+
+        tmp_path = target.with_name(f"{target.name}.xeldar-tmp")
+        try:
+            tmp_path.write_bytes(merged.encode("utf-8-sig" if bom else "utf-8"))
+            os.replace(tmp_path, target)
+        except BaseException:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            raise
+        return MERGE_UPDATED
@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import hashlib
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from typing import BinaryIO, Dict, Optional, Set, Tuple
+
+APP_STATE_NAME = "Xeldar FFXIV Installer"
+MANIFEST_VERSION = 1
+DEFERRED_TIER = "deferred"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def state_dir() -> Path:
+    if sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+    else:
+        base = Path(os.environ.get("XDG_STATE_HOME") or Path.home() / ".local" / "state")
+    path = base / APP_STATE_NAME
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def new_hasher():
+    return hashlib.blake2b(digest_size=20)
+
+
+def hash_file(path: Path) -> str:
+    hasher = new_hasher()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def copy_stream(f_in: BinaryIO, f_out: BinaryIO, buffer_size: int = HASH_CHUNK_SIZE) -> str:
+    hasher = new_hasher()
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    while True:
+        count = f_in.readinto(buffer)
+        if not count:
+            break
+        chunk = view[:count]
+        hasher.update(chunk)
+        f_out.write(chunk)
+    return hasher.hexdigest()
+
+
+def scan_tree(root: Path) -> Tuple[Dict[str, os.stat_result], Set[str]]:
+    files: Dict[str, os.stat_result] = {}
+    dirs: Set[str] = set()
+    if not root.is_dir():
+        return files, dirs
+    stack = [(root, "")]
+    while stack:
+        current, prefix = stack.pop()
+        with os.scandir(current) as it:
+            for entry in it:
+                rel = f"{prefix}{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.add(rel)
+                    stack.append((Path(entry.path), f"{rel}/"))
+                elif entry.is_file(follow_symlinks=False):
+                    files[rel] = entry.stat(follow_symlinks=False)
+    return files, dirs
+
+
+@dataclass
+class ManifestEntry:
+    size: int
+    digest: str
+    src_mtime_ns: int
+    dest_mtime_ns: int
+    dest_size: int = -1
+    dest_digest: str = ""
+
+    def matches_dest(self, st: os.stat_result) -> bool:
+        dest_size = self.dest_size if self.dest_size >= 0 else self.size
+        return self.dest_mtime_ns == st.st_mtime_ns and dest_size == st.st_size
+
+
+class Manifest:
+
+    def __init__(self, dest: Path, path: Path):
+        self.dest = dest
+        self.path = path
+        self.files: Dict[str, ManifestEntry] = {}
+        self.protected: Set[str] = set()
+
+    @classmethod
+    def for_destination(cls, dest: Path, root: Optional[Path] = None, tier: str = "") -> "Manifest":
+        root = root or state_dir() / "manifests"
+        key = hashlib.sha1(str(dest.resolve()).lower().encode("utf-8")).hexdigest()
+        if tier:
+            key = f"{key}-{tier}"
+        manifest = cls(dest, root / f"{key}.json")
+        manifest.load()
+        return manifest
+
+    def load(self):
+        self.files = {}
+        self.protected = set()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            return
+        for rel, entry in data.get("files", {}).items():
+            try:
+                self.files[rel] = ManifestEntry(**entry)
+            except TypeError:
+                continue
+        self.protected = set(data.get("protected", []))
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "destination": str(self.dest),
+            "files": {rel: asdict(entry) for rel, entry in sorted(self.files.items())},
+            "protected": sorted(self.protected),
+        }
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def record_dest(self, rel: str, path: Path) -> bool:
+        entry = self.files.get(rel)
+        if entry is None:
+            return False
+        st = path.stat()
+        entry.dest_mtime_ns, entry.dest_size, entry.dest_digest = st.st_mtime_ns, st.st_size, hash_file(path)
+        return True
+
+    def record_output(self, rel: str, path: Path):
+        if not self.record_dest(rel, path):
+            self.protected.add(rel)
+
+    def discard(self):
+        self.files = {}
+        self.protected = set()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
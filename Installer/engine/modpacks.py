@@ -0,0 +1,216 @@
+import os
+import json
+import shutil
+import zipfile
+from pathlib import Path, PurePosixPath, PureWindowsPath
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .jsonmerge import scan_members
+from .manifest import HASH_CHUNK_SIZE
+from .scheduler import CopyScheduler
+from .sources import SourceTree
+
+MODPACK_SUFFIX = ".pmp"
+META_NAME = "meta.json"
+PENUMBRA_CONFIG = "Penumbra.json"
+INVALID_FOLDER_CHARS = '<>:"/\\|?*'
+DEFAULT_MOD_FOLDER = "FFXIV Mods"
+
+LogFn = Callable[[str, str], None]
+
+
+class ModPackError(ValueError):
+    pass
+
+
+@dataclass
+class ModPack:
+    rel: str
+    name: str
+    version: str
+    author: str = ""
+    files: int = 0
+    size: int = 0
+
+    @property
+    def folder_name(self) -> str:
+        cleaned = "".join("_" if char in INVALID_FOLDER_CHARS or ord(char) < 32 else char for char in self.name)
+        return cleaned.strip().rstrip(".") or "Mod"
+
+
+@dataclass
+class ModPackResult:
+    installed: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def _load_json(data: bytes) -> dict:
+    value = json.loads(data.decode("utf-8-sig"))
+    if not isinstance(value, dict):
+        raise ModPackError("meta.json is not an object")
+    return value
+
+
+def _meta_member(archive: zipfile.ZipFile) -> zipfile.ZipInfo:
+    for info in archive.infolist():
+        if info.filename.lower() == META_NAME:
+            return info
+    raise ModPackError("no meta.json in mod pack")
+
+
+def _safe_member_path(name: str) -> Optional[PurePosixPath]:
+    path = PurePosixPath(name.replace("\\", "/"))
+    if path.is_absolute() or ".." in path.parts or not path.parts or ":" in path.parts[0]:
+        return None
+    return path
+
+
+def read_modpack(source: SourceTree, rel: str) -> ModPack:
+    try:
+        with source.open(rel) as handle, zipfile.ZipFile(handle) as archive:
+            meta = _load_json(archive.read(_meta_member(archive)))
+            infos = [info for info in archive.infolist() if not info.is_dir()]
+    except (zipfile.BadZipFile, OSError, ValueError) as e:
+        raise ModPackError(str(e)) from e
+    name = str(meta.get("Name") or PurePosixPath(rel).stem)
+    return ModPack(
+        rel, name, str(meta.get("Version") or ""), str(meta.get("Author") or ""),
+        len(infos), sum(info.file_size for info in infos)
+    )
+
+
+def find_modpacks(source: SourceTree) -> List[str]:
+    files, _ = source.scan()
+    return sorted(rel for rel in files if rel.lower().endswith(MODPACK_SUFFIX))
+
+
+def penumbra_mod_directory(*configs: Path) -> Optional[Path]:
+    for config in configs:
+        try:
+            settings = json.loads(config.read_text(encoding="utf-8-sig"))
+        except (OSError, ValueError):
+            continue
+        directory = settings.get("ModDirectory") if isinstance(settings, dict) else None
+        if not directory:
+            continue
+        path = Path(directory)
+        if _usable_directory(path):
+            return path
+    return None
+
+
+def _usable_directory(path: Path) -> bool:
+    return path.is_absolute() and (path.is_dir() or path.parent.is_dir())
+
+
+def rebase_mod_directory(config: Path, documents: Path) -> Optional[Path]:
+    try:
+        raw = config.read_bytes()
+        text = raw.decode("utf-8-sig")
+        _, members = scan_members(text)
+    except (OSError, ValueError):
+        return None
+    member = next((member for member in members if member.key == "ModDirectory"), None)
+    if member is None:
+        return None
+    try:
+        directory = json.loads(text[member.value_start:member.value_end])
+    except ValueError:
+        return None
+    if not isinstance(directory, str) or not directory or _usable_directory(Path(directory)):
+        return None
+
+    rebased = documents / (PureWindowsPath(directory).name or DEFAULT_MOD_FOLDER)
+    text = text[:member.value_start] + json.dumps(str(rebased), ensure_ascii=False) + text[member.value_end:]
+    tmp_path = config.with_name(f"{config.name}.xeldar-tmp")
+    try:
+        tmp_path.write_bytes(text.encode("utf-8-sig" if raw.startswith(b"\xef\xbb\xbf") else "utf-8"))
+        os.replace(tmp_path, config)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+    return rebased
+
+
+def installed_version(mod_root: Path, pack: ModPack) -> Optional[Tuple[str, str]]:
+    try:
+        meta = _load_json((mod_root / pack.folder_name / META_NAME).read_bytes())
+    except (OSError, ValueError):
+        return None
+    return str(meta.get("Name") or ""), str(meta.get("Version") or "")
+
+
+def extract_modpack(source: SourceTree, pack: ModPack, mod_root: Path):
+    target = mod_root / pack.folder_name
+    staging = mod_root / f".{pack.folder_name}.xeldar-tmp"
+    retired = mod_root / f".{pack.folder_name}.xeldar-old"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    try:
+        with source.open(pack.rel) as handle, zipfile.ZipFile(handle) as archive:
+            for info in archive.infolist():
+                member = _safe_member_path(info.filename)
+                if member is None:
+                    raise ModPackError(f"unsafe path in archive: {info.filename}")
+                out_path = staging.joinpath(*member.parts)
+                if info.is_dir():
+                    out_path.mkdir(parents=True, exist_ok=True)
+                    continue
+                out_path.parent.mkdir(parents=True, exist_ok=True)
+                with archive.open(info) as f_in, open(out_path, "wb") as f_out:
+                    shutil.copyfileobj(f_in, f_out, HASH_CHUNK_SIZE)
+        if target.exists():
+            shutil.rmtree(retired, ignore_errors=True)
+            os.replace(target, retired)
+        os.replace(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+def install_modpacks(source: SourceTree, mod_root: Path,
+                     scheduler: Optional[CopyScheduler] = None,
+                     log: Optional[LogFn] = None,
+                     force: bool = False) -> ModPackResult:
+    result = ModPackResult()
+    mod_root.mkdir(parents=True, exist_ok=True)
+    packs: Dict[str, ModPack] = {}
+    for rel in find_modpacks(source):
+        try:
+            packs[rel] = read_modpack(source, rel)
+        except ModPackError as e:
+            result.failed.append((rel, str(e)))
+
+    pending: List[ModPack] = []
+    folders: Dict[str, str] = {}
+    for pack in packs.values():
+        owner = folders.setdefault(pack.folder_name.lower(), pack.rel)
+        if owner != pack.rel:
+            result.failed.append((pack.rel, f"same mod folder as {owner}"))
+        elif not force and installed_version(mod_root, pack) == (pack.name, pack.version):
+            result.skipped.append(pack.name)
+        else:
+            pending.append(pack)
+
+    def extract(pack: ModPack) -> Optional[str]:
+        try:
+            extract_modpack(source, pack, mod_root)
+        except (ModPackError, OSError, zipfile.BadZipFile) as e:
+            return str(e)
+        if log:
+            version = f" v{pack.version}" if pack.version else ""
+            log(f"  + {pack.name}{version} ({pack.files} files, {pack.size / 1048576:.1f} MB)", "detail")
+        return None
+
+    for pack, error in zip(pending, (scheduler or CopyScheduler(1)).map(extract, pending)):
+        if error is None:
+            result.installed.append(pack.name)
+        else:
+            result.failed.append((pack.rel, error))
+    return result
@@ -0,0 +1,170 @@
+import os
+import sys
+import json
+import shutil
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from .backends import CopyBackend
+from .components import component_for_path
+from .manifest import HASH_CHUNK_SIZE, copy_stream, new_hasher, scan_tree
+from .sources import SourceFile, SourceTree, set_mtime
+
+PAYLOAD_VERSION = 2
+SUPPORTED_VERSIONS = (1, PAYLOAD_VERSION)
+BLOB_PREFIX = "objects/"
+INDEX_NAME = ".index.json"
+PAYLOAD_SUFFIX = ".payload"
+
+PAYLOAD_TREES = (
+    "FFXIV Configs",
+    "Mods Configs",
+    "ReShade Configs",
+    "Plugin Configs",
+)
+
+STORED_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".dds",
+    ".pmp", ".ttmp2", ".zip", ".pdf",
+}
+
+
+def _compression_for(name: str) -> int:
+    if os.path.splitext(name)[1].lower() in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def build_payload(configs_root: Path, out_path: Path, trees: Iterable[str] = PAYLOAD_TREES,
+                  exclude: Optional[Callable[[str], bool]] = None,
+                  overrides: Optional[Dict[str, Path]] = None,
+                  extra_trees: Optional[Dict[str, Path]] = None) -> Dict[str, dict]:
+    entries: Dict[str, dict] = {}
+    stored: Set[str] = set()
+    roots = [(tree, configs_root / tree) for tree in trees] + list((extra_trees or {}).items())
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with zipfile.ZipFile(tmp_path, "w", compresslevel=9) as archive:
+        for tree, root in roots:
+            files, _ = scan_tree(root)
+            for rel in sorted(files):
+                arcname = f"{tree}/{rel}"
+                if exclude is not None and exclude(arcname):
+                    continue
+                src = (overrides or {}).get(arcname, root / rel)
+                data = src.read_bytes()
+                hasher = new_hasher()
+                hasher.update(data)
+                digest = hasher.hexdigest()
+                blob = BLOB_PREFIX + digest
+                if digest not in stored:
+                    info = zipfile.ZipInfo.from_file(src, blob)
+                    info.compress_type = _compression_for(arcname)
+                    archive.writestr(info, data)
+                    stored.add(digest)
+                entries[arcname] = {
+                    "size": len(data),
+                    "mtime_ns": files[rel].st_mtime_ns,
+                    "digest": digest,
+                    "blob": blob,
+                }
+        index = {"version": PAYLOAD_VERSION, "entries": entries}
+        archive.writestr(INDEX_NAME, json.dumps(index, separators=(",", ":")), zipfile.ZIP_DEFLATED)
+    os.replace(tmp_path, out_path)
+    return entries
+
+
+def dedup_report(entries: Dict[str, dict]) -> Dict[str, Tuple[int, int]]:
+    seen: Set[str] = set()
+    saved: Dict[str, Tuple[int, int]] = {}
+    for arcname in sorted(entries):
+        entry = entries[arcname]
+        if entry["digest"] not in seen:
+            seen.add(entry["digest"])
+            continue
+        component = component_for_path(arcname)
+        key = component.name if component else arcname.split("/", 1)[0]
+        count, size = saved.get(key, (0, 0))
+        saved[key] = (count + 1, size + entry["size"])
+    return saved
+
+
+def append_payload(executable: Path, payload_path: Path):
+    with open(executable, "ab") as f_out, open(payload_path, "rb") as f_in:
+        shutil.copyfileobj(f_in, f_out, HASH_CHUNK_SIZE)
+
+
+class Payload:
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.archive = zipfile.ZipFile(path, "r")
+        index = json.loads(self.archive.read(INDEX_NAME))
+        if index.get("version") not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported payload version in {path}")
+        self.entries: Dict[str, dict] = index["entries"]
+
+    def close(self):
+        self.archive.close()
+
+    def tree(self, prefix: str) -> "PayloadSource":
+        return PayloadSource(self, prefix)
+
+    def open(self, arcname: str) -> BinaryIO:
+        return self.archive.open(self.entries[arcname].get("blob", arcname), "r")
+
+
+class PayloadSource(SourceTree):
+
+    def __init__(self, payload: Payload, prefix: str):
+        self.payload = payload
+        self.prefix = prefix.strip("/") + "/"
+        self.name = self.prefix.rstrip("/").rsplit("/", 1)[-1]
+
+    def __str__(self) -> str:
+        return f"{self.payload.path}!{self.prefix}"
+
+    def exists(self) -> bool:
+        return any(name.startswith(self.prefix) for name in self.payload.entries)
+
+    def scan(self) -> Tuple[Dict[str, SourceFile], Set[str]]:
+        files: Dict[str, SourceFile] = {}
+        dirs: Set[str] = set()
+        for name, entry in self.payload.entries.items():
+            if not name.startswith(self.prefix):
+                continue
+            rel = name[len(self.prefix):]
+            files[rel] = SourceFile(entry["size"], entry["mtime_ns"], entry["digest"])
+            parts = rel.split("/")[:-1]
+            for i in range(1, len(parts) + 1):
+                dirs.add("/".join(parts[:i]))
+        return files, dirs
+
+    def digest(self, rel: str) -> str:
+        return self.payload.entries[self.prefix + rel]["digest"]
+
+    def open(self, rel: str) -> BinaryIO:
+        return self.payload.open(self.prefix + rel)
+
+    def copy_to(self, rel: str, target: Path, backend: Optional[CopyBackend] = None,
+                digest: Optional[str] = None) -> str:
+        with self.open(rel) as f_in, open(target, "wb") as f_out:
+            digest = copy_stream(f_in, f_out)
+        set_mtime(target, self.payload.entries[self.prefix + rel]["mtime_ns"])
+        return digest
+
+
+def find_payload() -> Optional[Payload]:
+    override = os.environ.get("XELDAR_PAYLOAD")
+    candidates = [Path(override)] if override else []
+    if getattr(sys, "frozen", False):
+        executable = Path(sys.executable)
+        candidates += [executable, executable.with_suffix(PAYLOAD_SUFFIX)]
+    for candidate in candidates:
+        if candidate.is_file() and zipfile.is_zipfile(candidate):
+            try:
+                return Payload(candidate)
+            except (KeyError, ValueError, zipfile.BadZipFile):
+                continue
+    return None
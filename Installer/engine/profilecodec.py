@@ -0,0 +1,173 @@
+import io
+import re
+import json
+import gzip
+import zlib
+import base64
+import binascii
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Iterator, List, Optional, Sequence, Tuple
+
+FORMAT_DEFLATE = "deflate"
+FORMAT_GZIP = "gzip"
+FORMAT_BASE64 = "base64"
+FORMATS = (FORMAT_DEFLATE, FORMAT_GZIP, FORMAT_BASE64)
+
+DELVUI_PREFIX = "|||"
+LAUNCHER_STYLE_PREFIX = "DS1"
+PREFIXES = (DELVUI_PREFIX, LAUNCHER_STYLE_PREFIX)
+
+GZIP_MAGIC = b"\x1f\x8b"
+UTF8_BOM = b"\xef\xbb\xbf"
+CHUNK_CHARS = 64 * 1024
+WBITS = {FORMAT_DEFLATE: -zlib.MAX_WBITS, FORMAT_GZIP: zlib.MAX_WBITS | 16}
+
+_SEPARATOR = re.compile(r"(\|+)")
+_AFTER_PADDING = re.compile(r"(?<==)(?=[A-Za-z0-9+/])")
+
+
+class ProfileError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class ProfileCode:
+    code: str
+    format: str
+    prefix: str = ""
+    segments: Tuple[str, ...] = ()
+    separators: Tuple[str, ...] = ()
+    instructions: str = ""
+
+
+def extract_code(text: str) -> Tuple[str, str]:
+    lines = [line.strip() for line in text.lstrip("\ufeff").splitlines() if line.strip()]
+    if not lines:
+        raise ProfileError("no import string found")
+    return lines[-1], "\n".join(lines[:-1])
+
+
+def _b64decode(chars: str) -> bytes:
+    try:
+        return base64.b64decode(chars, validate=True)
+    except binascii.Error as e:
+        raise ProfileError(f"invalid base64: {e}") from e
+
+
+def _split_prefix(code: str) -> Tuple[str, str]:
+    for prefix in PREFIXES:
+        if code.startswith(prefix):
+            return prefix, code[len(prefix):]
+    return "", code
+
+
+def split_code(code: str) -> Tuple[str, List[str], List[str]]:
+    prefix, body = _split_prefix(code.strip())
+    segments: List[str] = []
+    separators: List[str] = []
+    pending = ""
+    for i, part in enumerate(_SEPARATOR.split(body)):
+        if i % 2:
+            pending += part
+            continue
+        for piece in _AFTER_PADDING.split(part):
+            if not piece:
+                continue
+            if segments:
+                separators.append(pending)
+            else:
+                prefix += pending
+            pending = ""
+            segments.append(piece)
+    if not segments:
+        raise ProfileError("the import string is empty")
+    return prefix, segments, separators
+
+
+def detect(code: str) -> Tuple[str, str]:
+    prefix, segments, _ = split_code(code)
+    body = segments[0]
+    head = _b64decode(body[:8]) if len(body) >= 8 else b""
+    if head.startswith(GZIP_MAGIC):
+        return FORMAT_GZIP, prefix
+    if head.lstrip(UTF8_BOM).startswith((b"{", b"[")):
+        return FORMAT_BASE64, prefix
+    return FORMAT_DEFLATE, prefix
+
+
+def parse(text: str) -> ProfileCode:
+    code, instructions = extract_code(text)
+    fmt, _ = detect(code)
+    prefix, segments, separators = split_code(code)
+    return ProfileCode(code, fmt, prefix, tuple(segments), tuple(separators), instructions)
+
+
+def iter_decoded(segment: str, fmt: str, chunk_chars: int = CHUNK_CHARS) -> Iterator[bytes]:
+    body = segment.strip()
+    if len(body) % 4 == 1:
+        raise ProfileError("the import string is truncated or has a character missing")
+    body += "=" * (-len(body) % 4)
+    chunk_chars -= chunk_chars % 4
+    inflater = zlib.decompressobj(WBITS[fmt]) if fmt in WBITS else None
+    try:
+        for start in range(0, len(body), chunk_chars):
+            data = _b64decode(body[start:start + chunk_chars])
+            out = inflater.decompress(data) if inflater is not None else data
+            if out:
+                yield out
+        if inflater is not None:
+            tail = inflater.flush()
+            if tail:
+                yield tail
+            if not inflater.eof:
+                raise ProfileError("the compressed data ends early")
+    except zlib.error as e:
+        raise ProfileError(f"could not decompress: {e}") from e
+
+
+def decode_to(segment: str, out: BinaryIO, fmt: str) -> int:
+    written = 0
+    first = True
+    for chunk in iter_decoded(segment, fmt):
+        if first and chunk.startswith(UTF8_BOM):
+            chunk = chunk[len(UTF8_BOM):]
+        first = False
+        out.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def decode_segment(segment: str, fmt: str) -> Any:
+    buffer = io.BytesIO()
+    decode_to(segment, buffer, fmt)
+    try:
+        return json.loads(buffer.getvalue().decode("utf-8"))
+    except ValueError as e:
+        raise ProfileError(f"decoded data is not JSON: {e}") from e
+
+
+def decode_documents(code: str, fmt: Optional[str] = None) -> List[Any]:
+    detected, _ = detect(code)
+    _, segments, _ = split_code(code)
+    return [decode_segment(segment, fmt or detected) for segment in segments]
+
+
+def encode(data: bytes, fmt: str = FORMAT_DEFLATE, prefix: str = "") -> str:
+    if fmt == FORMAT_DEFLATE:
+        deflater = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+        data = deflater.compress(data) + deflater.flush()
+    elif fmt == FORMAT_GZIP:
+        data = gzip.compress(data, 9, mtime=0)
+    elif fmt != FORMAT_BASE64:
+        raise ProfileError(f"unknown profile format: {fmt}")
+    return prefix + base64.b64encode(data).decode("ascii")
+
+
+def encode_documents(documents: Sequence[Any], fmt: str = FORMAT_DEFLATE, prefix: str = "",
+                     separators: Sequence[str] = ()) -> str:
+    parts = [prefix]
+    for i, document in enumerate(documents):
+        if i:
+            parts.append(separators[i - 1] if i - 1 < len(separators) else DELVUI_PREFIX)
+        parts.append(encode(json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), fmt))
+    return "".join(parts)
@@ -0,0 +1,362 @@
+import os
+import copy
+import json
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .profilecodec import ProfileError, decode_documents, decode_segment, decode_to, encode_documents, parse
+from .scheduler import CopyScheduler
+from .sources import SourceTree
+
+PROFILES_PREFIX = "Plugin Configs/Plugin Profiles"
+PROFILE_CACHE_PREFIX = "Profile Cache"
+PROFILE_SUFFIX = ".txt"
+CACHE_SUFFIX = ".json"
+FOLDER_SUFFIX = " Profiles"
+
+APPLIED = "applied"
+UNCHANGED = "unchanged"
+UNSUPPORTED = "unsupported"
+
+UMBRA_MIGRATION_KEY = "LastMigratedVersion"
+
+LogFn = Callable[[str, str], None]
+
+
+@dataclass(frozen=True)
+class Profile:
+    plugin: str
+    name: str
+    rel: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.plugin}/{self.name}"
+
+    @property
+    def title(self) -> str:
+        return self.name.rsplit("/", 1)[-1]
+
+
+@dataclass
+class DecodedProfile:
+    profile: Profile
+    format: str
+    prefix: str
+    separators: List[str]
+    documents: List[Any]
+
+
+@dataclass
+class ProfileResult:
+    applied: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    unsupported: List[str] = field(default_factory=list)
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "applied": self.applied,
+            "unchanged": self.unchanged,
+            "unsupported": self.unsupported,
+            "failed": [key for key, _ in self.failed],
+        }
+
+
+def profile_for(rel: str) -> Optional[Profile]:
+    folder, _, rest = rel.partition("/")
+    if not rest or not folder.endswith(FOLDER_SUFFIX) or not rest.lower().endswith(PROFILE_SUFFIX):
+        return None
+    return Profile(folder[:-len(FOLDER_SUFFIX)], rest[:-len(PROFILE_SUFFIX)], rel)
+
+
+def find_profiles(source: SourceTree) -> List[Profile]:
+    files, _ = source.scan()
+    profiles = [profile_for(rel) for rel in files]
+    return sorted((profile for profile in profiles if profile is not None), key=lambda p: p.key.lower())
+
+
+def write_cache(source: SourceTree, profile: Profile, out_path: Path):
+    with source.open(profile.rel) as handle:
+        code = parse(handle.read().decode("utf-8-sig"))
+    header = json.dumps({"format": code.format, "prefix": code.prefix, "separators": list(code.separators)})
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(f"{out_path.name}.xeldar-tmp")
+    try:
+        with open(tmp_path, "wb") as out:
+            out.write(f'{header[:-1]},"documents":['.encode("utf-8"))
+            for i, segment in enumerate(code.segments):
+                if i:
+                    out.write(b",")
+                decode_to(segment, out, code.format)
+            out.write(b"]}")
+        with open(tmp_path, "rb") as f:
+            try:
+                json.load(f)
+            except ValueError as e:
+                raise ProfileError(f"decoded data is not JSON: {e}") from e
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+    os.replace(tmp_path, out_path)
+
+
+def build_profile_cache(source: SourceTree, out_dir: Path) -> Tuple[List[Profile], List[Tuple[str, str]]]:
+    cached: List[Profile] = []
+    failed: List[Tuple[str, str]] = []
+    for profile in find_profiles(source):
+        try:
+            write_cache(source, profile, out_dir / f"{profile.rel}{CACHE_SUFFIX}")
+        except (ProfileError, OSError, UnicodeDecodeError) as e:
+            failed.append((profile.rel, str(e)))
+        else:
+            cached.append(profile)
+    return cached, failed
+
+
+class ProfileLibrary:
+
+    def __init__(self, source: SourceTree, cache: Optional[SourceTree] = None):
+        self.source = source
+        self.cache = cache
+        self._profiles: Optional[List[Profile]] = None
+        self._cached: Optional[set] = None
+
+    def exists(self) -> bool:
+        return self.source.exists()
+
+    def profiles(self) -> List[Profile]:
+        if self._profiles is None:
+            self._profiles = find_profiles(self.source) if self.source.exists() else []
+        return self._profiles
+
+    def select(self, wanted: Iterable[str]) -> Tuple[List[Profile], List[str]]:
+        chosen: List[Profile] = []
+        missing: List[str] = []
+        for name in wanted:
+            wanted_key = name.strip().strip("/").lower()
+            matches = [profile for profile in self.profiles()
+                       if profile.key.lower() == wanted_key or profile.plugin.lower() == wanted_key]
+            if not matches:
+                missing.append(name)
+            chosen += [profile for profile in matches if profile not in chosen]
+        return chosen, missing
+
+    def _has_cache(self, rel: str) -> bool:
+        if self.cache is None:
+            return False
+        if self._cached is None:
+            self._cached = set(self.cache.scan()[0]) if self.cache.exists() else set()
+        return rel in self._cached
+
+    def load(self, profile: Profile) -> DecodedProfile:
+        cache_rel = f"{profile.rel}{CACHE_SUFFIX}"
+        if self._has_cache(cache_rel):
+            with self.cache.open(cache_rel) as handle:
+                data = json.load(handle)
+            return DecodedProfile(profile, data["format"], data["prefix"], data["separators"], data["documents"])
+        with self.source.open(profile.rel) as handle:
+            code = parse(handle.read().decode("utf-8-sig"))
+        documents = [decode_segment(segment, code.format) for segment in code.segments]
+        return DecodedProfile(profile, code.format, code.prefix, list(code.separators), documents)
+
+
+def _read_json(path: Path) -> Tuple[Any, bool]:
+    try:
+        raw = path.read_bytes()
+    except FileNotFoundError:
+        raise ProfileError(f"{path.name} not found, start the game once with the plugin enabled") from None
+    try:
+        return json.loads(raw.decode("utf-8-sig")), raw.startswith(b"\xef\xbb\xbf")
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ProfileError(f"could not read {path.name}: {e}") from e
+
+
+def _write_bytes(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.xeldar-tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def _write_json(path: Path, value: Any, bom: bool = False):
+    text = json.dumps(value, ensure_ascii=False, indent=2)
+    _write_bytes(path, text.encode("utf-8-sig" if bom else "utf-8"))
+
+
+def _upsert(items: List[Any], value: dict, key: str) -> str:
+    for i, item in enumerate(items):
+        if isinstance(item, dict) and item.get(key) == value[key]:
+            if item == value:
+                return UNCHANGED
+            items[i] = value
+            return APPLIED
+    items.append(value)
+    return APPLIED
+
+
+def _apply_delvui(plugin_root: Path, batch: List[DecodedProfile]) -> Tuple[Dict[str, str], List[Path]]:
+    folder = plugin_root / "DelvUI" / "Profiles"
+    registry_path = folder / "Profiles.json"
+    registry, bom = _read_json(registry_path)
+    profiles = registry.get("Profiles") if isinstance(registry, dict) else None
+    template = next((value for key, value in (profiles or {}).items() if not key.startswith("$")), None)
+    if not isinstance(template, dict):
+        raise ProfileError("Profiles.json has no profile to copy the auto switch settings from")
+
+    statuses: Dict[str, str] = {}
+    outputs = [registry_path]
+    registered = False
+    for item in batch:
+        name = item.profile.title
+        target = folder / f"{name}.delvui"
+        outputs.append(target)
+        try:
+            current = decode_documents(target.read_text(encoding="utf-8-sig").strip())
+        except (OSError, UnicodeDecodeError, ProfileError):
+            current = None
+        status = UNCHANGED
+        if current != item.documents:
+            _write_bytes(target, encode_documents(item.documents, item.format, item.prefix,
+                                                  item.separators).encode("utf-8"))
+            status = APPLIED
+        if name not in profiles:
+            entry = copy.deepcopy(template)
+            entry["Name"] = name
+            entry["AutoSwitchEnabled"] = False
+            role_map = entry.get("AutoSwitchData", {}).get("Map", {})
+            for role, jobs in role_map.items():
+                if isinstance(jobs, list):
+                    role_map[role] = [False] * len(jobs)
+            profiles[name] = entry
+            registered = True
+            status = APPLIED
+        statuses[item.profile.key] = status
+    if registered:
+        _write_json(registry_path, registry, bom)
+    return statuses, outputs
+
+
+def _apply_lmeter(plugin_root: Path, batch: List[DecodedProfile]) -> Tuple[Dict[str, str], List[Path]]:
+    path = plugin_root / "LMeter" / "LMeter.json"
+    config, bom = _read_json(path)
+    try:
+        meters = config["MeterList"]["Meters"]
+    except (KeyError, TypeError):
+        raise ProfileError("LMeter.json has no meter list") from None
+    statuses: Dict[str, str] = {}
+    for item in batch:
+        meter = item.documents[0]
+        if isinstance(meter, dict) and "Name" in meter:
+            statuses[item.profile.key] = _upsert(meters, meter, "Name")
+        else:
+            statuses[item.profile.key] = UNSUPPORTED
+    if APPLIED in statuses.values():
+        _write_json(path, config, bom)
+    return statuses, [path] if set(statuses.values()) - {UNSUPPORTED} else []
+
+
+def _apply_qolbar(plugin_root: Path, batch: List[DecodedProfile]) -> Tuple[Dict[str, str], List[Path]]:
+    path = plugin_root / "QoLBar.json"
+    config, bom = _read_json(path)
+    bars = config.get("BarCfgs") if isinstance(config, dict) else None
+    if not isinstance(bars, list):
+        raise ProfileError("QoLBar.json has no bar list")
+    statuses: Dict[str, str] = {}
+    for item in batch:
+        exported = item.documents[0]
+        bar = exported.get("b2") if isinstance(exported, dict) else None
+        if isinstance(bar, dict) and "n" in bar:
+            statuses[item.profile.key] = _upsert(bars, bar, "n")
+        else:
+            statuses[item.profile.key] = UNSUPPORTED
+    if APPLIED in statuses.values():
+        _write_json(path, config, bom)
+    return statuses, [path] if set(statuses.values()) - {UNSUPPORTED} else []
+
+
+def _apply_umbra(plugin_root: Path, batch: List[DecodedProfile]) -> Tuple[Dict[str, str], List[Path]]:
+    statuses: Dict[str, str] = {}
+    outputs: List[Path] = []
+    for item in batch:
+        settings = item.documents[0]
+        if not isinstance(settings, dict) or not any("." in key for key in settings):
+            statuses[item.profile.key] = UNSUPPORTED
+            continue
+        target = plugin_root / "Umbra" / f"{item.profile.title}.profile.json"
+        outputs.append(target)
+        try:
+            current, bom = _read_json(target)
+        except ProfileError:
+            current, bom = None, False
+        if isinstance(current, dict) and UMBRA_MIGRATION_KEY in current:
+            settings = {**settings, UMBRA_MIGRATION_KEY: current[UMBRA_MIGRATION_KEY]}
+        if current == settings:
+            statuses[item.profile.key] = UNCHANGED
+            continue
+        _write_json(target, settings, bom)
+        statuses[item.profile.key] = APPLIED
+    return statuses, outputs
+
+
+APPLIERS: Dict[str, Callable[[Path, List[DecodedProfile]], Tuple[Dict[str, str], List[Path]]]] = {
+    "DelvUI": _apply_delvui,
+    "LMeter": _apply_lmeter,
+    "QoLBar": _apply_qolbar,
+    "Umbra": _apply_umbra,
+}
+
+
+def is_supported(profile: Profile) -> bool:
+    return profile.plugin in APPLIERS
+
+
+def apply_profiles(library: ProfileLibrary, profiles: Iterable[Profile], plugin_root: Path,
+                   scheduler: Optional[CopyScheduler] = None, log: Optional[LogFn] = None) -> ProfileResult:
+    result = ProfileResult()
+    batches: Dict[str, List[Profile]] = {}
+    for profile in profiles:
+        if is_supported(profile):
+            batches.setdefault(profile.plugin, []).append(profile)
+        else:
+            result.unsupported.append(profile.key)
+
+    def apply(plugin: str) -> Tuple[Dict[str, str], List[Path], List[Tuple[str, str]]]:
+        decoded: List[DecodedProfile] = []
+        failed: List[Tuple[str, str]] = []
+        for profile in batches[plugin]:
+            try:
+                decoded.append(library.load(profile))
+            except (ProfileError, OSError, UnicodeDecodeError, KeyError) as e:
+                failed.append((profile.key, str(e)))
+        if not decoded:
+            return {}, [], failed
+        try:
+            statuses, outputs = APPLIERS[plugin](plugin_root, decoded)
+        except (ProfileError, OSError) as e:
+            return {}, [], failed + [(item.profile.key, str(e)) for item in decoded]
+        if log:
+            for key, status in statuses.items():
+                if status == APPLIED:
+                    log(f"  + {key}", "detail")
+        return statuses, outputs, failed
+
+    plugins = list(batches)
+    for statuses, outputs, failed in (scheduler or CopyScheduler(1)).map(apply, plugins):
+        for key, status in statuses.items():
+            {APPLIED: result.applied, UNCHANGED: result.unchanged, UNSUPPORTED: result.unsupported}[status].append(key)
+        result.outputs += [path.relative_to(plugin_root).as_posix() for path in outputs if path.is_file()]
+        result.failed += failed
+    return result
@@ -0,0 +1,122 @@
+import re
+import posixpath
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .sources import FilteredSource, SourceTree
+
+SHADERS_DIR = "Shaders"
+TEXTURES_DIR = "Textures"
+SHADER_EXTENSIONS = (".fx", ".fxh")
+TEXTURE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".dds", ".bmp", ".tga", ".cube")
+
+TECHNIQUES_PATTERN = re.compile(r"^\s*Techniques\s*=\s*(.*)$", re.MULTILINE)
+INCLUDE_PATTERN = re.compile(r'^\s*#\s*include\s*[<"]([^">]+)[">]', re.MULTILINE)
+TEXTURE_PATTERN = re.compile(r'"([^"\r\n]+\.(?:png|jpe?g|dds|bmp|tga|cube))"', re.IGNORECASE)
+
+
+def parse_preset_effects(text: str) -> List[str]:
+    effects: List[str] = []
+    for match in TECHNIQUES_PATTERN.finditer(text):
+        for technique in match.group(1).split(","):
+            _, _, effect = technique.strip().rpartition("@")
+            if effect and effect not in effects:
+                effects.append(effect)
+    return effects
+
+
+@dataclass
+class ShaderSelection:
+    effects: List[str] = field(default_factory=list)
+    files: Set[str] = field(default_factory=set)
+    missing: List[str] = field(default_factory=list)
+
+
+class ShaderResolver:
+
+    def __init__(self, shaders: SourceTree):
+        self.shaders = shaders
+        files, _ = shaders.scan()
+        self.files = files
+        self._by_path: Dict[str, str] = {rel.lower(): rel for rel in files}
+        self._by_name: Dict[str, List[str]] = {}
+        for rel in sorted(files):
+            self._by_name.setdefault(posixpath.basename(rel).lower(), []).append(rel)
+
+    def _lookup(self, root: str, name: str, relative_to: Optional[str] = None) -> Optional[str]:
+        name = name.replace("\\", "/")
+        candidates = []
+        if relative_to is not None:
+            candidates.append(posixpath.normpath(posixpath.join(posixpath.dirname(relative_to), name)))
+        candidates.append(posixpath.normpath(posixpath.join(root, name)))
+        for candidate in candidates:
+            found = self._by_path.get(candidate.lower())
+            if found:
+                return found
+
+        suffix = "/" + posixpath.normpath(name).lstrip("./").lower()
+        for rel in self._by_name.get(posixpath.basename(name).lower(), []):
+            if rel.startswith(root + "/") and ("/" + rel.lower()).endswith(suffix):
+                return rel
+        return None
+
+    def _read(self, rel: str) -> str:
+        with self.shaders.open(rel) as f:
+            return f.read().decode("utf-8", errors="replace")
+
+    def resolve(self, effects: Iterable[str], textures: Iterable[str] = ()) -> ShaderSelection:
+        selection = ShaderSelection(effects=list(effects))
+        for texture in textures:
+            found = self._lookup(TEXTURES_DIR, texture)
+            if found is not None:
+                selection.files.add(found)
+        pending: List[str] = []
+        for effect in selection.effects:
+            rel = self._lookup(SHADERS_DIR, effect)
+            if rel is None:
+                selection.missing.append(effect)
+            else:
+                pending.append(rel)
+
+        while pending:
+            rel = pending.pop()
+            if rel in selection.files:
+                continue
+            selection.files.add(rel)
+            text = self._read(rel)
+            for include in INCLUDE_PATTERN.findall(text):
+                found = self._lookup(SHADERS_DIR, include, rel)
+                if found is None:
+                    if include not in selection.missing:
+                        selection.missing.append(include)
+                elif found not in selection.files:
+                    pending.append(found)
+            for texture in TEXTURE_PATTERN.findall(text):
+                found = self._lookup(TEXTURES_DIR, texture)
+                if found is not None:
+                    selection.files.add(found)
+        return selection
+
+
+def scan_presets(presets: SourceTree) -> Tuple[List[str], List[str]]:
+    effects: List[str] = []
+    textures: List[str] = []
+    files, _ = presets.scan()
+    for rel in sorted(files):
+        if not rel.lower().endswith(".ini"):
+            continue
+        with presets.open(rel) as f:
+            text = f.read().decode("utf-8", errors="replace")
+        for effect in parse_preset_effects(text):
+            if effect not in effects:
+                effects.append(effect)
+        for texture in TEXTURE_PATTERN.findall(text):
+            if texture not in textures:
+                textures.append(texture)
+    return effects, textures
+
+
+def prune_shaders(shaders: SourceTree, presets: SourceTree) -> Tuple[FilteredSource, ShaderSelection]:
+    effects, textures = scan_presets(presets)
+    selection = ShaderResolver(shaders).resolve(effects, textures)
+    return FilteredSource(shaders, lambda rel: rel in selection.files), selection
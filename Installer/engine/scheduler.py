@@ -0,0 +1,87 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from typing import Callable, Iterable, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_WORKERS = min(16, (os.cpu_count() or 4) * 2)
+WORKER_CHOICES = (1, 2, 4, 8, 16, 32)
+BACKGROUND_WORKERS = 2
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+BACKGROUND_NICE = 19
+
+
+def lower_io_priority():
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN)
+        elif sys.platform.startswith("linux"):
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), BACKGROUND_NICE)
+    except (OSError, AttributeError):
+        pass
+
+
+class CopyScheduler:
+
+    def __init__(self, workers: Optional[int] = None, background: bool = False):
+        self.workers = max(1, workers or DEFAULT_WORKERS)
+        self.background = background
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def __enter__(self) -> "CopyScheduler":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        items = list(items)
+        if not items:
+            return []
+        if not self.background and (self.workers == 1 or len(items) <= 1):
+            return [fn(item) for item in items]
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="background-copy" if self.background else "copy",
+                initializer=lower_io_priority if self.background else None
+            )
+        futures = [self._pool.submit(fn, item) for item in items]
+        done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in pending:
+            future.cancel()
+        wait(pending)
+        for future in futures:
+            if future.done() and not future.cancelled() and future.exception() is not None:
+                raise future.exception()
+        return [future.result() for future in futures]
+
+
+def run_step_groups(groups: Sequence[Sequence[Callable[[], None]]]):
+    groups = [list(group) for group in groups if group]
+    if len(groups) <= 1:
+        for group in groups:
+            for step in group:
+                step()
+        return
+
+    def run_group(group: List[Callable[[], None]]):
+        for step in group:
+            step()
+
+    with ThreadPoolExecutor(max_workers=len(groups), thread_name_prefix="install-step") as pool:
+        futures = [pool.submit(run_group, group) for group in groups]
+        wait(futures)
+    for future in futures:
+        if future.exception() is not None:
+            raise future.exception()
@@ -0,0 +1,192 @@
+import os
+from pathlib import Path
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Dict, Iterable, Optional, Set, Tuple, Union
+
+from .backends import CopyBackend
+from .manifest import hash_file, scan_tree
+
+
+@dataclass
+class SourceFile:
+    size: int
+    mtime_ns: int
+    digest: Optional[str] = None
+
+
+class SourceTree:
+    name: str
+
+    def exists(self) -> bool:
+        raise NotImplementedError
+
+    def scan(self) -> Tuple[Dict[str, SourceFile], Set[str]]:
+        raise NotImplementedError
+
+    def digest(self, rel: str) -> str:
+        raise NotImplementedError
+
+    def open(self, rel: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def local_root(self) -> Optional[Path]:
+        return None
+
+    def copy_to(self, rel: str, target: Path, backend: Optional[CopyBackend] = None,
+                digest: Optional[str] = None) -> str:
+        raise NotImplementedError
+
+
+class DirectorySource(SourceTree):
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.name = self.root.name
+
+    def __str__(self) -> str:
+        return str(self.root)
+
+    def exists(self) -> bool:
+        return self.root.is_dir()
+
+    def scan(self) -> Tuple[Dict[str, SourceFile], Set[str]]:
+        stats, dirs = scan_tree(self.root)
+        files = {rel: SourceFile(st.st_size, st.st_mtime_ns) for rel, st in stats.items()}
+        return files, dirs
+
+    def digest(self, rel: str) -> str:
+        return hash_file(self.root / rel)
+
+    def open(self, rel: str) -> BinaryIO:
+        return open(self.root / rel, "rb")
+
+    def local_root(self) -> Optional[Path]:
+        return self.root
+
+    def copy_to(self, rel: str, target: Path, backend: Optional[CopyBackend] = None,
+                digest: Optional[str] = None) -> str:
+        return (backend or CopyBackend()).copy_hashed(self.root / rel, target, digest)
+
+
+def as_source(source: Union[SourceTree, Path, str]) -> SourceTree:
+    if isinstance(source, SourceTree):
+        return source
+    return DirectorySource(Path(source))
+
+
+def set_mtime(path: Path, mtime_ns: int):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def parent_dirs(files: Iterable[str]) -> Set[str]:
+    dirs: Set[str] = set()
+    for rel in files:
+        parts = rel.split("/")[:-1]
+        for i in range(1, len(parts) + 1):
+            dirs.add("/".join(parts[:i]))
+    return dirs
+
+
+class FilteredSource(SourceTree):
+
+    def __init__(self, source: SourceTree, keep: Callable[[str], bool]):
+        self.source = source
+        self.keep = keep
+        self.name = source.name
+
+    def __str__(self) -> str:
+        return str(self.source)
+
+    def exists(self) -> bool:
+        return self.source.exists()
+
+    def scan(self) -> Tuple[Dict[str, SourceFile], Set[str]]:
+        files, _ = self.source.scan()
+        kept = {rel: entry for rel, entry in files.items() if self.keep(rel)}
+        return kept, parent_dirs(kept)
+
+    def digest(self, rel: str) -> str:
+        return self.source.digest(rel)
+
+    def open(self, rel: str) -> BinaryIO:
+        return self.source.open(rel)
+
+    def local_root(self) -> Optional[Path]:
+        return self.source.local_root()
+
+    def copy_to(self, rel: str, target: Path, backend: Optional[CopyBackend] = None,
+                digest: Optional[str] = None) -> str:
+        return self.source.copy_to(rel, target, backend, digest)
+
+
+class SubtreeSource(SourceTree):
+
+    def __init__(self, source: SourceTree, prefix: str):
+        self.source = source
+        self.prefix = prefix.strip("/")
+        self.name = self.prefix.rsplit("/", 1)[-1]
+
+    def __str__(self) -> str:
+        return f"{self.source}/{self.prefix}"
+
+    def _full(self, rel: str) -> str:
+        return f"{self.prefix}/{rel}"
+
+    def exists(self) -> bool:
+        return self.source.exists()
+
+    def scan(self) -> Tuple[Dict[str, SourceFile], Set[str]]:
+        files, _ = self.source.scan()
+        start = len(self.prefix) + 1
+        kept = {rel[start:]: entry for rel, entry in files.items() if rel.startswith(self.prefix + "/")}
+        return kept, parent_dirs(kept)
+
+    def digest(self, rel: str) -> str:
+        return self.source.digest(self._full(rel))
+
+    def open(self, rel: str) -> BinaryIO:
+        return self.source.open(self._full(rel))
+
+    def local_root(self) -> Optional[Path]:
+        root = self.source.local_root()
+        return root / self.prefix if root is not None else None
+
+    def copy_to(self, rel: str, target: Path, backend: Optional[CopyBackend] = None,
+                digest: Optional[str] = None) -> str:
+        return self.source.copy_to(self._full(rel), target, backend, digest)
+
+
+class OverlaySource(SourceTree):
+
+    def __init__(self, source: SourceTree, overrides: Dict[str, Path]):
+        self.source = source
+        self.overrides = overrides
+        self.name = source.name
+
+    def __str__(self) -> str:
+        return str(self.source)
+
+    def exists(self) -> bool:
+        return self.source.exists()
+
+    def scan(self) -> Tuple[Dict[str, SourceFile], Set[str]]:
+        files, dirs = self.source.scan()
+        for rel, path in self.overrides.items():
+            if rel in files:
+                files[rel] = SourceFile(path.stat().st_size, files[rel].mtime_ns)
+        return files, dirs
+
+    def digest(self, rel: str) -> str:
+        path = self.overrides.get(rel)
+        return hash_file(path) if path is not None else self.source.digest(rel)
+
+    def open(self, rel: str) -> BinaryIO:
+        path = self.overrides.get(rel)
+        return open(path, "rb") if path is not None else self.source.open(rel)
+
+    def copy_to(self, rel: str, target: Path, backend: Optional[CopyBackend] = None,
+                digest: Optional[str] = None) -> str:
+        path = self.overrides.get(rel)
+        if path is None:
+            return self.source.copy_to(rel, target, backend, digest)
+        return (backend or CopyBackend()).copy_hashed(path, target, digest)
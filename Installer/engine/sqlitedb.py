@@ -0,0 +1,170 @@
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .manifest import HASH_CHUNK_SIZE, scan_tree
+from .sources import SourceTree
+from .sync import MERGE_REPLACE, MERGE_UNCHANGED, MERGE_UPDATED
+
+SQLITE_HEADER = b"SQLite format 3\x00"
+DB_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+BUSY_TIMEOUT = 5.0
+
+
+class DatabaseMergeError(OSError):
+    pass
+
+
+def is_database_name(name: str) -> bool:
+    return name.lower().endswith(DB_SUFFIXES)
+
+
+def is_sqlite(path: Path) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+    except OSError:
+        return False
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+@dataclass
+class CompactResult:
+    compacted: Dict[str, Path] = field(default_factory=dict)
+    bytes_before: int = 0
+    bytes_after: int = 0
+    orphaned: List[str] = field(default_factory=list)
+
+
+def compact_database(src: Path, out: Path):
+    with tempfile.TemporaryDirectory(prefix="xeldar-db-") as tmp:
+        work = Path(tmp) / src.name
+        shutil.copyfile(src, work)
+        wal = src.with_name(src.name + "-wal")
+        if wal.is_file():
+            shutil.copyfile(wal, work.with_name(work.name + "-wal"))
+        conn = sqlite3.connect(str(work), isolation_level=None)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            out.parent.mkdir(parents=True, exist_ok=True)
+            if out.exists():
+                out.unlink()
+            conn.execute("VACUUM INTO ?", (str(out),))
+        finally:
+            conn.close()
+
+
+def compact_databases(configs_root: Path, trees: Iterable[str], work_dir: Path,
+                      exclude: Optional[Callable[[str], bool]] = None) -> CompactResult:
+    result = CompactResult()
+    for tree in trees:
+        files, _ = scan_tree(configs_root / tree)
+        for rel in sorted(files):
+            arcname = f"{tree}/{rel}"
+            path = configs_root / tree / rel
+            if rel.endswith("-wal") and not (configs_root / tree / rel[:-4]).is_file():
+                result.orphaned.append(arcname)
+                continue
+            if not is_database_name(rel) or (exclude is not None and exclude(arcname)) or not is_sqlite(path):
+                continue
+            out = work_dir / tree / rel
+            try:
+                compact_database(path, out)
+            except sqlite3.Error:
+                continue
+            wal = path.with_name(path.name + "-wal")
+            result.bytes_before += files[rel].st_size + (wal.stat().st_size if wal.is_file() else 0)
+            result.bytes_after += out.stat().st_size
+            result.compacted[arcname] = out
+    return result
+
+
+def _tables(conn: sqlite3.Connection, schema: str) -> Dict[str, str]:
+    rows = conn.execute(f"SELECT name, sql FROM {schema}.sqlite_master WHERE type = 'table'").fetchall()
+    tables = {name: sql or "" for name, sql in rows if not name.startswith("sqlite_")}
+    virtual = [name for name, sql in tables.items() if sql.upper().startswith("CREATE VIRTUAL TABLE")]
+    return {
+        name: sql for name, sql in tables.items()
+        if name not in virtual and not any(name.startswith(v + "_") for v in virtual)
+    }
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> List[tuple]:
+    return conn.execute(f"PRAGMA {schema}.table_info({_quote(table)})").fetchall()
+
+
+def merge_database(shipped: Path, target: Path) -> int:
+    conn = sqlite3.connect(str(target), timeout=BUSY_TIMEOUT, isolation_level=None)
+    try:
+        if not _tables(conn, "main"):
+            source = sqlite3.connect(str(shipped))
+            try:
+                source.backup(conn)
+            finally:
+                source.close()
+            return 1
+
+        conn.execute("ATTACH DATABASE ? AS shipped", (str(shipped),))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            user_tables = _tables(conn, "main")
+            before = conn.total_changes
+            for name, sql in _tables(conn, "shipped").items():
+                if name not in user_tables:
+                    conn.execute(sql)
+                    indexes = conn.execute(
+                        "SELECT sql FROM shipped.sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                        (name,)
+                    ).fetchall()
+                    for (index_sql,) in indexes:
+                        conn.execute(index_sql)
+                shipped_columns = _columns(conn, "shipped", name)
+                user_names = {column[1] for column in _columns(conn, "main", name)}
+                names = [column[1] for column in shipped_columns if column[1] in user_names]
+                if not names:
+                    continue
+                has_key = any(column[5] for column in shipped_columns)
+                if not has_key and "WITHOUT ROWID" not in sql.upper():
+                    names.insert(0, "rowid")
+                column_list = ", ".join(name if name == "rowid" else _quote(name) for name in names)
+                conn.execute(
+                    f"INSERT OR IGNORE INTO main.{_quote(name)} ({column_list}) "
+                    f"SELECT {column_list} FROM shipped.{_quote(name)}"
+                )
+            changed = conn.total_changes - before
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("DETACH DATABASE shipped")
+        return changed
+    finally:
+        conn.close()
+
+
+class SqliteMerger:
+
+    def handles(self, rel: str) -> bool:
+        return is_database_name(rel)
+
+    def __call__(self, source: SourceTree, rel: str, target: Path) -> str:
+        if not is_database_name(rel) or not is_sqlite(target):
+            return MERGE_REPLACE
+        with tempfile.TemporaryDirectory(prefix="xeldar-db-") as tmp:
+            shipped = Path(tmp) / "shipped.db"
+            with source.open(rel) as f_in, open(shipped, "wb") as f_out:
+                shutil.copyfileobj(f_in, f_out, HASH_CHUNK_SIZE)
+            if not is_sqlite(shipped):
+                return MERGE_UNCHANGED
+            try:
+                changed = merge_database(shipped, target)
+            except sqlite3.Error as e:
+                raise DatabaseMergeError(f"could not merge into {target.name}: {e} (is the game running?)") from e
+        return MERGE_UPDATED if changed else MERGE_UNCHANGED
+
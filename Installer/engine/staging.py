@@ -0,0 +1,122 @@
+import os
+import json
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, TextIO, Tuple
+
+STAGE_SUFFIX = ".xeldar-stage"
+JOURNAL_SUFFIX = ".xeldar-journal"
+
+
+class StagingArea:
+
+    def __init__(self, dest: Path, tier: str = ""):
+        self.dest = dest
+        name = f".{dest.name}.{tier}" if tier else f".{dest.name}"
+        self.root = dest.parent / f"{name}{STAGE_SUFFIX}"
+        self.journal_path = dest.parent / f"{name}{JOURNAL_SUFFIX}"
+        self.completed: Dict[str, Tuple[str, int, int]] = {}
+        self.pending_commit: Optional[dict] = None
+        self._journal: Optional[TextIO] = None
+        self._lock = threading.Lock()
+        self.load()
+
+    def path(self, rel: str) -> Path:
+        return self.root / rel
+
+    def load(self):
+        self.completed = {}
+        self.pending_commit = None
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if "commit" in record:
+                self.pending_commit = record
+            else:
+                self.completed[record["rel"]] = (record["digest"], record["size"], record["mtime_ns"])
+
+    def staged(self, rel: str, digest: Optional[str], size: int, mtime_ns: int) -> Optional[str]:
+        entry = self.completed.get(rel)
+        if entry is None or entry[1] != size or (entry[0] != digest if digest else entry[2] != mtime_ns):
+            return None
+        try:
+            st = self.path(rel).stat()
+        except OSError:
+            return None
+        return entry[0] if st.st_size == size and st.st_mtime_ns == mtime_ns else None
+
+    def _write(self, record: dict, sync: bool = False):
+        with self._lock:
+            if self._journal is None:
+                self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._journal.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self._journal.flush()
+            if sync:
+                os.fsync(self._journal.fileno())
+
+    def record(self, rel: str, digest: str, size: int, mtime_ns: int):
+        self._write({"rel": rel, "digest": digest, "size": size, "mtime_ns": mtime_ns})
+        with self._lock:
+            self.completed[rel] = (digest, size, mtime_ns)
+
+    def commit(self, files: Iterable[str], delete: Iterable[str], stale_dirs: Iterable[str]):
+        record = {"commit": True, "files": sorted(files), "delete": list(delete), "stale_dirs": list(stale_dirs)}
+        self._write(record, sync=True)
+        self.pending_commit = record
+        self._apply_commit()
+
+    def recover(self) -> bool:
+        if self.pending_commit is None:
+            return False
+        self._apply_commit()
+        return True
+
+    def _apply_commit(self):
+        record = self.pending_commit or {}
+        for rel in record.get("files", []):
+            staged = self.path(rel)
+            if not staged.exists():
+                continue
+            target = self.dest / rel
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(staged, target)
+        for rel in record.get("delete", []):
+            target = self.dest / rel
+            try:
+                target.unlink()
+            except FileNotFoundError:
+                pass
+            except PermissionError:
+                os.chmod(target, 0o666)
+                target.unlink()
+        for rel in record.get("stale_dirs", []):
+            target = self.dest / rel
+            if target.is_dir() and not any(target.iterdir()):
+                target.rmdir()
+        self.discard()
+
+    def close(self):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def discard(self):
+        self.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+        try:
+            self.journal_path.unlink()
+        except FileNotFoundError:
+            pass
+        self.completed = {}
+        self.pending_commit = None
+
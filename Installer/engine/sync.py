@@ -0,0 +1,479 @@
+import os
+from pathlib import Path
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from .backends import CopyBackend, HardlinkBackend, backend_label, detect_backend
+from .manifest import Manifest, ManifestEntry, copy_stream, hash_file, scan_tree
+from .sources import DirectorySource, SourceTree, as_source, set_mtime
+from .events import ProgressTracker
+from .scheduler import CopyScheduler
+from .staging import StagingArea
+from .telemetry import Telemetry
+
+LogFn = Callable[[str, str], None]
+MergeFn = Callable[[SourceTree, str, Path], str]
+
+MERGE_REPLACE = "replace"
+MERGE_UNCHANGED = "unchanged"
+MERGE_UPDATED = "merged"
+
+
+def merge_applies(merge: Optional[MergeFn], rel: str) -> bool:
+    if merge is None:
+        return False
+    handles = getattr(merge, "handles", None)
+    return handles is None or handles(rel)
+
+
+class MergeChain:
+
+    def __init__(self, merges: List[MergeFn]):
+        self.merges = merges
+
+    def handles(self, rel: str) -> bool:
+        return any(merge_applies(merge, rel) for merge in self.merges)
+
+    def __call__(self, source: SourceTree, rel: str, target: Path) -> str:
+        for merge in self.merges:
+            if not merge_applies(merge, rel):
+                continue
+            outcome = merge(source, rel, target)
+            if outcome != MERGE_REPLACE:
+                return outcome
+        return MERGE_REPLACE
+
+
+def chain_merges(*merges: Optional[MergeFn]) -> Optional[MergeFn]:
+    active = [merge for merge in merges if merge is not None]
+    if not active:
+        return None
+    if len(active) == 1:
+        return active[0]
+    return MergeChain(active)
+
+
+@dataclass
+class SyncPlan:
+    src: SourceTree
+    dest: Path
+    copy: List[str] = field(default_factory=list)
+    delete: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    dirs: List[str] = field(default_factory=list)
+    stale_dirs: List[str] = field(default_factory=list)
+    sizes: Dict[str, int] = field(default_factory=dict)
+    digests: Dict[str, str] = field(default_factory=dict)
+    src_mtimes: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def copy_bytes(self) -> int:
+        return sum(self.sizes[rel] for rel in self.copy)
+
+    @property
+    def is_noop(self) -> bool:
+        return not self.copy and not self.delete and not self.stale_dirs
+
+
+@dataclass
+class SyncResult:
+    copied: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    bytes_copied: int = 0
+    deduplicated: int = 0
+
+
+def plan_sync(src: Union[SourceTree, Path], dest: Path, manifest: Manifest,
+              ignore: Optional[Callable[[str], bool]] = None, prune: bool = True) -> SyncPlan:
+    source = as_source(src)
+    plan = SyncPlan(source, dest)
+    src_files, src_dirs = source.scan()
+    dest_files, dest_dirs = scan_tree(dest)
+    kept_dirs = set(src_dirs)
+    ignored = [rel for rel in dest_files
+               if (ignore is not None and ignore(rel)) or (rel in manifest.protected and rel not in src_files)]
+    for rel in ignored:
+        del dest_files[rel]
+        parts = rel.split("/")[:-1]
+        for i in range(1, len(parts) + 1):
+            kept_dirs.add("/".join(parts[:i]))
+    plan.dirs = sorted(src_dirs)
+    if prune:
+        plan.stale_dirs = sorted(dest_dirs - kept_dirs, key=len, reverse=True)
+
+    for rel, src_file in src_files.items():
+        size = src_file.size
+        plan.sizes[rel] = size
+        plan.src_mtimes[rel] = src_file.mtime_ns
+        dest_stat = dest_files.get(rel)
+        known = manifest.files.get(rel)
+
+        if dest_stat is None or (dest_stat.st_size != size and not (known and known.matches_dest(dest_stat))):
+            if src_file.digest:
+                plan.digests[rel] = src_file.digest
+            plan.copy.append(rel)
+            continue
+
+        if known and known.size == size and known.matches_dest(dest_stat):
+            if src_file.digest:
+                digest = src_file.digest
+            elif known.src_mtime_ns == src_file.mtime_ns:
+                digest = known.digest
+            else:
+                digest = source.digest(rel)
+            plan.digests[rel] = digest
+            if digest == known.digest:
+                plan.unchanged.append(rel)
+            else:
+                plan.copy.append(rel)
+            continue
+
+        digest = src_file.digest or source.digest(rel)
+        plan.digests[rel] = digest
+        if digest == hash_file(dest / rel):
+            plan.unchanged.append(rel)
+        else:
+            plan.copy.append(rel)
+
+    if prune:
+        plan.delete = sorted(rel for rel in dest_files if rel not in src_files)
+    return plan
+
+
+class IntegrityError(OSError):
+    pass
+
+
+def copy_file(source: SourceTree, rel: str, dest: Path, backend: Optional[CopyBackend] = None,
+              expected: Optional[str] = None) -> str:
+    tmp_path = dest.with_name(f"{dest.name}.xeldar-tmp")
+    try:
+        digest = source.copy_to(rel, tmp_path, backend, expected)
+        if expected and digest != expected:
+            raise IntegrityError(f"{rel} was corrupted while copying (expected {expected[:12]}, got {digest[:12]})")
+        os.replace(tmp_path, dest)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+    return digest
+
+
+class _TeeWriter:
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+
+    def write(self, data):
+        for output in self.outputs:
+            output.write(data)
+
+
+def tee_file(source: SourceTree, rel: str, targets: List[Path], mtime_ns: int,
+             expected: Optional[str] = None) -> str:
+    tmp_paths = [target.with_name(f"{target.name}.xeldar-tmp") for target in targets]
+    try:
+        with source.open(rel) as f_in, ExitStack() as stack:
+            outputs = [stack.enter_context(open(tmp_path, "wb")) for tmp_path in tmp_paths]
+            digest = copy_stream(f_in, _TeeWriter(outputs))
+        if expected and digest != expected:
+            raise IntegrityError(f"{rel} was corrupted while copying (expected {expected[:12]}, got {digest[:12]})")
+        for tmp_path, target in zip(tmp_paths, targets):
+            set_mtime(tmp_path, mtime_ns)
+            os.replace(tmp_path, target)
+    except BaseException:
+        for tmp_path in tmp_paths:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+        raise
+    return digest
+
+
+def _delete_files(plan: SyncPlan, log: Optional[LogFn], telemetry: Telemetry):
+    dest = plan.dest
+    for rel in plan.delete:
+        target = dest / rel
+        try:
+            target.unlink()
+        except FileNotFoundError:
+            pass
+        except PermissionError:
+            telemetry.count("retries.delete")
+            os.chmod(target, 0o666)
+            target.unlink()
+        if log:
+            log(f"  - {dest.name}/{rel}", "detail")
+
+    for rel in plan.stale_dirs:
+        target = dest / rel
+        if target.is_dir() and not any(target.iterdir()):
+            target.rmdir()
+
+
+def apply_sync(plan: SyncPlan, manifest: Manifest, log: Optional[LogFn] = None,
+               scheduler: Optional[CopyScheduler] = None,
+               progress: Optional[ProgressTracker] = None,
+               merge: Optional[MergeFn] = None,
+               backend: Optional[CopyBackend] = None,
+               telemetry: Optional[Telemetry] = None,
+               prewritten: Optional[Dict[str, str]] = None,
+               stage: Optional[StagingArea] = None) -> SyncResult:
+    result = SyncResult(unchanged=len(plan.unchanged))
+    prewritten = prewritten or {}
+    src, dest = plan.src, plan.dest
+    telemetry = telemetry or Telemetry()
+    telemetry.count("files.skipped", len(plan.unchanged))
+    dest.mkdir(parents=True, exist_ok=True)
+    if progress and plan.unchanged:
+        progress.advance(len(plan.unchanged), sum(plan.sizes[rel] for rel in plan.unchanged))
+
+    files: Dict[str, ManifestEntry] = {}
+    for rel in plan.unchanged:
+        entry = manifest.files.get(rel)
+        if entry is not None:
+            dest_mtime_ns, dest_size, dest_digest = entry.dest_mtime_ns, entry.dest_size, entry.dest_digest
+        else:
+            st = (dest / rel).stat()
+            dest_mtime_ns, dest_size, dest_digest = st.st_mtime_ns, st.st_size, ""
+        files[rel] = ManifestEntry(plan.sizes[rel], plan.digests[rel], plan.src_mtimes[rel], dest_mtime_ns, dest_size,
+                                   dest_digest)
+
+    if stage is None:
+        with telemetry.span("delete", dest=dest.name, files=len(plan.delete)):
+            _delete_files(plan, log, telemetry)
+        for rel in plan.dirs:
+            (dest / rel).mkdir(parents=True, exist_ok=True)
+    result.deleted = len(plan.delete)
+    telemetry.count("files.deleted", result.deleted)
+
+    write_root = stage.root if stage is not None else dest
+    staged: List[str] = []
+    resumed: List[str] = []
+
+    def write_path(rel: str) -> Path:
+        target = write_root / rel
+        if stage is not None:
+            target.parent.mkdir(parents=True, exist_ok=True)
+        return target
+
+    def copy_one(rel: str) -> ManifestEntry:
+        target = dest / rel
+        outcome = MERGE_REPLACE
+        if merge_applies(merge, rel) and rel not in prewritten and target.exists():
+            outcome = merge(src, rel, target)
+            if outcome == MERGE_UPDATED:
+                telemetry.count("files.merged")
+        if outcome == MERGE_REPLACE:
+            target = write_path(rel)
+        already = None
+        if stage is not None and outcome == MERGE_REPLACE and rel not in prewritten:
+            already = stage.staged(rel, plan.digests.get(rel), plan.sizes[rel], plan.src_mtimes[rel])
+        if rel in prewritten:
+            digest = prewritten[rel]
+        elif already is not None:
+            digest = already
+            resumed.append(rel)
+        elif outcome == MERGE_REPLACE:
+            digest = copy_file(src, rel, target, backend, plan.digests.get(rel))
+        else:
+            digest = plan.digests.get(rel) or src.digest(rel)
+        if stage is not None and outcome == MERGE_REPLACE:
+            if already is None:
+                stage.record(rel, digest, plan.sizes[rel], plan.src_mtimes[rel])
+            staged.append(rel)
+        if progress:
+            progress.advance(1, plan.sizes[rel], rel)
+        if log and outcome != MERGE_UNCHANGED:
+            marker = "+" if outcome == MERGE_REPLACE else "~"
+            log(f"  {marker} {dest.name}/{rel}", "detail")
+        st = target.stat()
+        return ManifestEntry(plan.sizes[rel], digest, plan.src_mtimes[rel], st.st_mtime_ns, st.st_size)
+
+    primaries: List[str] = []
+    duplicates: List[Tuple[str, str]] = []
+    first_copy: Dict[str, str] = {}
+    for rel in plan.copy:
+        digest = plan.digests.get(rel)
+        if merge_applies(merge, rel) and rel not in prewritten and (dest / rel).exists():
+            primaries.append(rel)
+            continue
+        if digest in first_copy:
+            duplicates.append((rel, first_copy[digest]))
+            continue
+        if digest:
+            first_copy.setdefault(digest, rel)
+        primaries.append(rel)
+
+    def materialize(item: Tuple[str, str]) -> ManifestEntry:
+        rel, origin = item
+        target = write_path(rel)
+        digest = copy_file(DirectorySource(write_root), origin, target, local_backend, plan.digests[rel])
+        if stage is not None:
+            stage.record(rel, digest, plan.sizes[rel], plan.src_mtimes[rel])
+            staged.append(rel)
+        if progress:
+            progress.advance(1, plan.sizes[rel], rel)
+        if log:
+            log(f"  + {dest.name}/{rel}", "detail")
+        st = target.stat()
+        return ManifestEntry(plan.sizes[rel], digest, plan.src_mtimes[rel], st.st_mtime_ns, st.st_size)
+
+    runner = scheduler or CopyScheduler(1)
+    try:
+        with telemetry.span("copy", dest=dest.name, files=len(primaries),
+                            bytes=sum(plan.sizes[rel] for rel in primaries)):
+            entries = runner.map(copy_one, primaries)
+        if duplicates:
+            with telemetry.span("link-duplicates", dest=dest.name, files=len(duplicates)):
+                local_backend = HardlinkBackend(detect_backend(write_root, write_root))
+                entries += runner.map(materialize, duplicates)
+        if stage is not None:
+            with telemetry.span("commit", dest=dest.name, files=len(staged), delete=len(plan.delete)):
+                stage.commit(staged, plan.delete, plan.stale_dirs)
+                for rel in plan.dirs:
+                    (dest / rel).mkdir(parents=True, exist_ok=True)
+    except BaseException:
+        if stage is not None:
+            stage.close()
+        manifest.files = {rel: entry for rel, entry in files.items() if (dest / rel).exists()}
+        manifest.save()
+        raise
+    for rel, entry in zip(primaries + [rel for rel, _ in duplicates], entries):
+        files[rel] = entry
+        result.copied += 1
+        result.bytes_copied += entry.size
+    result.deduplicated = len(duplicates)
+    telemetry.count("files.copied", result.copied)
+    telemetry.count("bytes.copied", result.bytes_copied)
+    telemetry.count("files.deduplicated", result.deduplicated)
+    telemetry.count("files.resumed", len(resumed))
+
+    with telemetry.span("manifest", dest=dest.name):
+        manifest.files = files
+        manifest.save()
+
+    if log and resumed:
+        log(f"Resumed {dest.name}: {len(resumed)} file(s) were already staged by an interrupted run", "info")
+    if log and result.deleted:
+        log(f"Removed {result.deleted} file(s) no longer shipped from {dest.name}", "info")
+    return result
+
+
+def _plan(src: Union[SourceTree, Path], dest: Path, manifest: Manifest,
+          ignore: Optional[Callable[[str], bool]], prune: bool, telemetry: Telemetry) -> SyncPlan:
+    with telemetry.span("plan", dest=dest.name) as span:
+        plan = plan_sync(src, dest, manifest, ignore, prune)
+        span.args.update(copy=len(plan.copy), delete=len(plan.delete), unchanged=len(plan.unchanged))
+    return plan
+
+
+def _finish(plan: SyncPlan, manifest: Manifest, log: Optional[LogFn], scheduler: Optional[CopyScheduler],
+            progress: Optional[ProgressTracker], merge: Optional[MergeFn], backend: Optional[CopyBackend],
+            telemetry: Telemetry, prewritten: Optional[Dict[str, str]] = None,
+            stage: Optional[StagingArea] = None) -> SyncResult:
+    if plan.is_noop:
+        if stage is not None:
+            stage.discard()
+        if set(manifest.files) != set(plan.unchanged):
+            apply_sync(plan, manifest)
+        if progress:
+            progress.advance(len(plan.unchanged), sum(plan.sizes.values()))
+        telemetry.count("files.skipped", len(plan.unchanged))
+        return SyncResult(unchanged=len(plan.unchanged))
+    root = plan.src.local_root()
+    if backend is None and root is not None and set(plan.copy) - set(prewritten or ()):
+        backend = detect_backend(root, plan.dest)
+        if log:
+            log(f"Copy method for {plan.dest.name}: {backend_label(backend)}", "detail")
+    return apply_sync(plan, manifest, log, scheduler, progress, merge, backend, telemetry, prewritten, stage)
+
+
+def _recover(dest: Path, log: Optional[LogFn], tier: str = "") -> StagingArea:
+    stage = StagingArea(dest, tier)
+    if stage.recover() and log:
+        log(f"Finished moving the files of an interrupted install into {dest.name}", "info")
+    return stage
+
+
+def sync_tree(src: Union[SourceTree, Path], dest: Path, manifest: Optional[Manifest] = None,
+              before_write: Optional[Callable[[SyncPlan, Manifest], None]] = None,
+              ignore: Optional[Callable[[str], bool]] = None,
+              log: Optional[LogFn] = None,
+              scheduler: Optional[CopyScheduler] = None,
+              progress: Optional[ProgressTracker] = None,
+              merge: Optional[MergeFn] = None,
+              backend: Optional[CopyBackend] = None,
+              telemetry: Optional[Telemetry] = None,
+              prune: Optional[bool] = None,
+              staged: bool = False,
+              tier: str = "") -> SyncResult:
+    telemetry = telemetry or Telemetry()
+    stage = _recover(dest, log, tier) if staged else None
+    manifest = manifest or Manifest.for_destination(dest, tier=tier)
+    prune = merge is None if prune is None else prune
+    plan = _plan(src, dest, manifest, ignore, prune, telemetry)
+    if before_write is not None and not plan.is_noop:
+        before_write(plan, manifest)
+    return _finish(plan, manifest, log, scheduler, progress, merge, backend, telemetry, None, stage)
+
+
+def sync_fanout(src: Union[SourceTree, Path], dests: List[Path],
+                before_write: Optional[Callable[[SyncPlan, Manifest], None]] = None,
+                ignore: Optional[Callable[[str], bool]] = None,
+                log: Optional[LogFn] = None,
+                scheduler: Optional[CopyScheduler] = None,
+                progress: Optional[ProgressTracker] = None,
+                merge: Optional[MergeFn] = None,
+                telemetry: Optional[Telemetry] = None,
+                prune: Optional[bool] = None,
+                staged: bool = False,
+                tier: str = "") -> List[SyncResult]:
+    telemetry = telemetry or Telemetry()
+    source = as_source(src)
+    stages = {dest: _recover(dest, log, tier) if staged else None for dest in dests}
+    prune = merge is None if prune is None else prune
+    manifests = [Manifest.for_destination(dest, tier=tier) for dest in dests]
+    plans = [_plan(source, dest, manifest, ignore, prune, telemetry) for dest, manifest in zip(dests, manifests)]
+    if before_write is not None:
+        for plan, manifest in zip(plans, manifests):
+            if not plan.is_noop:
+                before_write(plan, manifest)
+
+    shared: Dict[str, List[SyncPlan]] = {}
+    for plan in plans:
+        seen = set()
+        for rel in plan.copy:
+            digest = plan.digests.get(rel)
+            if (merge_applies(merge, rel) and (plan.dest / rel).exists()) or (digest and digest in seen):
+                continue
+            if digest:
+                seen.add(digest)
+            shared.setdefault(rel, []).append(plan)
+    shared = {rel: targets for rel, targets in shared.items() if len(targets) > 1}
+
+    def tee_one(rel: str) -> str:
+        targets = [stages[plan.dest].path(rel) if staged else plan.dest / rel for plan in shared[rel]]
+        for target in targets:
+            target.parent.mkdir(parents=True, exist_ok=True)
+        first = shared[rel][0]
+        return tee_file(source, rel, targets, first.src_mtimes[rel], first.digests.get(rel))
+
+    prewritten: Dict[Path, Dict[str, str]] = {dest: {} for dest in dests}
+    if shared:
+        with telemetry.span("fan-out", files=len(shared), targets=len(dests)):
+            digests = (scheduler or CopyScheduler(1)).map(tee_one, list(shared))
+        for (rel, targets), digest in zip(shared.items(), digests):
+            for plan in targets:
+                prewritten[plan.dest][rel] = digest
+        telemetry.count("reads.saved", sum(len(targets) - 1 for targets in shared.values()))
+
+    return [
+        _finish(plan, manifest, log, scheduler, progress, merge, None, telemetry, prewritten[plan.dest], stages[plan.dest])
+        for plan, manifest in zip(plans, manifests)
+    ]
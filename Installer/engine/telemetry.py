@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import pstats
+import cProfile
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .manifest import state_dir
+
+REPORT_VERSION = 1
+REPORT_KEEP = 10
+PROFILE_ENV = "XELDAR_PROFILE"
+TRACE_ENV = "XELDAR_TRACE"
+
+
+@dataclass
+class Span:
+    name: str
+    start_ns: int
+    end_ns: int = 0
+    thread: str = ""
+    args: Dict[str, object] = field(default_factory=dict)
+
+    @property
+    def seconds(self) -> float:
+        return max(0, self.end_ns - self.start_ns) / 1e9
+
+
+def env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def reports_dir() -> Path:
+    path = state_dir() / "reports"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class Telemetry:
+
+    def __init__(self, label: str = "install"):
+        self.label = label
+        self.created = time.time()
+        self.spans: List[Span] = []
+        self.counters: Dict[str, int] = {}
+        self.lines: List[Tuple[int, str, str]] = []
+        self.profiler: Optional[cProfile.Profile] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **args) -> Iterator[Span]:
+        span = Span(name, time.perf_counter_ns(), thread=threading.current_thread().name, args=args)
+        try:
+            yield span
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            self.add(span)
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def count(self, name: str, value: int = 1):
+        if not value:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def note(self, message: str, tag: str = "info"):
+        with self._lock:
+            self.lines.append((time.perf_counter_ns(), tag, message))
+
+    @contextmanager
+    def profile(self, enabled: bool = True) -> Iterator[None]:
+        if not enabled:
+            yield
+            return
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        try:
+            yield
+        finally:
+            self.profiler.disable()
+
+    def _origin_ns(self) -> int:
+        starts = [span.start_ns for span in self.spans] + [ns for ns, _, _ in self.lines]
+        return min(starts) if starts else 0
+
+    def phases(self) -> Dict[str, dict]:
+        phases: Dict[str, dict] = {}
+        for span in self.spans:
+            phase = phases.setdefault(span.name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+            phase["count"] += 1
+            phase["seconds"] += span.seconds
+            phase["max_seconds"] = max(phase["max_seconds"], span.seconds)
+        for phase in phases.values():
+            phase["seconds"] = round(phase["seconds"], 4)
+            phase["max_seconds"] = round(phase["max_seconds"], 4)
+        return phases
+
+    def report(self, **extra) -> dict:
+        origin = self._origin_ns()
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start_ns)
+            counters = dict(self.counters)
+        return {
+            "version": REPORT_VERSION,
+            "label": self.label,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.created)),
+            **extra,
+            "counters": counters,
+            "phases": self.phases(),
+            "spans": [
+                {
+                    "name": span.name,
+                    "thread": span.thread,
+                    "start": round((span.start_ns - origin) / 1e9, 4),
+                    "seconds": round(span.seconds, 4),
+                    **({"args": span.args} if span.args else {}),
+                }
+                for span in spans
+            ],
+        }
+
+    def trace_events(self) -> List[dict]:
+        origin = self._origin_ns()
+        threads: Dict[str, int] = {}
+        events: List[dict] = []
+        for span in sorted(self.spans, key=lambda span: span.start_ns):
+            tid = threads.setdefault(span.thread, len(threads) + 1)
+            events.append({
+                "name": span.name, "cat": self.label, "ph": "X", "pid": 1, "tid": tid,
+                "ts": (span.start_ns - origin) / 1000, "dur": (span.end_ns - span.start_ns) / 1000,
+                "args": {key: str(value) if isinstance(value, Path) else value for key, value in span.args.items()},
+            })
+        for ns, tag, message in self.lines:
+            events.append({
+                "name": message[:120], "cat": tag, "ph": "i", "s": "g", "pid": 1, "tid": 0,
+                "ts": (ns - origin) / 1000,
+            })
+        for thread, tid in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": thread}})
+        return events
+
+    def write(self, folder: Optional[Path] = None, trace: bool = False, **extra) -> Path:
+        folder = folder or reports_dir()
+        folder.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.label}-{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.created))}"
+        base = folder / stem
+
+        origin = self._origin_ns()
+        with open(base.with_suffix(".log"), "w", encoding="utf-8") as f:
+            for ns, tag, message in self.lines:
+                f.write(f"{(ns - origin) / 1e9:9.3f} [{tag}] {message}\n")
+        report_path = base.with_suffix(".json")
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(**extra), f, indent=2, default=str)
+        if trace:
+            with open(folder / f"{stem}.trace.json", "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, f, default=str)
+        if self.profiler is not None:
+            pstats.Stats(self.profiler).dump_stats(str(base.with_suffix(".prof")))
+        prune_reports(folder, self.label)
+        return report_path
+
+
+def prune_reports(folder: Path, label: str, keep: int = REPORT_KEEP):
+    reports = sorted(folder.glob(f"{label}-*.json"), reverse=True)
+    stems = [path.name[:-len(".json")] for path in reports if not path.name.endswith(".trace.json")]
+    for stem in stems[keep:]:
+        for path in folder.glob(f"{stem}.*"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
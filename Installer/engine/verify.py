@@ -0,0 +1,82 @@
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from .manifest import DEFERRED_TIER, Manifest, hash_file, scan_tree
+from .scheduler import CopyScheduler
+from .sources import SourceTree
+
+
+@dataclass
+class VerifyReport:
+    component: str
+    dest: Path
+    ok: int = 0
+    hashed: int = 0
+    missing: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    extra: List[str] = field(default_factory=list)
+
+    @property
+    def clean(self) -> bool:
+        return not self.missing and not self.modified
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "component": self.component,
+            "dest": str(self.dest),
+            "ok": self.ok,
+            "hashed": self.hashed,
+            "missing": self.missing,
+            "modified": self.modified,
+            "extra": self.extra,
+        }
+
+
+def verify_tree(source: SourceTree, dest: Path, component: str,
+                manifest: Optional[Manifest] = None,
+                ignore: Optional[Callable[[str], bool]] = None,
+                full: bool = False,
+                scheduler: Optional[CopyScheduler] = None) -> VerifyReport:
+    report = VerifyReport(component, dest)
+    if manifest is None:
+        manifest = Manifest.for_destination(dest)
+        manifest.files = {**Manifest.for_destination(dest, tier=DEFERRED_TIER).files, **manifest.files}
+    src_files, _ = source.scan()
+    dest_files, _ = scan_tree(dest)
+    if ignore is not None:
+        dest_files = {rel: st for rel, st in dest_files.items() if not ignore(rel)}
+
+    to_hash: List[str] = []
+    for rel, src_file in sorted(src_files.items()):
+        st = dest_files.get(rel)
+        if st is None:
+            report.missing.append(rel)
+            continue
+        known = manifest.files.get(rel)
+        recorded = known is not None and known.matches_dest(st)
+        if recorded:
+            current = src_file.digest == known.digest if src_file.digest else known.src_mtime_ns == src_file.mtime_ns
+            merged = bool(known.dest_digest) or known.dest_size not in (-1, known.size)
+            if current and (merged or not full):
+                report.ok += 1
+                continue
+        if st.st_size != src_file.size:
+            report.modified.append(rel)
+            continue
+        to_hash.append(rel)
+
+    def check(rel: str) -> bool:
+        expected = src_files[rel].digest or source.digest(rel)
+        return hash_file(dest / rel) == expected
+
+    matches = (scheduler or CopyScheduler(1)).map(check, to_hash)
+    report.hashed = len(to_hash)
+    for rel, match in zip(to_hash, matches):
+        if match:
+            report.ok += 1
+        else:
+            report.modified.append(rel)
+    report.modified.sort()
+    report.extra = sorted(rel for rel in dest_files if rel not in src_files and rel not in manifest.protected)
+    return report
@@ -1,12 +1,21 @@
-import os
 import sys
-import shutil
-import winreg
 import threading
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
+from engine.backup import BackupStore
+from engine.components import InstallTargets, default_appdata_path, default_documents_path
+from engine.delta import DELTA_SUFFIX, DeltaConflict, DeltaPackage, install_resolver, update_merge
+from engine.detect import GameDetector
+from engine.filters import RULES_FILE_NAME, load_rules_file
+from engine.events import CallEvent, EventBus, LogEvent, ProgressEvent
+from engine.installer import InstallEngine, InstallOptions, bundle_profiles, bundle_sources, components_for_steps
+from engine.payload import find_payload
+from engine.profiles import is_supported
+from engine.manifest import state_dir
+from engine.scheduler import CopyScheduler, DEFAULT_WORKERS, WORKER_CHOICES
+from engine.telemetry import PROFILE_ENV, TRACE_ENV, Span, Telemetry, env_flag
 
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
@@ -14,23 +23,9 @@ ctk.set_default_color_theme("blue")
 
 class FFXIVConfigInstaller(ctk.CTk):
     
-    COMMON_PATHS = [
-        r"C:\Program Files (x86)\SquareEnix\FINAL FANTASY XIV - A Realm Reborn",
-        r"C:\Program Files\SquareEnix\FINAL FANTASY XIV - A Realm Reborn",
-        r"D:\Games\SquareEnix\FINAL FANTASY XIV - A Realm Reborn",
-        r"D:\SquareEnix\FINAL FANTASY XIV - A Realm Reborn",
-        r"E:\Games\SquareEnix\FINAL FANTASY XIV - A Realm Reborn",
-        r"C:\Games\SquareEnix\FINAL FANTASY XIV - A Realm Reborn",
-    ]
+    MAX_LOG_LINES = 1000
+    EVENT_POLL_MS = 50
     
-    STEAM_PATHS = [
-        r"C:\Program Files (x86)\Steam\steamapps\common\FINAL FANTASY XIV Online",
-        r"C:\Program Files\Steam\steamapps\common\FINAL FANTASY XIV Online",
-        r"D:\Steam\steamapps\common\FINAL FANTASY XIV Online",
-        r"D:\SteamLibrary\steamapps\common\FINAL FANTASY XIV Online",
-        r"E:\SteamLibrary\steamapps\common\FINAL FANTASY XIV Online",
-    ]
-
     def __init__(self):
         super().__init__()
         
@@ -42,24 +37,30 @@ class FFXIVConfigInstaller(ctk.CTk):
             self.app_dir = Path(sys._MEIPASS)
             self.icon_path = Path(sys._MEIPASS) / "X.ico"
         else:
-            self.app_dir = Path(__file__).parent.parent
+            self.app_dir = Path(__file__).parent.parent / "Configs"
             self.icon_path = Path(__file__).parent / "X.ico"
         
         if self.icon_path.exists():
             self.iconbitmap(str(self.icon_path))
         
-        self.skills_source = self.app_dir / "Mods Configs" / "Skills"
-        self.reshade_presets_source = self.app_dir / "ReShade Configs" / "reshade-presets"
-        self.reshade_shaders_source = self.app_dir / "ReShade Configs" / "reshade-shaders"
-        self.ffxiv_config_source = self.app_dir / "FFXIV Configs" / "FINAL FANTASY XIV - A Realm Reborn"
-        self.plugin_configs_source = self.app_dir / "Plugin Configs" / "pluginConfigs"
+        self.payload = find_payload()
+        self.sources = bundle_sources(self.payload, self.app_dir)
+        self.profiles = bundle_profiles(self.payload, self.app_dir)
+        self.extra_filter_rules = load_rules_file(state_dir() / RULES_FILE_NAME)
         
         self.game_path: Optional[Path] = None
-        self.documents_path = Path(os.path.expanduser("~")) / "Documents" / "My Games"
-        self.appdata_path = Path(os.environ.get("APPDATA", "")) / "XIVLauncher"
+        self.detector = GameDetector()
+        self.detecting = False
+        self.events = EventBus()
+        self.telemetry: Optional[Telemetry] = None
+        self.detection_span: Optional[Span] = None
+        self.backups = BackupStore()
+        self.documents_path = default_documents_path()
+        self.appdata_path = default_appdata_path()
         
         self._create_ui()
         self._auto_detect_game()
+        self.after(self.EVENT_POLL_MS, self._drain_events)
     
     def _create_ui(self):
         self.main_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -156,7 +157,7 @@ class FFXIVConfigInstaller(ctk.CTk):
         )
         browse_btn.pack(side="left", padx=(0, 5))
         
-        detect_btn = ctk.CTkButton(
+        self.detect_btn = ctk.CTkButton(
             path_input_frame,
             text="Auto-Detect",
             width=100,
@@ -165,7 +166,7 @@ class FFXIVConfigInstaller(ctk.CTk):
             fg_color="#533483",
             hover_color="#6b4299"
         )
-        detect_btn.pack(side="left")
+        self.detect_btn.pack(side="left")
         
         self.path_status_label = ctk.CTkLabel(
             path_frame,
@@ -188,9 +189,13 @@ class FFXIVConfigInstaller(ctk.CTk):
         section_label.pack(anchor="w", padx=15, pady=(15, 10))
         
         self.install_skills_var = ctk.BooleanVar(value=True)
+        self.extract_modpacks_var = ctk.BooleanVar(value=True)
         self.install_reshade_var = ctk.BooleanVar(value=True)
         self.install_config_var = ctk.BooleanVar(value=True)
         self.install_plugins_var = ctk.BooleanVar(value=True)
+        self.prune_shaders_var = ctk.BooleanVar(value=True)
+        self.merge_plugins_var = ctk.BooleanVar(value=False)
+        self.import_profiles_var = ctk.BooleanVar(value=True)
         
         skills_check = ctk.CTkCheckBox(
             options_frame,
@@ -211,6 +216,19 @@ class FFXIVConfigInstaller(ctk.CTk):
         )
         skills_desc.pack(anchor="w", padx=20)
         
+        modpacks_check = ctk.CTkCheckBox(
+            options_frame,
+            text="Also extract .pmp packs into the Penumbra mod folder",
+            variable=self.extract_modpacks_var,
+            font=ctk.CTkFont(size=12),
+            text_color="#a8b2d1",
+            fg_color="#e6b422",
+            hover_color="#d4a41f",
+            checkbox_width=18,
+            checkbox_height=18
+        )
+        modpacks_check.pack(anchor="w", padx=45, pady=(5, 0))
+        
         reshade_check = ctk.CTkCheckBox(
             options_frame,
             text="Install ReShade Presets & Shaders",
@@ -230,6 +248,19 @@ class FFXIVConfigInstaller(ctk.CTk):
         )
         reshade_desc.pack(anchor="w", padx=20)
         
+        prune_check = ctk.CTkCheckBox(
+            options_frame,
+            text="Only install shaders used by the bundled presets",
+            variable=self.prune_shaders_var,
+            font=ctk.CTkFont(size=12),
+            text_color="#a8b2d1",
+            fg_color="#e6b422",
+            hover_color="#d4a41f",
+            checkbox_width=18,
+            checkbox_height=18
+        )
+        prune_check.pack(anchor="w", padx=45, pady=(5, 0))
+        
         config_check = ctk.CTkCheckBox(
             options_frame,
             text="Install FFXIV Configuration Files",
@@ -266,7 +297,76 @@ class FFXIVConfigInstaller(ctk.CTk):
             font=ctk.CTkFont(size=11),
             text_color="#8892b0"
         )
-        plugins_desc.pack(anchor="w", padx=20, pady=(0, 15))
+        plugins_desc.pack(anchor="w", padx=20)
+        
+        merge_check = ctk.CTkCheckBox(
+            options_frame,
+            text="Merge into existing plugin settings instead of replacing them",
+            variable=self.merge_plugins_var,
+            font=ctk.CTkFont(size=12),
+            text_color="#a8b2d1",
+            fg_color="#e6b422",
+            hover_color="#d4a41f",
+            checkbox_width=18,
+            checkbox_height=18
+        )
+        merge_check.pack(anchor="w", padx=45, pady=(5, 0))
+        
+        profiles_check = ctk.CTkCheckBox(
+            options_frame,
+            text="Also import the bundled DelvUI, LMeter, QoLBar and Umbra profiles",
+            variable=self.import_profiles_var,
+            font=ctk.CTkFont(size=12),
+            text_color="#a8b2d1",
+            fg_color="#e6b422",
+            hover_color="#d4a41f",
+            checkbox_width=18,
+            checkbox_height=18
+        )
+        profiles_check.pack(anchor="w", padx=45, pady=(5, 0))
+        
+        workers_frame = ctk.CTkFrame(options_frame, fg_color="transparent")
+        workers_frame.pack(anchor="w", padx=20, pady=(10, 10))
+        
+        ctk.CTkLabel(
+            workers_frame,
+            text="Copy threads:",
+            font=ctk.CTkFont(size=13),
+            text_color="#ccd6f6"
+        ).pack(side="left")
+        
+        worker_values = sorted({str(n) for n in WORKER_CHOICES} | {str(DEFAULT_WORKERS)}, key=int)
+        self.copy_workers_var = ctk.StringVar(value=str(DEFAULT_WORKERS))
+        ctk.CTkOptionMenu(
+            workers_frame,
+            values=worker_values,
+            variable=self.copy_workers_var,
+            width=80,
+            fg_color="#0f3460",
+            button_color="#0f3460",
+            button_hover_color="#1a508b"
+        ).pack(side="left", padx=(10, 10))
+        
+        ctk.CTkLabel(
+            workers_frame,
+            text="(lower for HDDs, higher for SSD/NVMe)",
+            font=ctk.CTkFont(size=11),
+            text_color="#8892b0"
+        ).pack(side="left")
+        
+        self.save_trace_var = ctk.BooleanVar(value=env_flag(TRACE_ENV))
+        trace_check = ctk.CTkCheckBox(
+            options_frame,
+            text="Save a timing trace with the install report (chrome://tracing)",
+            variable=self.save_trace_var,
+            font=ctk.CTkFont(size=12),
+            text_color="#a8b2d1",
+            fg_color="#e6b422",
+            hover_color="#d4a41f",
+            checkbox_width=18,
+            checkbox_height=18
+        )
+        trace_check.pack(anchor="w", padx=20, pady=(0, 15))
     
     def _create_progress_section(self):
         progress_frame = ctk.CTkFrame(self.main_frame, fg_color="#16213e", corner_radius=10)
@@ -294,8 +394,17 @@ class FFXIVConfigInstaller(ctk.CTk):
             progress_color="#e6b422",
             fg_color="#1a1a2e"
         )
-        self.progress_bar.pack(fill="x", padx=15, pady=(0, 15))
+        self.progress_bar.pack(fill="x", padx=15, pady=(0, 5))
         self.progress_bar.set(0)
+        
+        self.progress_status_label = ctk.CTkLabel(
+            progress_frame,
+            text="",
+            font=ctk.CTkFont(size=11),
+            text_color="#8892b0",
+            anchor="w"
+        )
+        self.progress_status_label.pack(fill="x", padx=15, pady=(0, 10))
     
     def _create_action_buttons(self):
         button_frame = ctk.CTkFrame(self.main_frame, fg_color="transparent")
@@ -313,6 +422,30 @@ class FFXIVConfigInstaller(ctk.CTk):
         )
         self.install_btn.pack(side="left", fill="x", expand=True, padx=(0, 10))
         
+        self.restore_btn = ctk.CTkButton(
+            button_frame,
+            text="Restore Backup",
+            font=ctk.CTkFont(size=14),
+            height=45,
+            width=140,
+            fg_color="#533483",
+            hover_color="#6b4299",
+            command=self._start_restore
+        )
+        self.restore_btn.pack(side="left", padx=(0, 10))
+        
+        self.update_btn = ctk.CTkButton(
+            button_frame,
+            text="Apply Update",
+            font=ctk.CTkFont(size=14),
+            height=45,
+            width=120,
+            fg_color="#0f3460",
+            hover_color="#1a508b",
+            command=self._start_update
+        )
+        self.update_btn.pack(side="left", padx=(0, 10))
+        
         exit_btn = ctk.CTkButton(
             button_frame,
             text="Exit",
@@ -326,6 +459,11 @@ class FFXIVConfigInstaller(ctk.CTk):
         exit_btn.pack(side="right")
     
     def _log(self, message: str, tag: str = "info"):
+        self.events.log(message, tag)
+        if self.telemetry is not None:
+            self.telemetry.note(message, tag)
+    
+    def _drain_events(self):
         prefix_map = {
             "info": "ℹ️ ",
             "success": "✅ ",
@@ -333,49 +471,75 @@ class FFXIVConfigInstaller(ctk.CTk):
             "warning": "⚠️ ",
             "progress": "⏳ "
         }
-        prefix = prefix_map.get(tag, "")
-        self.progress_text.insert("end", f"{prefix}{message}\n")
+        lines = []
+        latest_progress: Optional[ProgressEvent] = None
+        for event in self.events.drain():
+            if isinstance(event, LogEvent):
+                lines.append(f"{prefix_map.get(event.tag, '')}{event.message}\n")
+            elif isinstance(event, ProgressEvent):
+                latest_progress = event
+            elif isinstance(event, CallEvent):
+                if lines:
+                    self._append_log("".join(lines))
+                    lines = []
+                event.callback()
+        
+        if lines:
+            self._append_log("".join(lines))
+        if latest_progress is not None:
+            self._show_progress(latest_progress)
+        
+        self.after(self.EVENT_POLL_MS, self._drain_events)
+    
+    def _append_log(self, text: str):
+        self.progress_text.insert("end", text)
+        line_count = int(self.progress_text.index("end-1c").split(".")[0])
+        if line_count > self.MAX_LOG_LINES:
+            self.progress_text.delete("1.0", f"{line_count - self.MAX_LOG_LINES + 1}.0")
         self.progress_text.see("end")
-        self.update_idletasks()
+    
+    def _show_progress(self, event: ProgressEvent):
+        self.progress_bar.set(event.fraction)
+        status = (
+            f"{event.phase}  {event.files_done}/{event.files_total} files  "
+            f"{event.bytes_done / 1048576:.1f}/{event.bytes_total / 1048576:.1f} MB"
+        )
+        if event.current:
+            status += f"  {event.current}"
+        self.progress_status_label.configure(text=status)
     
     def _clear_log(self):
         self.progress_text.delete("1.0", "end")
     
     def _auto_detect_game(self):
+        if self.detecting:
+            return
+        self.detecting = True
+        self.detect_btn.configure(state="disabled")
         self._log("Searching for FFXIV installation...", "progress")
-        
-        try:
-            key = winreg.OpenKey(
-                winreg.HKEY_LOCAL_MACHINE,
-                r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall\Steam App 39210"
-            )
-            install_path, _ = winreg.QueryValueEx(key, "InstallLocation")
-            winreg.CloseKey(key)
-            if Path(install_path).exists():
-                self._set_game_path(Path(install_path))
-                return
-        except (WindowsError, FileNotFoundError):
-            pass
-        
-        try:
-            key = winreg.OpenKey(
-                winreg.HKEY_LOCAL_MACHINE,
-                r"SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall\{2B41E132-07DF-4925-A3D3-F2D1765CBER7}_is1"
-            )
-            install_path, _ = winreg.QueryValueEx(key, "InstallLocation")
-            winreg.CloseKey(key)
-            if Path(install_path).exists():
-                self._set_game_path(Path(install_path))
-                return
-        except (WindowsError, FileNotFoundError):
-            pass
-        
-        all_paths = self.COMMON_PATHS + self.STEAM_PATHS
-        for path_str in all_paths:
-            path = Path(path_str)
-            if path.exists() and (path / "game").exists():
-                self._set_game_path(path)
-                return
+        threading.Thread(target=self._run_detection, daemon=True).start()
+    
+    def _run_detection(self):
+        with Telemetry("detect").span("detect") as span:
+            try:
+                path = self.detector.detect()
+            except Exception as e:
+                error = str(e)
+                self._log(f"Auto-detection failed: {error}", "error")
+                path = None
+        span.args.update(found=path is not None, slow_probes=len(self.detector.slow_probes))
+        self.detection_span = span
+        
+        for slow_path in self.detector.slow_probes:
+            self._log(f"Skipped unresponsive location: {slow_path}", "warning")
+        self.events.call(lambda: self._finish_detection(path))
+    
+    def _finish_detection(self, path: Optional[Path]):
+        self.detecting = False
+        self.detect_btn.configure(state="normal")
+        if path is not None:
+            self._set_game_path(path)
+            return
         
         self._log("Could not auto-detect FFXIV. Please browse manually.", "warning")
         self.path_status_label.configure(
@@ -420,162 +584,226 @@ class FFXIVConfigInstaller(ctk.CTk):
         if not self.game_path.exists():
             messagebox.showerror("Error", f"The selected path does not exist:\n{self.game_path}")
             return
-        
-        if not any([
-            self.install_skills_var.get(),
-            self.install_reshade_var.get(),
-            self.install_config_var.get(),
-            self.install_plugins_var.get()
-        ]):
+        if (self.game_path / "game").exists():
+            self.detector.remember(self.game_path)
+        
+        steps = {
+            "skills": self.install_skills_var.get(),
+            "reshade": self.install_reshade_var.get(),
+            "config": self.install_config_var.get(),
+            "plugins": self.install_plugins_var.get(),
+        }
+        if not any(steps.values()):
             messagebox.showwarning("Warning", "Please select at least one installation option.")
             return
         
         self.install_btn.configure(state="disabled", text="Installing...")
+        self.restore_btn.configure(state="disabled")
+        self.update_btn.configure(state="disabled")
         self._clear_log()
         self.progress_bar.set(0)
-        
-        thread = threading.Thread(target=self._run_installation, daemon=True)
+        self.progress_status_label.configure(text="")
+        
+        workers = int(self.copy_workers_var.get())
+        prune = self.prune_shaders_var.get()
+        merge = self.merge_plugins_var.get()
+        modpacks = self.extract_modpacks_var.get()
+        profiles = self.import_profiles_var.get()
+        trace = self.save_trace_var.get()
+        thread = threading.Thread(
+            target=self._run_installation,
+            args=(steps, workers, prune, merge, modpacks, profiles, trace),
+            daemon=True
+        )
         thread.start()
     
-    def _run_installation(self):
+    def _run_installation(self, steps: Dict[str, bool], workers: int, prune: bool, merge: bool, modpacks: bool,
+                          profiles: bool = False, trace: bool = False):
+        self.telemetry = telemetry = Telemetry()
+        if self.detection_span is not None:
+            telemetry.add(self.detection_span)
+        profile = env_flag(PROFILE_ENV)
+        if profile:
+            workers = 1
+        outcome = "failed"
         try:
-            total_steps = sum([
-                self.install_skills_var.get(),
-                self.install_reshade_var.get(),
-                self.install_config_var.get(),
-                self.install_plugins_var.get()
-            ])
-            current_step = 0
+            options = InstallOptions(
+                components_for_steps([name for name, enabled in steps.items() if enabled]),
+                workers=workers,
+                prune_shaders=prune,
+                merge_plugins=merge,
+                extract_modpacks=modpacks,
+                sequential=profile,
+                profiles=[p.key for p in self.profiles.profiles() if is_supported(p)] if profiles else None
+            )
+            targets = InstallTargets(self.game_path, self.documents_path, self.appdata_path)
+            engine = InstallEngine(self.sources, self._log, self.events, telemetry, self.backups,
+                                   self.extra_filter_rules, self.profiles)
             
             self._log("Starting installation process...", "info")
             self._log(f"Game directory: {self.game_path}", "info")
+            if profile:
+                self._log("Profiling enabled: running steps one after another on a single thread", "warning")
+            self._log(f"Copy threads: {workers}", "info")
             self._log("-" * 50, "info")
             
-            if self.install_skills_var.get():
-                self._install_skills()
-                current_step += 1
-                self.progress_bar.set(current_step / total_steps)
-            
-            if self.install_reshade_var.get():
-                self._install_reshade()
-                current_step += 1
-                self.progress_bar.set(current_step / total_steps)
-            
-            if self.install_config_var.get():
-                self._install_ffxiv_config()
-                current_step += 1
-                self.progress_bar.set(current_step / total_steps)
-            
-            if self.install_plugins_var.get():
-                self._install_plugin_configs()
-                current_step += 1
-                self.progress_bar.set(current_step / total_steps)
+            with telemetry.profile(profile):
+                engine.run([targets], options)
+                if engine.deferred:
+                    self._log("Settings installed, the game can be started now", "success")
+                    engine.run_deferred(options)
             
+            outcome = "success"
             self._log("-" * 50, "info")
             self._log("Installation completed successfully!", "success")
             self._log("", "info")
             self._log("Next steps:", "info")
-            if self.install_skills_var.get():
+            if steps["skills"] and modpacks:
+                self._log("  • Reload the mods in Penumbra (Rediscover Mods) to pick up the extracted skill mods", "info")
+            elif steps["skills"]:
                 self._log("  • Open Penumbra and import the skill mods", "info")
-            if self.install_reshade_var.get():
+            if steps["reshade"]:
                 self._log("  • Configure ReShade to use the installed presets", "info")
             
-            self.after(0, lambda: messagebox.showinfo(
+            self.events.call(lambda: messagebox.showinfo(
                 "Success",
                 "Configuration installation completed!\n\nCheck the progress log for details."
             ))
             
         except Exception as e:
-            self._log(f"Installation failed: {str(e)}", "error")
-            self.after(0, lambda: messagebox.showerror("Error", f"Installation failed:\n{str(e)}"))
+            error = str(e)
+            self._log(f"Installation failed: {error}", "error")
+            self.events.call(lambda: messagebox.showerror("Error", f"Installation failed:\n{error}"))
         
         finally:
-            self.after(0, lambda: self.install_btn.configure(
-                state="normal",
-                text="🚀 Install Configurations"
-            ))
+            self._save_report(telemetry, steps, workers, outcome, trace)
+            self.events.call(self._reset_buttons)
     
-    def _install_skills(self):
-        self._log("Installing Skill Mods...", "progress")
-        
-        if not self.skills_source.exists():
-            self._log(f"Skills source not found: {self.skills_source}", "error")
+    def _save_report(self, telemetry: Telemetry, steps: Dict[str, bool], workers: int, outcome: str, trace: bool):
+        self.telemetry = None
+        try:
+            path = telemetry.write(
+                trace=trace,
+                outcome=outcome,
+                game_path=str(self.game_path),
+                steps=[name for name, enabled in steps.items() if enabled],
+                workers=workers,
+                source="payload" if self.payload is not None else str(self.app_dir),
+            )
+        except OSError as e:
+            self._log(f"Could not save the install report: {e}", "warning")
             return
-        
-        dest = self.game_path / "Skills"
-        self._copy_folder(self.skills_source, dest)
-        self._log(f"Skills mods copied to: {dest}", "success")
-    
-    def _install_reshade(self):
-        self._log("Installing ReShade files...", "progress")
-        
-        game_folder = self.game_path / "game"
-        if not game_folder.exists():
-            game_folder = self.game_path
-        
-        if self.reshade_presets_source.exists():
-            dest_presets = game_folder / "reshade-presets"
-            self._copy_folder(self.reshade_presets_source, dest_presets)
-            self._log(f"ReShade presets copied to: {dest_presets}", "success")
-        else:
-            self._log(f"ReShade presets source not found: {self.reshade_presets_source}", "warning")
-        
-        if self.reshade_shaders_source.exists():
-            dest_shaders = game_folder / "reshade-shaders"
-            self._copy_folder(self.reshade_shaders_source, dest_shaders)
-            self._log(f"ReShade shaders copied to: {dest_shaders}", "success")
-        else:
-            self._log(f"ReShade shaders source not found: {self.reshade_shaders_source}", "warning")
+        self._log(f"Install report saved to: {path}", "detail")
     
-    def _install_ffxiv_config(self):
-        self._log("Installing FFXIV configuration files...", "progress")
-        
-        if not self.ffxiv_config_source.exists():
-            self._log(f"FFXIV config source not found: {self.ffxiv_config_source}", "error")
+    def _start_restore(self):
+        targets = []
+        if self.install_config_var.get():
+            targets.append(("ffxiv-config", self.documents_path / "FINAL FANTASY XIV - A Realm Reborn"))
+        if self.install_plugins_var.get():
+            targets.append(("plugin-configs", self.appdata_path / "pluginConfigs"))
+        
+        available = []
+        for name, dest in targets:
+            snapshot = self.backups.latest(name)
+            if snapshot is not None:
+                available.append((snapshot, dest))
+        
+        if not available:
+            messagebox.showinfo(
+                "Restore Backup",
+                "No backups found for the selected options.\n\n"
+                "Backups are taken automatically before FFXIV and plugin configs are changed."
+            )
             return
         
-        self.documents_path.mkdir(parents=True, exist_ok=True)
-        
-        dest = self.documents_path / "FINAL FANTASY XIV - A Realm Reborn"
-        
-        if dest.exists():
-            backup_path = self.documents_path / "FINAL FANTASY XIV - A Realm Reborn.backup"
-            if backup_path.exists():
-                shutil.rmtree(backup_path)
-            self._log(f"Backing up existing config to: {backup_path}", "info")
-            shutil.move(str(dest), str(backup_path))
-        
-        self._copy_folder(self.ffxiv_config_source, dest)
-        self._log(f"FFXIV configuration copied to: {dest}", "success")
-    
-    def _install_plugin_configs(self):
-        self._log("Installing XIVLauncher plugin configs...", "progress")
-        
-        if not self.plugin_configs_source.exists():
-            self._log(f"Plugin configs source not found: {self.plugin_configs_source}", "error")
+        summary = "\n".join(f"• {dest.name} (backup from {snapshot.snapshot_id})" for snapshot, dest in available)
+        if not messagebox.askyesno(
+            "Restore Backup",
+            f"Restore the latest backup of:\n\n{summary}\n\nOnly files that differ will be replaced."
+        ):
             return
         
-        self.appdata_path.mkdir(parents=True, exist_ok=True)
-        
-        dest = self.appdata_path / "pluginConfigs"
+        self.install_btn.configure(state="disabled")
+        self.restore_btn.configure(state="disabled", text="Restoring...")
+        self.update_btn.configure(state="disabled")
+        self._clear_log()
+        threading.Thread(target=self._run_restore, args=(available,), daemon=True).start()
+    
+    def _run_restore(self, available):
+        try:
+            with CopyScheduler() as scheduler:
+                for snapshot, dest in available:
+                    self._log(f"Restoring {dest.name} from backup {snapshot.snapshot_id}...", "progress")
+                    result = self.backups.restore(snapshot, dest, scheduler)
+                    self._log(
+                        f"{dest.name}: {result.restored} restored, {result.deleted} removed, "
+                        f"{result.unchanged} unchanged",
+                        "success"
+                    )
+            self.events.call(lambda: messagebox.showinfo("Restore Backup", "Backup restored successfully."))
+        except Exception as e:
+            error = str(e)
+            self._log(f"Restore failed: {error}", "error")
+            self.events.call(lambda: messagebox.showerror("Error", f"Restore failed:\n{error}"))
+        finally:
+            self.events.call(self._reset_buttons)
+    
+    def _start_update(self, package_path: Optional[Path] = None, force: bool = False):
+        if package_path is None:
+            selected = filedialog.askopenfilename(
+                title="Select Update Package",
+                filetypes=[("Xeldar update", f"*{DELTA_SUFFIX}"), ("All files", "*.*")]
+            )
+            if not selected:
+                return
+            package_path = Path(selected)
         
-        if dest.exists():
-            backup_path = self.appdata_path / "pluginConfigs.backup"
-            if backup_path.exists():
-                shutil.rmtree(backup_path)
-            self._log(f"Backing up existing plugin configs to: {backup_path}", "info")
-            shutil.move(str(dest), str(backup_path))
+        game_path_str = self.game_path_entry.get().strip()
+        targets = InstallTargets(Path(game_path_str) if game_path_str else None, self.documents_path, self.appdata_path)
         
-        self._copy_folder(self.plugin_configs_source, dest)
-        self._log(f"Plugin configs copied to: {dest}", "success")
+        self.install_btn.configure(state="disabled")
+        self.restore_btn.configure(state="disabled")
+        self.update_btn.configure(state="disabled", text="Updating...")
+        self._clear_log()
+        threading.Thread(target=self._run_update, args=(package_path, targets, force), daemon=True).start()
     
-    def _copy_folder(self, src: Path, dest: Path):
-        if dest.exists():
-            self._log(f"Removing existing: {dest.name}", "info")
-            shutil.rmtree(dest)
-        
-        self._log(f"Copying: {src.name} → {dest.parent.name}/", "info")
-        shutil.copytree(str(src), str(dest))
+    def _run_update(self, package_path: Path, targets: InstallTargets, force: bool):
+        try:
+            with DeltaPackage(package_path) as package:
+                self._log(f"Applying update {package_path.name}...", "progress")
+                result = package.apply(install_resolver(targets), force=force, log=self._log,
+                                       merge=update_merge(self._log))
+            self._log(
+                f"{len(result.applied)} file(s) updated, {len(result.merged)} merged, "
+                f"{len(result.current)} already current, {len(result.skipped)} not installed",
+                "success"
+            )
+            for rel in result.conflicts:
+                self._log(f"Kept your changed file, update skipped: {rel}", "warning")
+            self.events.call(self._reset_buttons)
+        except DeltaConflict as e:
+            error = str(e)
+            self._log(f"Update stopped: {error}", "warning")
+            self.events.call(lambda: self._confirm_forced_update(package_path, error))
+        except Exception as e:
+            error = str(e)
+            self._log(f"Update failed: {error}", "error")
+            self.events.call(lambda: messagebox.showerror("Error", f"Update failed:\n{error}"))
+            self.events.call(self._reset_buttons)
+    
+    def _confirm_forced_update(self, package_path: Path, error: str):
+        self._reset_buttons()
+        if messagebox.askyesno(
+            "Apply Update",
+            f"{error}\n\nApply the update anyway? Files you changed will be overwritten "
+            "where the update ships the whole file."
+        ):
+            self._start_update(package_path, force=True)
+    
+    def _reset_buttons(self):
+        self.install_btn.configure(state="normal", text="🚀 Install Configurations")
+        self.restore_btn.configure(state="normal", text="Restore Backup")
+        self.update_btn.configure(state="normal", text="Apply Update")
 
 
 def main():
@@ -0,0 +1,147 @@
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import List
+
+from engine.backup import BackupStore
+from engine.components import COMPONENTS, InstallTargets, default_appdata_path, default_documents_path
+from engine.filters import RULES_FILE_NAME, load_rules_file
+from engine.installer import InstallEngine, InstallOptions, bundle_profiles, bundle_sources
+from engine.manifest import state_dir
+from engine.payload import Payload, find_payload
+from engine.profiles import ProfileLibrary, is_supported
+from engine.scheduler import DEFAULT_WORKERS
+from engine.telemetry import Telemetry
+
+LOG_PREFIXES = {"success": "OK ", "error": "ERROR ", "warning": "WARNING "}
+
+
+def build_targets(args) -> List[InstallTargets]:
+    games = args.game or []
+    documents = args.documents or [default_documents_path()]
+    appdata = args.appdata or [default_appdata_path()]
+    count = max(len(games), len(documents), len(appdata), 1)
+    return [
+        InstallTargets(
+            games[i] if i < len(games) else None,
+            documents[i] if i < len(documents) else None,
+            appdata[i] if i < len(appdata) else None,
+        )
+        for i in range(count)
+    ]
+
+
+def print_profiles(library: ProfileLibrary):
+    for profile in library.profiles():
+        note = "" if is_supported(profile) else "  (import in game)"
+        print(f"{profile.key}{note}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Install the bundled configs without the GUI. Repeat --game/--documents/--appdata "
+                    "to install into several targets in one pass over the bundle."
+    )
+    parser.add_argument("--game", type=Path, action="append", help="FFXIV install folder (the one containing 'game')")
+    parser.add_argument("--documents", type=Path, action="append",
+                        help="'My Games' folder for the FFXIV settings (default: the current user's)")
+    parser.add_argument("--appdata", type=Path, action="append",
+                        help="XIVLauncher folder for the plugin configs (default: the current user's)")
+    parser.add_argument("--configs", type=Path, default=Path(__file__).parent.parent / "Configs")
+    parser.add_argument("--payload", type=Path, help="Payload archive or installer exe to install from")
+    parser.add_argument("--component", action="append", choices=sorted(COMPONENTS),
+                        help="Component to install (repeatable, default: all with a destination)")
+    parser.add_argument("--character", action="append",
+                        help="FFXIV_CHR folder or character ID to apply the character settings to "
+                             "(repeatable, default: every character found)")
+    parser.add_argument("--all-shaders", action="store_true", help="Install every bundled shader, not just the used ones")
+    parser.add_argument("--merge-plugins", action="store_true", help="Merge into existing plugin settings")
+    parser.add_argument("--modpacks", action="store_true", help="Also extract .pmp packs into the Penumbra mod folder")
+    parser.add_argument("--profile", action="append",
+                        help="Plugin profile to write into the plugin configs, as PLUGIN/NAME or PLUGIN (repeatable)")
+    parser.add_argument("--all-profiles", action="store_true",
+                        help="Write every bundled profile the installer has a config file for")
+    parser.add_argument("--list-profiles", action="store_true", help="List the bundled plugin profiles and exit")
+    parser.add_argument("--no-backup", action="store_true", help="Do not snapshot settings before changing them")
+    parser.add_argument("--no-defer", action="store_true",
+                        help="Install bulky plugin caches together with the settings instead of afterwards")
+    parser.add_argument("--no-staging", action="store_true",
+                        help="Write files in place instead of staging them and moving them in at the end")
+    parser.add_argument("--rules", type=Path, help="Extra exclude rules file (default: the one in the state folder)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON on stdout")
+    parser.add_argument("--report", action="store_true", help="Save a timing report to the state folder")
+    parser.add_argument("-v", "--verbose", action="store_true", help="List every file that is written or removed")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print warnings and errors")
+    args = parser.parse_args(argv)
+
+    for game in args.game or []:
+        if not game.is_dir():
+            parser.error(f"game folder does not exist: {game}")
+
+    telemetry = Telemetry()
+
+    def log(message: str, tag: str = "info"):
+        telemetry.note(message, tag)
+        if tag == "detail" and not args.verbose:
+            return
+        if args.quiet and tag not in ("warning", "error"):
+            return
+        print(f"{LOG_PREFIXES.get(tag, '')}{message}", file=sys.stderr if args.json else sys.stdout)
+
+    payload = Payload(args.payload) if args.payload else find_payload()
+    sources = bundle_sources(payload, args.configs)
+    library = bundle_profiles(payload, args.configs)
+    if args.list_profiles:
+        print_profiles(library)
+        if payload is not None:
+            payload.close()
+        return 0
+    profiles = list(args.profile or [])
+    if args.all_profiles:
+        profiles += [profile.key for profile in library.profiles() if is_supported(profile)]
+    extra = load_rules_file(args.rules or state_dir() / RULES_FILE_NAME)
+    targets = build_targets(args)
+    options = InstallOptions(
+        args.component or list(COMPONENTS),
+        workers=args.workers,
+        prune_shaders=not args.all_shaders,
+        merge_plugins=args.merge_plugins,
+        extract_modpacks=args.modpacks,
+        backup=not args.no_backup,
+        dry_run=args.dry_run,
+        staged=not args.no_staging,
+        characters=args.character,
+        defer=not args.no_defer,
+        profiles=profiles or None,
+    )
+
+    engine = InstallEngine(sources, log, telemetry=telemetry, backups=BackupStore(), extra_rules=extra,
+                           profiles=library)
+    outcome = "failed"
+    try:
+        report = engine.run(targets, options)
+        if engine.deferred:
+            log("Settings installed, the game can be started now", "success")
+            engine.run_deferred(options, report)
+        outcome = "success"
+    except Exception as e:
+        log(f"Installation failed: {e}", "error")
+        if args.json:
+            print(json.dumps({"ok": False, "error": str(e)}, indent=2))
+        return 1
+    finally:
+        if args.report:
+            log(f"Install report saved to: {telemetry.write(outcome=outcome, targets=len(targets))}", "info")
+        if payload is not None:
+            payload.close()
+
+    if args.json:
+        print(json.dumps({"ok": True, "dry_run": args.dry_run, **report.to_dict()}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+import sys
+import argparse
+import tempfile
+from pathlib import Path
+
+from build_payload import make_exclude
+from engine.delta import DELTA_SUFFIX, build_delta, installer_view
+from engine.filters import load_rules_file
+from engine.payload import PAYLOAD_TREES
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build an offline update package between two Configs trees.")
+    parser.add_argument("--base", type=Path, required=True, help="Configs folder of the released version")
+    parser.add_argument("--target", type=Path, default=Path(__file__).parent.parent / "Configs",
+                        help="Configs folder of the new version")
+    parser.add_argument("--output", type=Path, help=f"Update package to write (default: dist/update{DELTA_SUFFIX})")
+    parser.add_argument("--from-label", default="", help="Version label of the base release")
+    parser.add_argument("--to-label", default="", help="Version label of the new release")
+    parser.add_argument("--rules", type=Path, help="Extra exclude rules file ([component] sections, gitignore syntax)")
+    parser.add_argument("--all-shaders", action="store_true",
+                        help="Diff every bundled shader, not just the ones the presets use")
+    parser.add_argument("--no-compact-db", action="store_true",
+                        help="Diff SQLite databases as they are instead of checkpointing and vacuuming them")
+    args = parser.parse_args(argv)
+
+    for root in (args.base, args.target):
+        for tree in PAYLOAD_TREES:
+            if not (root / tree).is_dir():
+                print(f"ERROR: missing config folder: {root / tree}")
+                return 1
+
+    output = args.output or Path(__file__).parent / "dist" / f"update{DELTA_SUFFIX}"
+    extra = load_rules_file(args.rules) if args.rules else None
+    exclude = make_exclude(extra)
+    with tempfile.TemporaryDirectory(prefix="xeldar-delta-") as work_dir:
+        base, target = (
+            installer_view(root, Path(work_dir) / side, exclude, prune=not args.all_shaders,
+                           compact=not args.no_compact_db)
+            for side, root in (("base", args.base), ("target", args.target))
+        )
+        stats = build_delta(base, target, output, args.from_label, args.to_label)
+    print(f"{stats.added} added, {stats.patched} patched, {stats.replaced} replaced, {stats.removed} removed")
+    print(f"Wrote {output} ({stats.package_bytes / 1048576:.2f} MB for {stats.target_bytes / 1048576:.2f} MB of changed files)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
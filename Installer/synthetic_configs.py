@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import random
+import argparse
+from pathlib import Path
+from dataclasses import dataclass
+from typing import List, Tuple
+
+KIND_TEXT = "text"
+KIND_JSON = "json"
+KIND_BINARY = "binary"
+
+FIXED_MTIME_NS = 1_700_000_000 * 10 ** 9
+CHR_FOLDER = "FFXIV_CHR0040002E00000000"
+PLUGINS = [
+    "AutoDuty", "AutoRetainer", "BossModReborn", "ChatTwo", "DelvUI", "Glamourer", "GatherbuddyReborn",
+    "Lifestream", "LMeter", "PalacePal", "PandorasBox", "QoLBar", "RotationSolver", "SimpleTweaksPlugin",
+    "Splatoon", "TextAdvance", "Umbra", "VanillaPlus", "vnavmesh",
+]
+DAT_NAMES = [
+    "ACQ", "ADDON", "COMMON", "CONTROL0", "CONTROL1", "GEARSET", "GS", "HOTBAR", "ITEMFDR", "ITEMODR",
+    "KEYBIND", "LOGFLTR", "MACRO", "UISAVE",
+]
+
+
+@dataclass(frozen=True)
+class FileGroup:
+    pattern: str
+    count: int
+    min_size: int
+    max_size: int
+    kind: str
+
+
+PROFILE: List[FileGroup] = [
+    FileGroup("ReShade Configs/reshade-shaders/Shaders/Pack{group}/Effect{i}.fx", 500, 2 << 10, 24 << 10, KIND_TEXT),
+    FileGroup("ReShade Configs/reshade-shaders/Shaders/Pack{group}/Common{i}.fxh", 220, 1 << 10, 16 << 10, KIND_TEXT),
+    FileGroup("ReShade Configs/reshade-shaders/Shaders/Depth3D/Overwatch{i}.fxh", 1, 2700 << 10, 2900 << 10, KIND_TEXT),
+    FileGroup("ReShade Configs/reshade-shaders/Textures/Texture{i}.png", 128, 4 << 10, 120 << 10, KIND_BINARY),
+    FileGroup("ReShade Configs/reshade-presets/Preset{i}/Preset{i}.ini", 2, 20 << 10, 40 << 10, KIND_TEXT),
+    FileGroup("Plugin Configs/pluginConfigs/{plugin}.json", 60, 1 << 10, 30 << 10, KIND_JSON),
+    FileGroup("Plugin Configs/pluginConfigs/{plugin}/Data{group}/Entry{i}.json", 780, 512, 6 << 10, KIND_JSON),
+    FileGroup("Plugin Configs/pluginConfigs/{plugin}/Large{i}.json", 3, 1400 << 10, 1900 << 10, KIND_JSON),
+    FileGroup("Plugin Configs/pluginConfigs/{plugin}/Images/Image{i}.gif", 79, 2 << 10, 40 << 10, KIND_BINARY),
+    FileGroup("Plugin Configs/pluginConfigs/{plugin}/Images/Icon{i}.png", 38, 2 << 10, 60 << 10, KIND_BINARY),
+    FileGroup("Plugin Configs/pluginConfigs/{plugin}/Fonts/Font{i}.ttf", 10, 100 << 10, 400 << 10, KIND_BINARY),
+    FileGroup("Plugin Configs/pluginConfigs/vnavmesh/meshcache/Zone{i}.navmesh", 107, 10 << 10, 120 << 10, KIND_BINARY),
+    FileGroup("FFXIV Configs/FINAL FANTASY XIV - A Realm Reborn/FFXIV.cfg", 1, 8 << 10, 12 << 10, KIND_TEXT),
+    FileGroup("FFXIV Configs/FINAL FANTASY XIV - A Realm Reborn/FFXIV_CHARA_0{i}.dat", 4, 4 << 10, 8 << 10, KIND_BINARY),
+    FileGroup("FFXIV Configs/FINAL FANTASY XIV - A Realm Reborn/" + CHR_FOLDER + "/{dat}.DAT", 14, 1 << 10, 60 << 10,
+              KIND_BINARY),
+    FileGroup("Mods Configs/Skills/Pack{i}/Pack{i}.pmp", 13, 300 << 10, 1536 << 10, KIND_BINARY),
+    FileGroup("Mods Configs/Skills/Pack{i}/Instructions.pdf", 13, 50 << 10, 300 << 10, KIND_BINARY),
+    FileGroup("Mods Configs/Skills/Pack{i}/Multihit/Preset{i}.json", 22, 1 << 10, 6 << 10, KIND_JSON),
+]
+
+
+def _text(rng: random.Random, size: int) -> bytes:
+    words = ["float", "float3", "uniform", "sampler", "return", "tex2D", "lerp", "saturate", "#define", "pass"]
+    lines = []
+    total = 0
+    while total < size:
+        line = " ".join(rng.choice(words) + str(rng.randrange(1000)) for _ in range(rng.randint(3, 10)))
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines).encode("ascii")[:size]
+
+
+def _json(rng: random.Random, size: int) -> bytes:
+    document = {}
+    total = 2
+    index = 0
+    while total < size:
+        key = f"Setting{index}"
+        roll = rng.random()
+        if roll < 0.3:
+            value = {f"Option{j}": rng.randrange(100000) for j in range(rng.randint(1, 8))}
+        elif roll < 0.5:
+            value = [{"Name": f"Item{rng.randrange(10 ** 6)}", "X": rng.random(), "Y": rng.random()}
+                     for _ in range(rng.randint(1, 6))]
+        elif roll < 0.7:
+            value = rng.random() < 0.5
+        else:
+            value = f"value-{rng.getrandbits(48):x}"
+        document[key] = value
+        total += len(json.dumps({key: value}, indent=2))
+        index += 1
+    return json.dumps(document, indent=2).encode("utf-8")
+
+
+def _binary(rng: random.Random, size: int) -> bytes:
+    return rng.getrandbits(size * 8).to_bytes(size, "little") if size else b""
+
+
+def _name(names: List[str], i: int) -> str:
+    cycle, index = divmod(i, len(names))
+    return names[index] + (str(cycle) if cycle else "")
+
+
+def _render(pattern: str, i: int) -> str:
+    return pattern.format(i=i, group=i // 40, plugin=_name(PLUGINS, i), dat=_name(DAT_NAMES, i))
+
+
+def generate_configs(root: Path, seed: int = 0, scale: float = 1.0) -> Tuple[int, int]:
+    rng = random.Random(seed)
+    files = total = 0
+    makers = {KIND_TEXT: _text, KIND_JSON: _json, KIND_BINARY: _binary}
+    for group in PROFILE:
+        count = max(1, round(group.count * scale))
+        for i in range(count):
+            path = root / _render(group.pattern, i)
+            size = rng.randint(group.min_size, group.max_size)
+            data = makers[group.kind](rng, size)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            os.utime(path, ns=(FIXED_MTIME_NS, FIXED_MTIME_NS))
+            files += 1
+            total += len(data)
+    (root / "UI Configs").mkdir(parents=True, exist_ok=True)
+    return files, total
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic Configs tree with the real layout and size mix.")
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for the number of files per group")
+    args = parser.parse_args(argv)
+
+    files, total = generate_configs(args.output, args.seed, args.scale)
+    print(f"Generated {files} files ({total / 1048576:.1f} MB) in {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
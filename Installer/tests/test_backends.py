@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from engine import backends
+from engine.backends import BACKENDS, CopyBackend, HardlinkBackend, backend_named, detect_backend, save_preference
+from engine.manifest import hash_file
+
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+
+@pytest.fixture(autouse=True)
+def fresh_detection(monkeypatch):
+    monkeypatch.setattr(backends, "_detected", {})
+
+
+@pytest.mark.parametrize("name", sorted(BACKENDS))
+def test_backends_copy_content_and_mtime(tmp_path, name):
+    backend = BACKENDS[name]
+    src = tmp_path / "src.bin"
+    write(src, os.urandom(300_000))
+    if not backend.probe(src, tmp_path / "probe"):
+        pytest.skip(f"{name} is not supported here")
+    os.utime(src, ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+
+    digest = backend.copy_hashed(src, tmp_path / "out.bin")
+
+    assert (tmp_path / "out.bin").read_bytes() == src.read_bytes()
+    assert (tmp_path / "out.bin").stat().st_mtime_ns == src.stat().st_mtime_ns
+    assert digest == hash_file(src)
+
+
+@pytest.mark.parametrize("backend", [BACKENDS["clone"], BACKENDS["zero-copy"], HardlinkBackend()])
+def test_known_digest_skips_rehashing_the_target(tmp_path, monkeypatch, backend):
+    src = tmp_path / "shader.fx"
+    write(src, b"float4 main() : SV_Target { return 1; }")
+    if not backend.probe(src, tmp_path / "probe"):
+        pytest.skip(f"{backend.name} is not supported here")
+    monkeypatch.setattr(backends, "hash_file", lambda path: pytest.fail(f"re-read {path}"))
+
+    assert backend.copy_hashed(src, tmp_path / "out.fx", "known") == "known"
+    assert (tmp_path / "out.fx").read_bytes() == src.read_bytes()
+
+
+def test_hardlink_only_links_read_only_assets(tmp_path):
+    backend = HardlinkBackend()
+    write(tmp_path / "src/shader.fx", b"shader")
+    write(tmp_path / "src/config.json", b"{}")
+
+    backend.copy(tmp_path / "src/shader.fx", tmp_path / "shader.fx")
+    backend.copy(tmp_path / "src/config.json", tmp_path / "config.json")
+
+    assert os.path.samefile(tmp_path / "src/shader.fx", tmp_path / "shader.fx")
+    assert not os.path.samefile(tmp_path / "src/config.json", tmp_path / "config.json")
+
+
+def test_detection_is_cached_per_volume_pair_and_honours_the_preference(tmp_path):
+    write(tmp_path / "src/a.txt", b"a")
+    save_preference(CopyBackend.name)
+
+    chosen = detect_backend(tmp_path / "src", tmp_path / "dest")
+    assert chosen.name == CopyBackend.name
+    save_preference("zero-copy")
+    assert detect_backend(tmp_path / "src", tmp_path / "not/created/yet") is chosen
+
+
+def test_backend_names_round_trip():
+    assert backend_named("hardlink+copy").fallback.name == "copy"
+    assert backend_named("zero-copy") is BACKENDS["zero-copy"]
+    with pytest.raises(KeyError):
+        backend_named("teleport")
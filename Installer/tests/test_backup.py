@@ -0,0 +1,86 @@
+import threading
+
+from engine.backup import BackupStore
+from engine.manifest import Manifest, ManifestEntry, hash_file
+from engine.filters import filters_for
+from engine.sources import DirectorySource
+from engine.sync import sync_tree
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_restore_keeps_files_the_installer_never_wrote(tmp_path):
+    shipped = tmp_path / "shipped"
+    live = tmp_path / "live"
+    write(shipped / "Plugin.json", '{"a": 2}')
+    write(shipped / "New/added.json", "{}")
+    write(live / "Plugin.json", '{"a": 1}')
+    write(live / "backups/Plugin.json.bak", "old")
+
+    store = BackupStore(tmp_path / "backups")
+    filters = filters_for("plugin-configs")
+
+    def take_backup(plan, manifest):
+        store.snapshot("plugin-configs", live, manifest, ignore=filters.excludes, written=plan.copy)
+
+    sync_tree(DirectorySource(shipped), live, before_write=take_backup, ignore=filters.excludes)
+    write(live / "Screenshots/shot.png", "created by the game after the install")
+
+    snapshot = store.latest("plugin-configs")
+    assert set(snapshot.files) == {"Plugin.json"}
+    assert "New/added.json" in snapshot.written
+
+    result = store.restore(snapshot, live)
+    assert result.restored == 1
+    assert result.deleted == 1
+    assert (live / "Plugin.json").read_text() == '{"a": 1}'
+    assert not (live / "New").exists()
+    assert (live / "Screenshots/shot.png").exists()
+    assert (live / "backups/Plugin.json.bak").exists()
+
+
+def test_snapshot_hashes_merged_files_instead_of_trusting_the_source_digest(tmp_path):
+    live = tmp_path / "live"
+    store = BackupStore(tmp_path / "backups")
+    write(live / "Plugin.json", '{"a": 2}')
+    shipped_digest = hash_file(live / "Plugin.json")
+    store.snapshot("shipped", live)
+
+    write(live / "Plugin.json", '{"a": 1}')
+    st = (live / "Plugin.json").stat()
+    manifest = Manifest(live, tmp_path / "manifest.json")
+    manifest.files["Plugin.json"] = ManifestEntry(st.st_size, shipped_digest, 0, st.st_mtime_ns, st.st_size)
+
+    snapshot = store.snapshot("plugin-configs", live, manifest)
+    assert snapshot.files["Plugin.json"]["digest"] == hash_file(live / "Plugin.json")
+
+    write(live / "Plugin.json", "{}")
+    store.restore(snapshot, live)
+    assert (live / "Plugin.json").read_text() == '{"a": 1}'
+
+
+def test_concurrent_snapshots_keep_each_others_objects(tmp_path):
+    store = BackupStore(tmp_path / "backups", keep=1)
+    roots = []
+    for index in range(4):
+        root = tmp_path / f"live{index}"
+        for number in range(20):
+            write(root / f"file{number}.json", f'{{"root": {index}, "n": {number}}}')
+        roots.append(root)
+    partial = store.objects_dir / "ab" / ("ab" * 32 + ".1.tmp")
+    write(partial, "being copied by another snapshot")
+
+    threads = [threading.Thread(target=store.snapshot, args=(f"component{index}", root))
+               for index, root in enumerate(roots)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert partial.exists()
+    for index, root in enumerate(roots):
+        for rel, entry in store.latest(f"component{index}").files.items():
+            assert store._object_path(entry["digest"]).read_bytes() == (root / rel).read_bytes()
@@ -0,0 +1,49 @@
+from engine.capture import capture_component
+from engine.components import COMPONENTS, InstallTargets
+from engine.filters import filters_for
+
+FFXIV = COMPONENTS["ffxiv-config"]
+TEMPLATE = "FFXIV_CHR0040000000000001"
+LIVE_CHARACTER = "FFXIV_CHR00400000000000AA"
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def capture(targets, configs, tmp_path, **kwargs):
+    return capture_component("ffxiv-config", targets, configs, filters_for("ffxiv-config"),
+                             index_root=tmp_path / "index", **kwargs)
+
+
+def test_capture_exports_changes_into_the_configs_layout(tmp_path):
+    targets = InstallTargets(None, tmp_path / "My Games", None)
+    live = targets.destination(FFXIV)
+    write(live / "FFXIV.cfg", "<Display Settings>\nGamma\t60\n")
+    write(live / "log/client.log", "excluded")
+    write(live / LIVE_CHARACTER / "ADDON.DAT", "my hotbars")
+    configs = tmp_path / "Configs"
+    bundled = configs / FFXIV.payload_prefix
+    write(bundled / TEMPLATE / "ADDON.DAT", "old hotbars")
+    write(bundled / "MACRO.DAT", "no longer in the live install")
+
+    dry = capture(targets, configs, tmp_path, dry_run=True)
+    assert [(result.added, result.updated) for result in dry] == [(["FFXIV.cfg"], []), ([], ["ADDON.DAT"])]
+    assert not (bundled / "FFXIV.cfg").exists()
+
+    first = capture(targets, configs, tmp_path)
+    assert first[0].missing == ["MACRO.DAT"] and (bundled / "MACRO.DAT").exists()
+    assert (bundled / "FFXIV.cfg").read_text(encoding="utf-8") == "<Display Settings>\nGamma\t60\n"
+    assert (bundled / TEMPLATE / "ADDON.DAT").read_text(encoding="utf-8") == "my hotbars"
+    assert not (bundled / "log").exists() and not (bundled / LIVE_CHARACTER).exists()
+
+    second = capture(targets, configs, tmp_path)
+    assert not any(result.changed for result in second)
+    assert [result.unchanged for result in second] == [1, 1]
+
+    write(live / "FFXIV.cfg", "<Display Settings>\nGamma\t55\n")
+    third = capture(targets, configs, tmp_path, prune=True)
+    assert third[0].updated == ["FFXIV.cfg"] and third[0].removed == ["MACRO.DAT"]
+    assert third[0].groups() == {"(top level)": {"updated": 1, "removed": 1}}
+    assert not (bundled / "MACRO.DAT").exists()
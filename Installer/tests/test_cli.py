@@ -0,0 +1,56 @@
+import json
+
+import install_cli
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def make_target(root):
+    (root / "FFXIV/game").mkdir(parents=True)
+    return ["--game", str(root / "FFXIV"), "--documents", str(root / "My Games"), "--appdata", str(root / "XIVLauncher")]
+
+
+def run(args, capsys):
+    capsys.readouterr()
+    code = install_cli.main(args)
+    return code, json.loads(capsys.readouterr().out)
+
+
+def test_fan_out_to_several_targets_and_dry_run(tmp_path, monkeypatch, capsys):
+    monkeypatch.delenv("XELDAR_PAYLOAD", raising=False)
+    configs = tmp_path / "Configs"
+    write(configs / "Mods Configs/Skills/Ninja/vfx.avfx", "vfx")
+    write(configs / "Plugin Configs/pluginConfigs/Plugin.json", '{"a": 1}')
+    first, second = tmp_path / "pc1", tmp_path / "pc2"
+    args = ["--configs", str(configs), "--component", "skills", "--component", "plugin-configs",
+            "--no-backup", "--json", *make_target(first), *make_target(second)]
+
+    code, dry = run(args + ["--dry-run"], capsys)
+    assert code == 0 and dry["dry_run"]
+    copied = {result["dest"]: result["copied"] for result in dry["components"] if not result["deferred"]}
+    assert copied == {
+        str(root / dest): 1 for root in (first, second) for dest in ("FFXIV/Skills", "XIVLauncher/pluginConfigs")
+    }
+    assert not (first / "FFXIV/Skills").exists() and not (second / "XIVLauncher").exists()
+
+    code, installed = run(args, capsys)
+    assert code == 0 and not installed["dry_run"]
+    for root in (first, second):
+        assert (root / "FFXIV/Skills/Ninja/vfx.avfx").read_text(encoding="utf-8") == "vfx"
+        assert (root / "XIVLauncher/pluginConfigs/Plugin.json").read_text(encoding="utf-8") == '{"a": 1}'
+
+    code, again = run(args, capsys)
+    assert code == 0 and all(result["copied"] == 0 for result in again["components"])
+
+
+def test_missing_game_folder_is_a_usage_error(tmp_path, capsys):
+    try:
+        install_cli.main(["--game", str(tmp_path / "nowhere")])
+    except SystemExit as e:
+        assert e.code == 2
+    else:
+        raise AssertionError("expected a usage error")
+    assert "game folder does not exist" in capsys.readouterr().err
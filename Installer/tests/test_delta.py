@@ -0,0 +1,106 @@
+import pytest
+
+from engine.components import COMPONENTS, InstallTargets
+from engine.delta import (OP_REPLACE, DeltaConflict, DeltaPackage, build_delta, install_resolver, installer_view,
+                          update_merge)
+from engine.manifest import Manifest
+
+FFXIV = COMPONENTS["ffxiv-config"]
+PLUGINS = COMPONENTS["plugin-configs"]
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def make_configs(root, cfg, plugin):
+    write(root / FFXIV.payload_prefix / "FFXIV.cfg", cfg)
+    write(root / PLUGINS.payload_prefix / "Plugin.json", plugin)
+    write(root / PLUGINS.payload_prefix / "Plugin.log", "ignored by the installer filters")
+
+
+@pytest.fixture
+def package(tmp_path):
+    base, target = tmp_path / "base", tmp_path / "target"
+    make_configs(base, "<Display Settings>\nScreenWidth\t1920\nGamma\t50\n", '{"a": 1, "b": 1}')
+    make_configs(target, "<Display Settings>\nScreenWidth\t1920\nGamma\t60\n", '{"a": 2, "b": 1}')
+    write(target / PLUGINS.payload_prefix / "New.json", '{"new": true}')
+    exclude = lambda arcname: arcname.endswith(".log")
+    out = tmp_path / "update.xdu"
+    build_delta(installer_view(base, tmp_path / "work-base", exclude),
+                installer_view(target, tmp_path / "work-target", exclude), out, "1", "2")
+    return out
+
+
+def make_install(tmp_path):
+    targets = InstallTargets(None, tmp_path / "My Games", tmp_path / "XIVLauncher")
+    return targets, targets.destination(FFXIV), targets.destination(PLUGINS)
+
+
+def test_delta_is_built_from_the_installer_view(package):
+    with DeltaPackage(package) as delta:
+        paths = {op["path"]: op["op"] for op in delta.ops}
+    assert paths == {
+        f"{FFXIV.payload_prefix}/FFXIV.cfg": OP_REPLACE,
+        f"{PLUGINS.payload_prefix}/Plugin.json": OP_REPLACE,
+        f"{PLUGINS.payload_prefix}/New.json": "add",
+    }
+
+
+def test_changed_merge_targets_are_merged_instead_of_conflicting(tmp_path, package):
+    targets, ffxiv, plugins = make_install(tmp_path)
+    write(ffxiv / "FFXIV.cfg", "<Display Settings>\nScreenWidth\t2560\nGamma\t50\n")
+    write(plugins / "Plugin.json", '{"a": 1, "b": 1, "mine": 3}')
+
+    with DeltaPackage(package) as delta:
+        with pytest.raises(DeltaConflict) as conflict:
+            delta.apply(install_resolver(targets))
+        assert sorted(conflict.value.conflicts) == [f"{FFXIV.payload_prefix}/FFXIV.cfg",
+                                                    f"{PLUGINS.payload_prefix}/Plugin.json"]
+        result = delta.apply(install_resolver(targets), merge=update_merge())
+
+    assert result.conflicts == []
+    assert sorted(result.merged) == [f"{FFXIV.payload_prefix}/FFXIV.cfg", f"{PLUGINS.payload_prefix}/Plugin.json"]
+    assert (ffxiv / "FFXIV.cfg").read_text() == "<Display Settings>\nScreenWidth\t2560\nGamma\t60\n"
+    assert (plugins / "Plugin.json").read_text() == '{"a": 2, "b": 1, "mine": 3}'
+    assert (plugins / "New.json").read_text() == '{"new": true}'
+    assert Manifest.for_destination(plugins).files["Plugin.json"].dest_digest
+
+
+def test_replace_with_missing_target_is_added(tmp_path, package):
+    targets, ffxiv, plugins = make_install(tmp_path)
+    ffxiv.mkdir(parents=True)
+    plugins.mkdir(parents=True)
+
+    with DeltaPackage(package) as delta:
+        result = delta.apply(install_resolver(targets), merge=update_merge())
+
+    assert result.conflicts == []
+    assert len(result.applied) == 3
+    assert (ffxiv / "FFXIV.cfg").read_text().endswith("Gamma\t60\n")
+
+
+def test_character_files_fan_out_to_every_character(tmp_path):
+    base, target = tmp_path / "base", tmp_path / "target"
+    template = "FFXIV_CHR0040000000000001"
+    write(base / FFXIV.payload_prefix / template / "ADDON.DAT", "old")
+    write(target / FFXIV.payload_prefix / template / "ADDON.DAT", "new")
+    out = tmp_path / "update.xdu"
+    build_delta(installer_view(base, tmp_path / "work-base"), installer_view(target, tmp_path / "work-target"), out)
+
+    targets, ffxiv, _ = make_install(tmp_path)
+    characters = ["FFXIV_CHR00400000000000AA", "FFXIV_CHR00400000000000BB"]
+    for name in characters:
+        write(ffxiv / name / "ADDON.DAT", "old")
+
+    with DeltaPackage(out) as delta:
+        result = delta.apply(install_resolver(targets))
+        assert result.skipped == []
+        assert len(result.applied) == 2
+        for name in characters:
+            assert (ffxiv / name / "ADDON.DAT").read_text() == "new"
+            assert "ADDON.DAT" in Manifest.for_destination(ffxiv / name).files
+
+        only = install_resolver(targets, characters=["00400000000000BB"])
+        assert only(f"{FFXIV.payload_prefix}/{template}/ADDON.DAT") == [(ffxiv / characters[1], "ADDON.DAT")]
@@ -0,0 +1,83 @@
+import time
+from pathlib import Path
+
+from engine.detect import (
+    COMMON_PATHS, GAME_REGISTRY_PROBES, HKCU, STEAM_GAME_DIR, FakePlatform, GameDetector, parse_library_folders,
+)
+
+LIBRARY_VDF = r'''
+"libraryfolders"
+{
+    "0"
+    {
+        "path"      "C:\\Program Files (x86)\\Steam"
+        "apps" { "228980" "0" }
+    }
+    "1"
+    {
+        "path"      "D:\\SteamLibrary"
+        "apps" { "39210" "0" }
+    }
+}
+'''
+
+
+def detector(tmp_path: Path, platform: FakePlatform, timeout: float = 1.0) -> GameDetector:
+    return GameDetector(platform, cache_path=tmp_path / "detect.json", probe_timeout=timeout)
+
+
+def test_registry_install_location(tmp_path):
+    hive, key, value = GAME_REGISTRY_PROBES[0]
+    platform = FakePlatform(
+        registry={(hive, key, value): r"F:\FFXIV"},
+        files={r"F:\FFXIV\game\ffxiv_dx11.exe": ""},
+    )
+    found = detector(tmp_path, platform).detect()
+    assert found == Path(r"F:\FFXIV")
+    assert detector(tmp_path, FakePlatform()).load_cached() == found
+
+
+def test_steam_library_from_vdf(tmp_path):
+    game = rf"D:\SteamLibrary\steamapps\common\{STEAM_GAME_DIR}"
+    platform = FakePlatform(
+        registry={(HKCU, r"Software\Valve\Steam", "SteamPath"): r"C:\Steam"},
+        files={
+            r"C:\Steam\steamapps\libraryfolders.vdf": LIBRARY_VDF,
+            rf"{game}\game\ffxiv_dx11.exe": "",
+        },
+    )
+    found = detector(tmp_path, platform).detect()
+    assert found is not None
+    assert str(found).replace("/", "\\").lower() == game.lower()
+
+
+def test_parse_library_folders():
+    assert parse_library_folders(LIBRARY_VDF) == [r"C:\Program Files (x86)\Steam", r"D:\SteamLibrary"]
+
+
+def test_hung_drives_share_one_deadline(tmp_path):
+    slow = COMMON_PATHS[:4]
+    fast = COMMON_PATHS[4]
+    platform = FakePlatform(
+        files={rf"{fast}\game\ffxiv_dx11.exe": ""},
+        delays={path: 5.0 for path in slow},
+    )
+    timeout = 0.3
+    probe = detector(tmp_path, platform, timeout)
+    start = time.monotonic()
+    assert probe.detect() == Path(fast)
+    assert time.monotonic() - start < timeout * 2
+    assert probe.slow_probes == slow
+
+    assert probe.detect() == Path(fast)
+    assert probe.slow_probes == []
+
+
+def test_slow_steam_library_is_reported(tmp_path):
+    platform = FakePlatform(
+        registry={(HKCU, r"Software\Valve\Steam", "SteamPath"): r"X:\Steam"},
+        delays={r"X:\Steam": 5.0},
+    )
+    probe = detector(tmp_path, platform, 0.2)
+    assert probe.detect() is None
+    assert any(path.lower().endswith("libraryfolders.vdf") for path in probe.slow_probes)
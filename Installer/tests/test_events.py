@@ -0,0 +1,43 @@
+import threading
+
+from engine.events import CallEvent, EventBus, LogEvent, ProgressEvent, ProgressTracker
+
+
+def test_drain_returns_events_in_order_up_to_the_limit():
+    bus = EventBus()
+    for index in range(5):
+        bus.log(f"line {index}", "detail")
+    bus.call(print)
+
+    first = bus.drain(limit=4)
+    rest = bus.drain()
+
+    assert [event.message for event in first] == ["line 0", "line 1", "line 2", "line 3"]
+    assert rest[0] == LogEvent("line 4", "detail")
+    assert isinstance(rest[1], CallEvent)
+    assert bus.drain() == []
+
+
+def test_progress_from_many_threads_adds_up_and_is_byte_weighted():
+    bus = EventBus()
+    tracker = ProgressTracker(bus, files_total=800, bytes_total=800 * 100)
+    tracker.set_phase("Copying")
+
+    def worker():
+        for _ in range(100):
+            tracker.advance(1, 100, "file")
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    events = bus.drain(limit=10_000)
+    assert len(events) == 801
+    assert all(isinstance(event, ProgressEvent) and event.phase == "Copying" for event in events)
+    assert sorted(event.files_done for event in events[1:]) == list(range(1, 801))
+    last = max(events, key=lambda event: event.files_done)
+    assert (last.bytes_done, last.fraction) == (80_000, 1.0)
+    assert ProgressEvent("Copying", 1, 2, 10, 100).fraction == 0.1
+    assert ProgressEvent("Copying", 1, 4, 0, 0).fraction == 0.25
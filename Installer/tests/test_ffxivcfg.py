@@ -0,0 +1,20 @@
+from engine.ffxivcfg import merge_cfg, parse_cfg
+
+SHIPPED = ("<FINAL FANTASY XIV Config File>\n\n<Version>\nGuidVersion\tshipped\nLanguage\t1\n\n"
+           "<Display Settings>\nScreenWidth\t1920\nGamma\t60\n\n"
+           "<Network Settings>\nUPnP\t0\nPort\t0\nLastLogin0\t111\nLastLogin1\t222\nWorldId\t40\n")
+MINE = ("<FINAL FANTASY XIV Config File>\n\n<Version>\nGuidVersion\tmine\nLanguage\t2\n\n"
+        "<Display Settings>\nScreenWidth\t2560\nGamma\t50\n\n"
+        "<Network Settings>\nUPnP\t1\nPort\t55006\nLastLogin0\t333\nWorldId\t73\n")
+
+
+def test_machine_keys_and_sections_are_kept():
+    merged = parse_cfg(merge_cfg(MINE, SHIPPED))
+    assert merged["Display Settings"] == {"ScreenWidth": "2560", "Gamma": "60"}
+    assert merged["Version"] == {"GuidVersion": "mine", "Language": "2"}
+    assert merged["Network Settings"] == {"UPnP": "1", "Port": "55006", "LastLogin0": "333", "WorldId": "73"}
+
+
+def test_missing_network_section_is_not_copied_from_the_shipped_file():
+    mine = "<FINAL FANTASY XIV Config File>\n\n<Display Settings>\nScreenWidth\t2560\nGamma\t60\n"
+    assert merge_cfg(mine, SHIPPED) is None
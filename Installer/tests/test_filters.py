@@ -0,0 +1,34 @@
+from engine.filters import FilterSet, deferred_for, filters_for, load_rules_file
+
+
+def test_default_rules():
+    plugins = filters_for("plugin-configs")
+    assert plugins.excludes("Plugin/data.db-wal")
+    assert plugins.excludes("backups/Plugin.json")
+    assert plugins.excludes("Plugin/cache.TMP")
+    assert not plugins.excludes("Plugin/data.db")
+
+    ffxiv = filters_for("ffxiv-config")
+    assert ffxiv.excludes("log/today.log")
+    assert ffxiv.excludes("FFXIV_CHR0040000000000001/log/chat.log")
+    assert not ffxiv.excludes("FFXIV_CHR0040000000000001/ADDON.DAT")
+
+
+def test_anchored_directory_and_negated_rules():
+    rules = FilterSet(["/cache/", "*.json", "!keep.json"])
+    assert rules.excludes("cache/a.bin")
+    assert not rules.excludes("sub/cache/a.bin")
+    assert rules.excludes("sub/other.json")
+    assert not rules.excludes("sub/keep.json")
+
+
+def test_rules_file_sections(tmp_path):
+    path = tmp_path / "filters.txt"
+    path.write_text("# comment\n*.psd\n[plugin-configs]\nBig/\n[plugin-configs:deferred]\nIcons/\n", encoding="utf-8")
+    extra = load_rules_file(path)
+
+    assert filters_for("skills", extra).excludes("art.psd")
+    assert filters_for("plugin-configs", extra).excludes("Big/file.bin")
+    assert not filters_for("skills", extra).excludes("Big/file.bin")
+    assert deferred_for("plugin-configs", extra).excludes("Icons/1.png")
+    assert deferred_for("plugin-configs").excludes("vnavmesh/meshcache/zone.bin")
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from engine.jsonmerge import JsonMerger, MergePolicy, merge_documents
+from engine.sources import DirectorySource
+from engine.sync import MERGE_UNCHANGED, MERGE_UPDATED
+
+
+def test_nested_change_only_rewrites_the_changed_member():
+    existing = '{\n    "Window": {\n        "X": 10,\n        "Y":   20\n    },\n    "Other": [1,2]\n}'
+    shipped = json.dumps({"Window": {"X": 10, "Y": 30, "Z": 1}, "Other": [1, 2]})
+
+    merged = merge_documents(existing, shipped, MergePolicy())
+
+    assert merged == ('{\n    "Window": {\n        "X": 10,\n        "Y":   30,\n        "Z": 1\n    },\n'
+                      '    "Other": [1,2]\n}')
+    assert json.loads(merged) == {"Window": {"X": 10, "Y": 30, "Z": 1}, "Other": [1, 2]}
+
+
+def test_unchanged_document_is_left_alone():
+    existing = '{"a": {"b": 1}}'
+    assert merge_documents(existing, '{"a":{"b":1}}', MergePolicy()) is None
+
+
+@pytest.mark.parametrize("existing, shipped", [
+    ('{"a": 2,', '{"a": 1}'),
+    ('{"a": tru}', '{"a": 1}'),
+    ('{"a": 2} trailing', '{"a": 1}'),
+    ('{"a": 2}', '{"a": 1,'),
+])
+def test_unparsable_documents_keep_the_user_file(tmp_path, existing, shipped):
+    (tmp_path / "shipped").mkdir()
+    (tmp_path / "shipped/Plugin.json").write_text(shipped, encoding="utf-8")
+    target = tmp_path / "Plugin.json"
+    target.write_text(existing, encoding="utf-8")
+    messages = []
+
+    result = JsonMerger(log=lambda msg, tag: messages.append((msg, tag)))(
+        DirectorySource(tmp_path / "shipped"), "Plugin.json", target)
+
+    assert result == MERGE_UNCHANGED
+    assert target.read_text(encoding="utf-8") == existing
+    assert messages and messages[0][1] == "warning"
+
+
+def test_merge_keeps_bom(tmp_path):
+    shipped = tmp_path / "shipped"
+    shipped.mkdir()
+    (shipped / "Plugin.json").write_text('{"a": 1, "b": 2}', encoding="utf-8")
+    target = tmp_path / "Plugin.json"
+    target.write_bytes(b'\xef\xbb\xbf{"a": 1}')
+
+    assert JsonMerger()(DirectorySource(shipped), "Plugin.json", target) == MERGE_UPDATED
+    raw = target.read_bytes()
+    assert raw.startswith(b"\xef\xbb\xbf")
+    assert json.loads(raw.decode("utf-8-sig")) == {"a": 1, "b": 2}
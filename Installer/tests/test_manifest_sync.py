@@ -0,0 +1,31 @@
+from engine.manifest import Manifest
+from engine.sources import DirectorySource
+from engine.sync import plan_sync, sync_tree
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_manifest_tracks_copies_and_prunes_removed_files(tmp_path):
+    src, dest = tmp_path / "src", tmp_path / "dest"
+    write(src / "a.txt", "a")
+    write(src / "sub/b.txt", "b")
+    write(dest / "stale/old.txt", "no longer shipped")
+    write(dest / "keep.log", "ignored")
+
+    first = sync_tree(DirectorySource(src), dest, ignore=lambda rel: rel.endswith(".log"))
+    assert (first.copied, first.deleted) == (2, 1)
+    assert not (dest / "stale").exists()
+    assert (dest / "keep.log").exists()
+    assert set(Manifest.for_destination(dest).files) == {"a.txt", "sub/b.txt"}
+
+    second = sync_tree(DirectorySource(src), dest, ignore=lambda rel: rel.endswith(".log"))
+    assert (second.copied, second.deleted, second.unchanged) == (0, 0, 2)
+
+    write(dest / "a.txt", "edited by the user")
+    (src / "sub/b.txt").unlink()
+    plan = plan_sync(DirectorySource(src), dest, Manifest.for_destination(dest), lambda rel: rel.endswith(".log"))
+    assert plan.copy == ["a.txt"]
+    assert plan.delete == ["sub/b.txt"]
@@ -0,0 +1,43 @@
+import json
+
+from engine.manifest import Manifest
+from engine.modpacks import PENUMBRA_CONFIG, penumbra_mod_directory, rebase_mod_directory
+from engine.sources import DirectorySource
+from engine.sync import plan_sync, sync_tree
+
+SHIPPED = '\ufeff{\n  "Version": 3,\n  "ModDirectory": "C:\\\\Users\\\\xelda\\\\Documents\\\\FFXIV Mods",\n  "Enabled": true\n}'
+
+
+def test_missing_mod_directory_is_rebased_onto_this_pc(tmp_path):
+    config = tmp_path / PENUMBRA_CONFIG
+    config.write_text(SHIPPED, encoding="utf-8")
+    documents = tmp_path / "Documents"
+    documents.mkdir()
+
+    assert rebase_mod_directory(config, documents) == documents / "FFXIV Mods"
+    raw = config.read_bytes()
+    assert raw.startswith(b"\xef\xbb\xbf")
+    settings = json.loads(raw.decode("utf-8-sig"))
+    assert settings == {"Version": 3, "ModDirectory": str(documents / "FFXIV Mods"), "Enabled": True}
+    assert penumbra_mod_directory(config) == documents / "FFXIV Mods"
+    assert rebase_mod_directory(config, documents) is None
+
+
+def test_rebased_config_stays_in_sync(tmp_path):
+    shipped = tmp_path / "shipped"
+    shipped.mkdir()
+    (shipped / PENUMBRA_CONFIG).write_text(SHIPPED, encoding="utf-8")
+    live = tmp_path / "pluginConfigs"
+    documents = tmp_path / "Documents"
+    documents.mkdir()
+
+    sync_tree(DirectorySource(shipped), live)
+    config = live / PENUMBRA_CONFIG
+    assert rebase_mod_directory(config, documents) is not None
+    manifest = Manifest.for_destination(live)
+    assert manifest.record_dest(PENUMBRA_CONFIG, config)
+    manifest.save()
+
+    plan = plan_sync(DirectorySource(shipped), live, Manifest.for_destination(live))
+    assert plan.copy == []
+    assert plan.unchanged == [PENUMBRA_CONFIG]
@@ -0,0 +1,107 @@
+import json
+import zipfile
+
+from engine.payload import BLOB_PREFIX, INDEX_NAME, PAYLOAD_VERSION, Payload, build_payload, dedup_report
+from engine.sync import sync_tree
+from engine.telemetry import Telemetry
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_payload_stores_duplicate_files_once(tmp_path):
+    configs = tmp_path / "Configs"
+    write(configs / "Mods Configs/Skills/a/skill.avfx", "shared")
+    write(configs / "Mods Configs/Skills/b/skill.avfx", "shared")
+    out = tmp_path / "payload.zip"
+
+    entries = build_payload(configs, out, trees=("Mods Configs",))
+
+    with zipfile.ZipFile(out) as archive:
+        blobs = [name for name in archive.namelist() if name.startswith(BLOB_PREFIX)]
+        index = json.loads(archive.read(INDEX_NAME))
+    assert len(blobs) == 1
+    assert index["version"] == PAYLOAD_VERSION
+    assert entries["Mods Configs/Skills/a/skill.avfx"]["blob"] == entries["Mods Configs/Skills/b/skill.avfx"]["blob"]
+
+    payload = Payload(out)
+    source = payload.tree("Mods Configs/Skills")
+    for rel in ("a/skill.avfx", "b/skill.avfx"):
+        with source.open(rel) as handle:
+            assert handle.read() == b"shared"
+    payload.close()
+
+
+def test_dedup_report_counts_savings_per_component(tmp_path):
+    configs = tmp_path / "Configs"
+    for job in ("Ninja", "Samurai", "Reaper"):
+        write(configs / f"Mods Configs/Skills/{job}/vfx.avfx", "same effect")
+    write(configs / "Plugin Configs/pluginConfigs/A/icons.json", "{}")
+    write(configs / "Plugin Configs/pluginConfigs/B/icons.json", "{}")
+    write(configs / "Plugin Configs/pluginConfigs/C/unique.json", '{"c": 1}')
+
+    entries = build_payload(configs, tmp_path / "payload.zip", trees=("Mods Configs", "Plugin Configs"))
+
+    assert dedup_report(entries) == {"skills": (2, 2 * len("same effect")), "plugin-configs": (1, 2)}
+
+
+def test_duplicates_are_read_from_the_payload_once(tmp_path):
+    configs = tmp_path / "Configs"
+    for job in ("Ninja", "Samurai", "Reaper"):
+        write(configs / f"Mods Configs/Skills/{job}/vfx.avfx", "same effect")
+    write(configs / "Mods Configs/Skills/Ninja/unique.avfx", "unique")
+    build_payload(configs, tmp_path / "payload.zip", trees=("Mods Configs",))
+    payload = Payload(tmp_path / "payload.zip")
+    opened = []
+    open_blob = payload.open
+    payload.open = lambda arcname: opened.append(arcname) or open_blob(arcname)
+    telemetry = Telemetry()
+
+    result = sync_tree(payload.tree("Mods Configs/Skills"), tmp_path / "Skills", telemetry=telemetry)
+    payload.close()
+
+    assert result.copied == 4
+    assert result.deduplicated == 2
+    assert len(opened) == 2
+    assert telemetry.counters["files.deduplicated"] == 2
+    for job in ("Ninja", "Samurai", "Reaper"):
+        assert (tmp_path / f"Skills/{job}/vfx.avfx").read_text(encoding="utf-8") == "same effect"
+
+
+def test_version_one_payloads_still_load(tmp_path):
+    out = tmp_path / "payload.zip"
+    with zipfile.ZipFile(out, "w") as archive:
+        archive.writestr("Mods Configs/Skills/skill.avfx", b"v1")
+        archive.writestr(INDEX_NAME, json.dumps({"version": 1, "entries": {
+            "Mods Configs/Skills/skill.avfx": {"size": 2, "mtime_ns": 0, "digest": "x"},
+        }}))
+
+    payload = Payload(out)
+    with payload.tree("Mods Configs/Skills").open("skill.avfx") as handle:
+        assert handle.read() == b"v1"
+    payload.close()
+
+
+def test_payload_tree_scans_and_copies_with_original_mtimes(tmp_path):
+    configs = tmp_path / "Configs"
+    write(configs / "Mods Configs/Skills/Ninja/vfx.avfx", "ninja")
+    write(configs / "Mods Configs/Skills/notes.tmp", "excluded")
+    write(configs / "Plugin Configs/pluginConfigs/Plugin.json", "{}")
+    out = tmp_path / "payload.zip"
+
+    entries = build_payload(configs, out, trees=("Mods Configs", "Plugin Configs"),
+                            exclude=lambda arcname: arcname.endswith(".tmp"))
+
+    assert set(entries) == {"Mods Configs/Skills/Ninja/vfx.avfx", "Plugin Configs/pluginConfigs/Plugin.json"}
+    payload = Payload(out)
+    source = payload.tree("Mods Configs/Skills")
+    files, dirs = source.scan()
+    assert set(files) == {"Ninja/vfx.avfx"} and dirs == {"Ninja"}
+    assert source.exists() and not payload.tree("ReShade Configs").exists()
+    target = tmp_path / "copy.avfx"
+    assert source.copy_to("Ninja/vfx.avfx", target) == files["Ninja/vfx.avfx"].digest
+    assert target.read_text(encoding="utf-8") == "ninja"
+    assert target.stat().st_mtime_ns == (configs / "Mods Configs/Skills/Ninja/vfx.avfx").stat().st_mtime_ns
+    payload.close()
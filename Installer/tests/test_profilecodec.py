@@ -0,0 +1,41 @@
+import io
+import json
+
+import pytest
+
+from engine.profilecodec import (DELVUI_PREFIX, FORMAT_BASE64, FORMAT_GZIP, FORMATS, ProfileError,
+                                 decode_documents, decode_to, encode, encode_documents, parse)
+
+DOCUMENTS = [{"Name": "Main", "Bars": [1, 2, 3], "Note": "é"}, {"Name": "Second"}]
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+@pytest.mark.parametrize("prefix", ["", DELVUI_PREFIX])
+def test_documents_round_trip_through_every_format(fmt, prefix):
+    code = encode_documents(DOCUMENTS, fmt, prefix)
+
+    parsed = parse(f"Paste this into the plugin:\n{code}\n")
+
+    assert (parsed.format, parsed.prefix, len(parsed.segments)) == (fmt, prefix, 2)
+    assert parsed.instructions == "Paste this into the plugin:"
+    assert decode_documents(code) == DOCUMENTS
+    assert encode_documents(decode_documents(code), fmt, parsed.prefix, parsed.separators) == code
+
+
+def test_streaming_decode_handles_chunks_and_a_bom():
+    data = b"\xef\xbb\xbf" + json.dumps({"big": "x" * 300_000}).encode("utf-8")
+    out = io.BytesIO()
+
+    assert decode_to(encode(data, FORMAT_GZIP), out, FORMAT_GZIP) == len(data) - 3
+    assert json.loads(out.getvalue()) == {"big": "x" * 300_000}
+
+
+@pytest.mark.parametrize("code, fmt", [
+    ("", None),
+    (encode(b'{"a": 1}')[:-3], None),
+    ("not base64 at all!", None),
+    (encode(b"not json", FORMAT_BASE64), FORMAT_BASE64),
+])
+def test_broken_codes_raise_profile_errors(code, fmt):
+    with pytest.raises(ProfileError):
+        decode_documents(code, fmt)
@@ -0,0 +1,54 @@
+import json
+
+from engine.backup import BackupStore
+from engine.components import COMPONENTS, InstallTargets
+from engine.installer import InstallEngine, InstallOptions, bundle_profiles, bundle_sources
+from engine.profilecodec import encode_documents
+from engine.profiles import PROFILES_PREFIX
+from engine.verify import verify_tree
+
+PLUGINS = COMPONENTS["plugin-configs"]
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def make_bundle(configs):
+    plugins = configs / PLUGINS.payload_prefix
+    write(plugins / "LMeter" / "LMeter.json", json.dumps({"MeterList": {"Meters": [{"Name": "Old"}]}}))
+    write(plugins / "Other.json", '{"keep": true}')
+    profiles = configs / PROFILES_PREFIX
+    write(profiles / "LMeter Profiles" / "Parse.txt", encode_documents([{"Name": "Parse", "Rows": 8}]))
+    write(profiles / "Umbra Profiles" / "Umbra Profile.txt",
+          encode_documents([{"Toolbar.Enabled": True, "ColorProfileName": "Dark"}]))
+
+
+def install(configs, targets, backups):
+    engine = InstallEngine(bundle_sources(None, configs), backups=backups, profiles=bundle_profiles(None, configs))
+    options = InstallOptions(components=["plugin-configs"], profiles=["LMeter", "Umbra"], workers=2)
+    return engine.run([targets], options)
+
+
+def test_profiles_do_not_destabilise_the_install(tmp_path):
+    configs = tmp_path / "Configs"
+    make_bundle(configs)
+    targets = InstallTargets(None, tmp_path / "My Games", tmp_path / "XIVLauncher")
+    dest = targets.destination(PLUGINS)
+    backups = BackupStore(tmp_path / "backups")
+
+    first = install(configs, targets, backups)
+    assert sorted(first.profiles[0]["applied"]) == ["LMeter/Parse", "Umbra/Umbra Profile"]
+    meters = json.loads((dest / "LMeter" / "LMeter.json").read_text(encoding="utf-8"))["MeterList"]["Meters"]
+    assert [meter["Name"] for meter in meters] == ["Old", "Parse"]
+
+    second = install(configs, targets, backups)
+    assert [(result.copied, result.deleted) for result in second.components] == [(0, 0)]
+    assert second.profiles[0]["applied"] == []
+    assert (dest / "Umbra" / "Umbra Profile.profile.json").exists()
+    assert backups.snapshots(PLUGINS.name) == []
+
+    report = verify_tree(bundle_sources(None, configs)[PLUGINS.name], dest, PLUGINS.name)
+    assert report.clean
+    assert report.extra == []
@@ -0,0 +1,36 @@
+from engine.reshade import parse_preset_effects, prune_shaders
+from engine.sources import DirectorySource
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_parse_preset_effects_keeps_order_and_drops_duplicates():
+    text = "Techniques=Bloom@Bloom.fx,SMAA@SMAA.fx\n[Bloom.fx]\nTechniques = Tonemap@Tonemap.fx, Bloom@Bloom.fx\n"
+    assert parse_preset_effects(text) == ["Bloom.fx", "SMAA.fx", "Tonemap.fx"]
+
+
+def test_prune_follows_includes_and_textures(tmp_path):
+    shaders = tmp_path / "shaders"
+    write(shaders / "Shaders/Bloom.fx", '#include "ReShade.fxh"\n#include "Common/Blur.fxh"\n')
+    write(shaders / "Shaders/ReShade.fxh", "uniform float Timer;\n")
+    write(shaders / "Shaders/Common/Blur.fxh", '#include "../ReShade.fxh"\ntexture Dirt < source = "Dirt.png"; >;\n')
+    write(shaders / "Shaders/Unused.fx", "unused")
+    write(shaders / "Shaders/Extra/MXAO.fx", '#include "Missing.fxh"\n')
+    write(shaders / "Textures/Dirt.png", "png")
+    write(shaders / "Textures/LUT.png", "png")
+    write(shaders / "Textures/Unused.png", "png")
+    presets = tmp_path / "presets"
+    write(presets / "Gshade.ini", 'Techniques=Bloom@Bloom.fx,MXAO@MXAO.fx,Gone@Gone.fx\n[LUT.fx]\nTexture="LUT.png"\n')
+    write(presets / "readme.txt", "Techniques=Unused@Unused.fx\n")
+
+    pruned, selection = prune_shaders(DirectorySource(shaders), DirectorySource(presets))
+
+    files, _ = pruned.scan()
+    assert set(files) == {
+        "Shaders/Bloom.fx", "Shaders/ReShade.fxh", "Shaders/Common/Blur.fxh", "Shaders/Extra/MXAO.fx",
+        "Textures/Dirt.png", "Textures/LUT.png",
+    }
+    assert selection.missing == ["Gone.fx", "Missing.fxh"]
@@ -0,0 +1,82 @@
+import json
+
+import verify_install
+from engine.backup import BackupStore
+from engine.components import COMPONENTS, InstallTargets
+from engine.filters import filters_for
+from engine.installer import InstallEngine, InstallOptions, bundle_sources
+from engine.verify import verify_tree
+
+TEMPLATE = "FFXIV_CHR0040000000000001"
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def make_configs(configs):
+    prefix = {name: configs / component.payload_prefix for name, component in COMPONENTS.items()}
+    write(prefix["skills"] / "Ninja/vfx.avfx", "vfx")
+    write(prefix["skills"] / "Samurai/vfx.avfx", "vfx")
+    write(prefix["reshade-presets"] / "Preset.ini", "Techniques=\n")
+    write(prefix["reshade-shaders"] / "Shaders/Bloom.fx", "bloom")
+    write(prefix["ffxiv-config"] / "FFXIV.cfg", "<Display Settings>\nScreenWidth\t1920\nGamma\t60\n")
+    write(prefix["ffxiv-config"] / TEMPLATE / "ADDON.DAT", "addon")
+    write(prefix["ffxiv-config"] / "log/old.log", "excluded")
+    write(prefix["plugin-configs"] / "Plugin.json", '{"a": 1}')
+    write(prefix["plugin-configs"] / "QoLBar/iconCache.json", "{}")
+    write(prefix["plugin-configs"] / "backups/Plugin.json", "excluded")
+
+
+def make_targets(tmp_path):
+    (tmp_path / "FFXIV" / "game").mkdir(parents=True)
+    return InstallTargets(tmp_path / "FFXIV", tmp_path / "My Games", tmp_path / "XIVLauncher")
+
+
+def install(configs, targets, backups):
+    engine = InstallEngine(bundle_sources(None, configs), backups=backups)
+    options = InstallOptions(workers=2)
+    report = engine.run([targets], options)
+    engine.run_deferred(options, report)
+    return report
+
+
+def test_install_reinstall_verify(tmp_path, monkeypatch, capsys):
+    monkeypatch.delenv("XELDAR_PAYLOAD", raising=False)
+    configs = tmp_path / "Configs"
+    make_configs(configs)
+    targets = make_targets(tmp_path)
+    backups = BackupStore(tmp_path / "backups")
+
+    first = install(configs, targets, backups)
+    assert sum(result.copied for result in first.components) == 8
+    ffxiv = targets.destination(COMPONENTS["ffxiv-config"])
+    assert (ffxiv / TEMPLATE / "ADDON.DAT").read_text(encoding="utf-8") == "addon"
+    assert not (ffxiv / "log").exists()
+
+    second = install(configs, targets, backups)
+    assert [(result.copied, result.deleted) for result in second.components] == [(0, 0)] * len(second.components)
+    for name in COMPONENTS:
+        assert backups.snapshots(name) == []
+
+    write(ffxiv / "FFXIV.cfg", "<Display Settings>\nScreenWidth\t2560\nGamma\t50\n")
+    install(configs, targets, backups)
+    assert (ffxiv / "FFXIV.cfg").read_text(encoding="utf-8") == "<Display Settings>\nScreenWidth\t2560\nGamma\t60\n"
+    assert len(backups.snapshots("ffxiv-config")) == 1
+    fourth = install(configs, targets, backups)
+    assert sum(result.copied for result in fourth.components) == 0
+
+    plugins = targets.destination(COMPONENTS["plugin-configs"])
+    filters = filters_for("plugin-configs")
+    report = verify_tree(filters.apply(bundle_sources(None, configs)["plugin-configs"]), plugins, "plugin-configs",
+                         ignore=filters.excludes)
+    assert report.clean and report.ok == 2
+
+    args = ["--game", str(targets.game), "--documents", str(targets.documents), "--appdata", str(targets.appdata),
+            "--configs", str(configs), "--json"]
+    capsys.readouterr()
+    assert verify_install.main(args) == 0
+    reports = {report["component"]: report for report in json.loads(capsys.readouterr().out)}
+    assert reports[f"ffxiv-config/{TEMPLATE}"]["ok"] == 1
+    assert reports["ffxiv-config"]["missing"] == []
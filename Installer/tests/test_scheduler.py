@@ -0,0 +1,21 @@
+import threading
+
+from engine import scheduler
+from engine.scheduler import CopyScheduler
+
+
+def test_background_priority_only_applies_to_pool_threads(monkeypatch):
+    lowered = []
+    monkeypatch.setattr(scheduler, "lower_io_priority", lambda: lowered.append(threading.current_thread().name))
+
+    with CopyScheduler(1, background=True) as pool:
+        names = pool.map(lambda item: threading.current_thread().name, [1])
+
+    assert names[0].startswith("background-copy")
+    assert lowered == names
+    assert threading.current_thread().name not in lowered
+
+
+def test_foreground_scheduler_runs_small_batches_inline():
+    with CopyScheduler(4) as pool:
+        assert pool.map(lambda item: threading.current_thread().name, [1]) == [threading.current_thread().name]
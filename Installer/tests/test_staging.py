@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from engine.sources import DirectorySource
+from engine.staging import StagingArea
+from engine.sync import sync_tree
+from engine.telemetry import Telemetry
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+class FlakySource(DirectorySource):
+
+    def __init__(self, root, fail_after):
+        super().__init__(root)
+        self.fail_after = fail_after
+        self.copies = 0
+
+    def copy_to(self, rel, target, backend=None, digest=None):
+        if self.copies == self.fail_after:
+            raise OSError("disk went away")
+        self.copies += 1
+        return super().copy_to(rel, target, backend, digest)
+
+
+def test_interrupted_staged_sync_resumes_without_recopying(tmp_path):
+    src, dest = tmp_path / "src", tmp_path / "dest"
+    for name in "abcd":
+        write(src / f"{name}.txt", name * 10)
+
+    with pytest.raises(OSError):
+        sync_tree(FlakySource(src, fail_after=2), dest, staged=True)
+    assert not dest.exists() or not any(dest.iterdir())
+    assert len(StagingArea(dest).completed) == 2
+
+    source = FlakySource(src, fail_after=-1)
+    telemetry = Telemetry()
+    result = sync_tree(source, dest, staged=True, telemetry=telemetry)
+    assert result.copied == 4
+    assert source.copies == 2
+    assert telemetry.counters["files.resumed"] == 2
+    assert sorted(path.name for path in dest.iterdir()) == ["a.txt", "b.txt", "c.txt", "d.txt"]
+    assert not StagingArea(dest).root.exists()
+
+
+def test_pending_commit_is_finished_on_the_next_run(tmp_path):
+    src, dest = tmp_path / "src", tmp_path / "dest"
+    write(src / "a.txt", "new")
+    write(dest / "a.txt", "old")
+    write(dest / "gone.txt", "removed by the interrupted run")
+    stage = StagingArea(dest)
+    write(stage.path("a.txt"), "new")
+    stage.journal_path.write_text(
+        json.dumps({"commit": True, "files": ["a.txt"], "delete": ["gone.txt"], "stale_dirs": []}) + "\n",
+        encoding="utf-8"
+    )
+
+    messages = []
+    sync_tree(DirectorySource(src), dest, staged=True, log=lambda message, tag: messages.append(message))
+    assert (dest / "a.txt").read_text(encoding="utf-8") == "new"
+    assert not (dest / "gone.txt").exists()
+    assert not stage.journal_path.exists()
+    assert any("interrupted install" in message for message in messages)
@@ -0,0 +1,46 @@
+import json
+
+from engine.jsonmerge import JsonMerger
+from engine.payload import Payload, build_payload
+from engine.sqlitedb import SqliteMerger
+from engine.sync import chain_merges, merge_applies, sync_fanout, sync_tree
+from engine.telemetry import Telemetry
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_chained_mergers_only_claim_their_own_files():
+    merge = chain_merges(SqliteMerger(), JsonMerger())
+    assert merge_applies(merge, "Plugin/data.db")
+    assert merge_applies(merge, "Plugin.json")
+    assert not merge_applies(merge, "Plugin/icon.png")
+    assert not merge_applies(None, "Plugin.json")
+
+
+def test_merging_sync_still_deduplicates_and_tees(tmp_path):
+    shipped = tmp_path / "configs" / "pack"
+    for name in ("a", "b", "c"):
+        write(shipped / name / "texture.tex", "same bytes")
+    write(shipped / "Plugin.json", '{"a": 1}')
+    build_payload(tmp_path / "configs", tmp_path / "payload.zip", trees=("pack",))
+    payload = Payload(tmp_path / "payload.zip")
+    dests = [tmp_path / "one", tmp_path / "two"]
+    write(dests[0] / "Plugin.json", '{"a": 0, "mine": true}')
+    merge = chain_merges(SqliteMerger(), JsonMerger())
+    telemetry = Telemetry()
+
+    results = sync_fanout(payload.tree("pack"), dests, merge=merge, telemetry=telemetry)
+
+    assert [result.deduplicated for result in results] == [2, 2]
+    assert telemetry.counters["reads.saved"] == 1
+    assert json.loads((dests[0] / "Plugin.json").read_text()) == {"a": 1, "mine": True}
+    assert json.loads((dests[1] / "Plugin.json").read_text()) == {"a": 1}
+    for dest in dests:
+        assert (dest / "c" / "texture.tex").read_text() == "same bytes"
+
+    result = sync_tree(payload.tree("pack"), dests[0], merge=merge)
+    payload.close()
+    assert result.copied == 0
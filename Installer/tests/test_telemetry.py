@@ -0,0 +1,50 @@
+import json
+import threading
+
+from engine.telemetry import REPORT_VERSION, Telemetry, prune_reports
+
+
+def test_report_aggregates_phases_counters_and_threads(tmp_path):
+    telemetry = Telemetry()
+    telemetry.note("Starting", "progress")
+    with telemetry.span("plan", component="skills"):
+        pass
+
+    def copy():
+        with telemetry.span("copy", dest=tmp_path):
+            telemetry.count("files.copied", 2)
+            telemetry.count("files.skipped", 0)
+
+    threads = [threading.Thread(target=copy, name=f"copy-{index}") for index in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    path = telemetry.write(tmp_path, trace=True, targets=1)
+
+    report = json.loads(path.read_text(encoding="utf-8"))
+    assert report["version"] == REPORT_VERSION and report["targets"] == 1
+    assert report["counters"] == {"files.copied": 6}
+    assert report["phases"]["copy"]["count"] == 3 and report["phases"]["plan"]["count"] == 1
+    assert report["spans"][0]["args"] == {"component": "skills"}
+    assert path.with_suffix(".log").read_text(encoding="utf-8").strip().endswith("[progress] Starting")
+    trace = json.loads((tmp_path / f"{path.stem}.trace.json").read_text(encoding="utf-8"))
+    names = {event["args"]["name"] for event in trace["traceEvents"] if event["ph"] == "M"}
+    assert names == {"MainThread", "copy-0", "copy-1", "copy-2"}
+    assert all(event["args"]["dest"] == str(tmp_path) for event in trace["traceEvents"] if event["name"] == "copy")
+
+
+def test_old_reports_are_pruned_with_their_side_files(tmp_path):
+    for index in range(4):
+        for suffix in (".json", ".log", ".trace.json"):
+            (tmp_path / f"install-2026010{index}-000000{suffix}").write_text("{}", encoding="utf-8")
+    (tmp_path / "verify-20260101-000000.json").write_text("{}", encoding="utf-8")
+
+    prune_reports(tmp_path, "install", keep=2)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "install-20260102-000000.json", "install-20260102-000000.log", "install-20260102-000000.trace.json",
+        "install-20260103-000000.json", "install-20260103-000000.log", "install-20260103-000000.trace.json",
+        "verify-20260101-000000.json",
+    ]
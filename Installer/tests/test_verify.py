@@ -0,0 +1,48 @@
+import os
+
+from engine.manifest import Manifest, hash_file
+from engine.scheduler import CopyScheduler
+from engine.sources import DirectorySource
+from engine.sync import sync_tree
+from engine.verify import verify_tree
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_copy_records_the_digest_computed_while_copying(tmp_path):
+    src, dest = tmp_path / "src", tmp_path / "dest"
+    write(src / "a.txt", "alpha")
+    write(src / "sub/b.txt", "beta")
+
+    sync_tree(DirectorySource(src), dest)
+
+    manifest = Manifest.for_destination(dest)
+    assert {rel: entry.digest for rel, entry in manifest.files.items()} == {
+        rel: hash_file(src / rel) for rel in ("a.txt", "sub/b.txt")
+    }
+
+
+def test_quick_verify_trusts_the_manifest_and_full_verify_rehashes(tmp_path):
+    src, dest = tmp_path / "src", tmp_path / "dest"
+    for name in "abcd":
+        write(src / f"{name}.txt", name * 8)
+    source = DirectorySource(src)
+    sync_tree(source, dest)
+    st = (dest / "a.txt").stat()
+    write(dest / "a.txt", "corrupt!")
+    os.utime(dest / "a.txt", ns=(st.st_atime_ns, st.st_mtime_ns))
+    (dest / "b.txt").unlink()
+    write(dest / "c.txt", "longer than shipped")
+    write(dest / "user.txt", "created by the user")
+
+    quick = verify_tree(source, dest, "test")
+    with CopyScheduler(4) as scheduler:
+        full = verify_tree(source, dest, "test", full=True, scheduler=scheduler)
+
+    assert (quick.ok, quick.hashed, quick.missing, quick.modified) == (2, 0, ["b.txt"], ["c.txt"])
+    assert (full.ok, full.hashed, full.missing, full.modified) == (1, 2, ["b.txt"], ["a.txt", "c.txt"])
+    assert full.extra == ["user.txt"] and not full.clean
+    assert full.to_dict()["modified"] == ["a.txt", "c.txt"]
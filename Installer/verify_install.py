@@ -0,0 +1,106 @@
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, List
+
+from engine.components import COMPONENTS, InstallTargets, default_appdata_path, default_documents_path
+from engine.ffxivcfg import find_characters, is_character_path, shipped_characters, target_characters
+from engine.filters import FilterSet, filters_for, load_rules_file
+from engine.payload import Payload, find_payload
+from engine.reshade import prune_shaders
+from engine.scheduler import CopyScheduler, DEFAULT_WORKERS
+from engine.sources import DirectorySource, FilteredSource, SourceTree, SubtreeSource
+from engine.verify import VerifyReport, verify_tree
+
+
+def bundle_sources(args) -> Dict[str, SourceTree]:
+    payload = Payload(args.payload) if args.payload else find_payload()
+    sources: Dict[str, SourceTree] = {}
+    for component in COMPONENTS.values():
+        if payload is not None:
+            sources[component.name] = payload.tree(component.payload_prefix)
+        else:
+            sources[component.name] = DirectorySource(args.configs / component.payload_prefix)
+    if not args.all_shaders:
+        pruned, selection = prune_shaders(sources["reshade-shaders"], sources["reshade-presets"])
+        if selection.files:
+            sources["reshade-shaders"] = pruned
+    return sources
+
+
+def verify_ffxiv(source: SourceTree, dest: Path, filters: FilterSet, args,
+                 scheduler: CopyScheduler) -> List[VerifyReport]:
+    filtered = filters.apply(source)
+    reports = [verify_tree(
+        FilteredSource(filtered, lambda rel: not is_character_path(rel)), dest, "ffxiv-config",
+        ignore=lambda rel: filters.excludes(rel) or is_character_path(rel), full=args.full, scheduler=scheduler
+    )]
+    shipped = shipped_characters(filtered)
+    if not shipped:
+        return reports
+    template = shipped[0]
+    for name in target_characters(find_characters(dest), template, args.character):
+        reports.append(verify_tree(
+            SubtreeSource(filtered, template), dest / name, f"ffxiv-config/{name}",
+            ignore=lambda rel: filters.excludes(f"{template}/{rel}"), full=args.full, scheduler=scheduler
+        ))
+    return reports
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check an existing install against the bundled configs.")
+    parser.add_argument("--game", type=Path, help="FFXIV install folder (the one containing 'game')")
+    parser.add_argument("--documents", type=Path, default=default_documents_path())
+    parser.add_argument("--appdata", type=Path, default=default_appdata_path())
+    parser.add_argument("--configs", type=Path, default=Path(__file__).parent.parent / "Configs")
+    parser.add_argument("--payload", type=Path, help="Payload archive or installer exe to verify against")
+    parser.add_argument("--component", action="append", choices=sorted(COMPONENTS),
+                        help="Component to verify (repeatable, default: all with a known destination)")
+    parser.add_argument("--character", action="append",
+                        help="FFXIV_CHR folder or character ID the settings were applied to "
+                             "(repeatable, default: every character found)")
+    parser.add_argument("--full", action="store_true", help="Hash every file instead of trusting size+mtime")
+    parser.add_argument("--all-shaders", action="store_true", help="Expect every bundled shader, not just the used ones")
+    parser.add_argument("--rules", type=Path, help="Extra exclude rules file used for the install")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--show", type=int, default=10, help="Files listed per category in the text report")
+    args = parser.parse_args(argv)
+
+    targets = InstallTargets(args.game, args.documents, args.appdata)
+    sources = bundle_sources(args)
+    extra = load_rules_file(args.rules) if args.rules else None
+
+    reports = []
+    with CopyScheduler(args.workers) as scheduler:
+        for name in args.component or list(COMPONENTS):
+            dest = targets.destination(COMPONENTS[name])
+            if dest is None:
+                continue
+            filters = filters_for(name, extra)
+            if name == "ffxiv-config":
+                reports += verify_ffxiv(sources[name], dest, filters, args, scheduler)
+                continue
+            reports.append(verify_tree(
+                filters.apply(sources[name]), dest, name,
+                ignore=filters.excludes, full=args.full, scheduler=scheduler
+            ))
+
+    if args.json:
+        print(json.dumps([report.to_dict() for report in reports], indent=2))
+    else:
+        for report in reports:
+            status = "OK" if report.clean else "DIFFERS"
+            print(f"{report.component:<16} {status:<8} {report.ok} ok, {len(report.missing)} missing, "
+                  f"{len(report.modified)} modified, {len(report.extra)} extra ({report.hashed} hashed) - {report.dest}")
+            for label, files in (("missing", report.missing), ("modified", report.modified)):
+                for rel in files[:args.show]:
+                    print(f"    {label}: {rel}")
+                if len(files) > args.show:
+                    print(f"    ... {len(files) - args.show} more {label}")
+    return 0 if all(report.clean for report in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())